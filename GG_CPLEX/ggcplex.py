@@ -8,58 +8,36 @@
 
 import sys
 import math
+import time
+from pathlib import Path
+import numpy as np
 from docplex.mp.model import Model
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from atsp import instrument
+from atsp.cache import load_cached
+from atsp.matrices import arc_mask, compile_gg, start_vector
+from atsp.heuristics import best_tour
+from atsp.backends import cplex as cplex_backend
+from atsp.solution import extract
+
 def parse_tsplib_atsp(path):
     """
-    Parser simple para archivos TSPLIB ATSP (formato clásico con EDGE_WEIGHT_SECTION
-    que contiene la matriz completa). Devuelve la matriz de costos como lista de listas.
-    Asume que la sección EDGE_WEIGHT_SECTION contiene n*n números (full matrix).
+    Lee un archivo TSPLIB ATSP con el lector compartido (atsp.tsplib, a través de
+    la caché de atsp.cache), que acepta todos los EDGE_WEIGHT_FORMAT y archivos
+    .gz/.bz2. Devuelve la matriz de costos (ndarray n x n).
     """
-    with open(path, 'r') as f:
-        lines = [ln.strip() for ln in f]
-    dim = None
-    section = None
-    data = []
-    for ln in lines:
-        if ln == '' or ln.startswith('COMMENT') or ln.startswith('NAME'):
-            continue
-        if ln.startswith('DIMENSION'):
-            parts = ln.replace(':', ' ').split()
-            for p in parts:
-                if p.isdigit():
-                    dim = int(p)
-                    break
-        if ln.startswith('EDGE_WEIGHT_SECTION'):
-            section = 'EDGE'
-            continue
-        if section == 'EDGE':
-            if ln == 'EOF':
-                break
-            # puede haber números en varias columnas, los juntamos.
-            toks = ln.split()
-            for t in toks:
-                data.append(int(t))
-    if dim is None:
-        raise ValueError("No se pudo detectar DIMENSION en el archivo TSPLIB.")
-    if len(data) < dim*dim:
-        raise ValueError(f"No hay suficientes datos de matriz (esperado {dim*dim}, recibido {len(data)})")
-    # formar la matriz
-    matrix = []
-    idx = 0
-    for i in range(dim):
-        row = []
-        for j in range(dim):
-            row.append(data[idx])
-            idx += 1
-        matrix.append(row)
-    return matrix
-
-def build_and_solve_GG(cost_matrix, time_limit_seconds=3600, log_output=False):
+    return load_cached(path)
+
+def build_and_solve_GG(cost_matrix, time_limit_seconds=3600, log_output=False, tour=None, fases=None):
     """
     Construye y resuelve la formulación GG para la matriz de costos dada.
     Devuelve un diccionario con la información requerida (n, var_count, cons_count, time, gap, best_bound, obj).
+    Si se entrega un tour, se agrega como MIP start. Los tiempos por fase
+    (instrument.Phases) se acumulan en fases y van también en el diccionario.
     """
+    fases = fases if fases is not None else instrument.Phases()
+    t_build = time.perf_counter()
     n = len(cost_matrix)
     mdl = Model(name="GG_ATSP")
     # Variables x_{i,j} binarias para todos i,j = 0..n-1
@@ -75,7 +53,7 @@ def build_and_solve_GG(cost_matrix, time_limit_seconds=3600, log_output=False):
             g[(i,j)] = mdl.continuous_var(lb=0.0, name=f"g_{i}_{j}")
 
     # Objetivo
-    mdl.minimize(mdl.sum(cost_matrix[i][j] * x[(i,j)] for i in range(n) for j in range(n)))
+    mdl.minimize(mdl.sum(cost_matrix[i, j] * x[(i,j)] for i in range(n) for j in range(n)))
 
     # Restricciones de grado: entra = 1, sale = 1
     for j in range(n):
@@ -94,20 +72,28 @@ def build_and_solve_GG(cost_matrix, time_limit_seconds=3600, log_output=False):
         for j in range(n):
             mdl.add_constraint(g[(i,j)] <= bigM * x[(i,j)], ctname=f"g_bound_{i}_{j}")
 
+    if tour is not None:
+        cplex_backend.add_mip_start_docplex(mdl, x, tour)
+
     # Parámetros CPLEX vía docplex
     mdl.parameters.timelimit = time_limit_seconds
     # opcional: más logging 
     if log_output:
         mdl.print_information()
+    fases.add("Construccion_s", time.perf_counter() - t_build)
 
-    # resolver
-    sol = mdl.solve(log_output=log_output)
     # obtener el objeto CPLEX subyacente para métricas más detalladas
     try:
         cpx = mdl.get_cplex()
+        cplex_backend.install_callbacks(cpx, [cplex_backend.PhaseCallback(fases)])
     except:
         cpx = None
 
+    # resolver
+    with fases.phase("Tiempo_s"):
+        sol = mdl.solve(log_output=log_output)
+    t_extract = time.perf_counter()
+
     # Contar variables y restricciones (manuales)
     num_x = n * n
     num_g = (n - 1) * n
@@ -126,10 +112,7 @@ def build_and_solve_GG(cost_matrix, time_limit_seconds=3600, log_output=False):
     obj = None
     status = None
     if cpx is not None:
-        try:
-            solve_time = cpx.get_time()
-        except:
-            solve_time = None
+        solve_time = fases.times["Tiempo_s"]
         try:
             # gap relativo (puede fallar si no es MIP)
             mipgap = cpx.solution.get_mip_relative_gap()
@@ -177,25 +160,84 @@ def build_and_solve_GG(cost_matrix, time_limit_seconds=3600, log_output=False):
         "status": status,
         "solution_exists": sol is not None
     }
+    fases.add("Extraccion_s", time.perf_counter() - t_extract)
+    result.update(fases.as_row())
     return result, mdl, sol
 
-def example_run_on_file(path_atsp, time_limit_seconds=3600, log_output=False):
+def build_and_solve_GG_fast(cost_matrix, time_limit_seconds=3600, log_output=False, names=False, tour=None,
+                            fases=None):
+    """
+    Igual que build_and_solve_GG, pero arma el modelo de una vez con la API de
+    arreglos de cplex.Cplex, sin las variables x_i_i (ni sus g_i_i) y, con
+    names=False, sin nombres. Devuelve (result, cpx, cm) con cm el CompiledModel
+    (cm.tail/cm.head dan el arco de cada columna x).
+    """
+    fases = fases if fases is not None else instrument.Phases()
+    with fases.phase("Construccion_s"):
+        cm = compile_gg(cost_matrix)
+        cpx = cplex_backend.build_model(cm, names=names, log_output=log_output)
+        if tour is not None:
+            cplex_backend.add_start(cpx, start_vector(cm, tour))
+
+    cpx.parameters.timelimit.set(time_limit_seconds)
+    fase_cb = cplex_backend.PhaseCallback(fases)
+    cplex_backend.install_callbacks(cpx, [fase_cb])
+    fase_cb.t0 = time.perf_counter()
+    with fases.phase("Tiempo_s"):
+        cpx.solve()
+
+    with fases.phase("Extraccion_s"):
+        stats = cplex_backend.solution_stats(cpx)
+        result = {
+            "n": cm.n,
+            "var_count": cm.num_vars,
+            "cons_count": cm.num_constrs,
+            "build_time_sec": fases.times["Construccion_s"],
+            "solve_time_sec": fases.times["Tiempo_s"],
+            "mipgap": stats["gap"] / 100,
+            "best_bound": stats["best_bound"],
+            "objective": stats["objetivo"],
+            "status": cpx.solution.get_status(),
+            "solution_exists": stats["objetivo"] is not None
+        }
+    result.update(fases.as_row())
+    return result, cpx, cm
+
+def example_run_on_file(path_atsp, time_limit_seconds=3600, log_output=False, fast=True, mip_start=True):
     print("Parseando instancia:", path_atsp)
-    cost = parse_tsplib_atsp(path_atsp)
+    fases = instrument.Phases()
+    with fases.phase("Lectura_s"):
+        cost = parse_tsplib_atsp(path_atsp)
     print("Dimension detectada:", len(cost))
-    res, mdl, sol = build_and_solve_GG(cost, time_limit_seconds=time_limit_seconds, log_output=log_output)
+    tour = None
+    if mip_start:
+        t0 = time.time()
+        tour, heuristica = best_tour(cost)
+        print(f"Tour heurístico: {heuristica} ({time.time() - t0:.3f} s)")
+    if fast:
+        res, cpx, cm = build_and_solve_GG_fast(cost, time_limit_seconds=time_limit_seconds, log_output=log_output, tour=tour,
+                                               fases=fases)
+    else:
+        res, mdl, sol = build_and_solve_GG(cost, time_limit_seconds=time_limit_seconds, log_output=log_output, tour=tour,
+                                           fases=fases)
+    # tour: todas las x de una vez (x van primero en ambos modelos), sucesores y validación
+    if res["solution_exists"]:
+        with fases.phase("Extraccion_s"):
+            if fast:
+                tail, head, cpx_sol = cm.tail, cm.head, cpx
+            else:
+                # build_and_solve_GG crea x_i_j para todo i, j (diagonal incluida), en orden
+                tail, head = np.nonzero(arc_mask(len(cost), diagonal=True))
+                cpx_sol = mdl.get_cplex()
+            solucion = extract(cost, tail, head, cplex_backend.x_values(cpx_sol, tail.size),
+                               objective=res["objective"])
+        res.update(solucion.as_row())
+        res.update(fases.as_row())
+        if solucion.message:
+            print("Tour inválido:", solucion.message)
     print("*** RESULTADOS ***")
     for k,v in res.items():
         print(f"{k}: {v}")
-   
-    if res["solution_exists"]:
-        tour = []
-        for i in range(res["n"]):
-            for j in range(res["n"]):
-                var = mdl.get_var_by_name(f"x_{i}_{j}")
-                if var is not None and var.solution_value > 0.5:
-                    tour.append((i,j))
-        print("Arcos seleccionados (parcial):", tour)
     return res
 
 if __name__ == "__main__":
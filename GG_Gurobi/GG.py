@@ -1,56 +1,52 @@
 import sys
-import glob
 import time
 import os
-import threading
-import pandas as pd
+from pathlib import Path
+import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
 
-def iniciar_reloj(stop_flag):
-    inicio = time.time()
-    while not stop_flag["stop"]:
-        trans = int(time.time() - inicio)
-        print(f"\r⏳ Tiempo transcurrido: {trans} s", end="", flush=True)
-        time.sleep(0.5)
-    print()  
-
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from atsp.cache import load_cached
+from atsp.matrices import arc_mask, compile_gg, start_vector
+from atsp.heuristics import best_tour, successors
+from atsp.instances import INSTANCES, RESULTS_DIR, instance_path, size_class
+from atsp import instrument
+from atsp.backends.gurobi import (Session, build_model, combine_callbacks, phase_callback,
+                                 set_start, telemetry_callback, x_values)
+from atsp.results import ResultsSink
+from atsp.solution import extract
+from atsp.telemetry import Telemetry
+
+ARCHIVO_SALIDA = "Resultados_GG_ATSP.csv"
+# progreso del solver (incumbente, cota, nodos) en un .jsonl por instancia; apagado por defecto
+TELEMETRIA = False
+CARPETA_TELEMETRIA = str(RESULTS_DIR / "telemetria" / "GG")
+COLUMNAS = [
+    "Grupo", "Instancia", "Nodos",
+    "Vars", "Restr",
+    "Heuristica", "Heuristica (s)",
+    *instrument.COLUMNS, "Gap (%)",
+    "Best Bound", "Objetivo", "Tour_costo", "Tour_valido", "Tour"
+]
 
 def leer_archivo_tsplib(filename):
-    with open(filename, "r") as f:
-        lines = f.readlines()
-
-    n = 0
-    raw_data = []
-    reading = False
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("DIMENSION"):
-            n = int(line.split(":")[1].strip())
-        elif line.startswith("EDGE_WEIGHT_SECTION"):
-            reading = True
-        elif line.startswith("EOF"):
-            break
-        elif reading:
-            vals = [int(x) for x in line.split() if x.isdigit()]
-            raw_data.extend(vals)
-
-    matriz = []
-    for i in range(n):
-        matriz.append(raw_data[i * n:(i + 1) * n])
-    return n, matriz
+    matriz = load_cached(filename)
+    return len(matriz), matriz
 
 
-# solver GG
-def solve_atsp_gavish_graves(filename, n, dist, time_limit=3600):
+def construir_gg_matricial(n, dist, env, tour=None):
+    # mismo modelo que el armado por restricciones, pero con matrices dispersas
+    cm = compile_gg(dist, diagonal=True)
+    model, v = build_model(cm, env=env)
+    if tour is not None:
+        set_start(v, start_vector(cm, tour))
+    model.ModelName = "ATSP_GG"
+    return model
 
-    env = gp.Env(empty=True)
-    env.setParam("OutputFlag", 0)
-    env.start()
 
+def construir_gg(n, dist, env, tour=None):
     model = gp.Model("ATSP_GG", env=env)
-    model.setParam("TimeLimit", time_limit)
 
     N = range(n)
     N2 = range(1, n)
@@ -66,7 +62,7 @@ def solve_atsp_gavish_graves(filename, n, dist, time_limit=3600):
 
     # objetivo
     model.setObjective(
-        gp.quicksum(dist[i][j] * x[i, j] for i, j in x.keys()),
+        gp.quicksum(dist[i, j] * x[i, j] for i, j in x.keys()),
         GRB.MINIMIZE
     )
 
@@ -91,84 +87,118 @@ def solve_atsp_gavish_graves(filename, n, dist, time_limit=3600):
             else:
                 model.addConstr(g[i, j] == 0)
 
-    # resolver con reloj
-    stop_flag = {"stop": False}
-    hilo = threading.Thread(target=iniciar_reloj, args=(stop_flag,))
-    hilo.start()
+    # tour heurístico como MIP start (solo las x, Gurobi completa las g)
+    if tour is not None:
+        succ = successors(tour)
+        for i, j in x.keys():
+            x[i, j].Start = 1 if succ[i] == j else 0
 
-    inicio = time.time()
-    model.optimize()
-    tiempo = time.time() - inicio
+    return model
 
-    stop_flag["stop"] = True
-    hilo.join()
 
-    # datos requeridos
-    vars_total = model.NumVars
-    restr_total = model.NumConstrs
+# solver GG
+def solve_atsp_gavish_graves(filename, n, dist, time_limit=3600, matricial=True, mip_start=True,
+                             fases=None, env=None, telemetry_dir=None):
+    # fases trae la lectura ya medida; aquí se agregan construcción, resolución y extracción
+    fases = fases if fases is not None else instrument.Phases()
+
+    # env es el de una Session compartida por el lote; sin él se pide uno propio
+    sesion = Session() if env is None else None
+    env = env if env is not None else sesion.env
+
+    tour, heuristica, t_heur = None, None, 0.0
+    if mip_start:
+        inicio = time.time()
+        tour, heuristica = best_tour(dist)
+        t_heur = time.time() - inicio
+
+    with fases.phase("Construccion_s"):
+        if matricial:
+            model = construir_gg_matricial(n, dist, env, tour)
+        else:
+            model = construir_gg(n, dist, env, tour)
+        model.update()
+
+    model.setParam("TimeLimit", time_limit)
+
+    # con telemetry_dir se registra el progreso desde los callbacks de Gurobi
+    callbacks = [phase_callback(fases)]
+    telemetria = None
+    if telemetry_dir is not None:
+        os.makedirs(telemetry_dir, exist_ok=True)
+        nombre = os.path.basename(filename)
+        telemetria = Telemetry(os.path.join(telemetry_dir, f"{nombre}.jsonl"), echo=True,
+                               tags={"instancia": nombre})
+        callbacks.append(telemetry_callback(telemetria))
 
-    if model.SolCount == 0:
-        return {
+    with fases.phase("Tiempo_s"):
+        model.optimize(combine_callbacks(callbacks))
+
+    if telemetria is not None:
+        telemetria.record(model.ObjVal if model.SolCount else None, model.ObjBound,
+                          int(model.NodeCount), 0, t=model.Runtime)
+        telemetria.close()
+
+    # datos requeridos
+    with fases.phase("Extraccion_s"):
+        res = {
             "Instancia": os.path.basename(filename),
             "Nodos": n,
-            "Vars": vars_total,
-            "Restr": restr_total,
-            "Tiempo (s)": round(tiempo, 4),
-            "Gap (%)": 100.0,
+            "Vars": model.NumVars,
+            "Restr": model.NumConstrs,
+            "Heuristica": heuristica,
+            "Heuristica (s)": round(t_heur, 4),
+            "Gap (%)": round(model.MIPGap * 100, 4) if model.SolCount else 100.0,
             "Best Bound": model.ObjBound,
-            "Objetivo": None
+            "Objetivo": model.ObjVal if model.SolCount else None,
         }
+        if model.SolCount:
+            # las x van primero y en el mismo orden en ambos constructores
+            tail, head = np.nonzero(arc_mask(n))
+            sol = extract(dist, tail, head, x_values(model, tail.size),
+                          objective=model.ObjVal)
+            res.update(sol.as_row())
+    res.update(fases.as_row())
 
-    return {
-        "Instancia": os.path.basename(filename),
-        "Nodos": n,
-        "Vars": vars_total,
-        "Restr": restr_total,
-        "Tiempo (s)": round(tiempo, 4),
-        "Gap (%)": round(model.MIPGap * 100, 4),
-        "Best Bound": model.ObjBound,
-        "Objetivo": model.ObjVal
-    }
+    model.dispose()
+    if sesion is not None:
+        sesion.close()
+    return res
 
 
 # manual y automatico
 if __name__ == "__main__":
 
-    BASE = r"C:\Users\ZEPHYRUS G14\Desktop\Nueva carpeta\Nueva carpeta"
-
-    carpetas = {
-        "Pequeños": os.path.join(BASE, "Pequeños"),
-        "Medianos": os.path.join(BASE, "Medianos"),
-        "Grandes": os.path.join(BASE, "Grandes")
-    }
-
+    # instancias de atsp.instances (instancias/ del repositorio); el grupo sale
+    # del número de nodos con size_class en vez de la carpeta
     MODO_MANUAL = False
     INSTANCIA_MANUAL = "rbg403.atsp"
 
-    resultados = []
+    # cada instancia se escribe (con fsync) apenas termina; al relanzar el
+    # script se saltan las que ya están en el CSV
+    salida = ResultsSink(ARCHIVO_SALIDA, COLUMNAS, key=("Instancia",), delimiter=';')
+    hechas = salida.done()
+    # una licencia para todas las instancias en vez de un gp.Env por instancia
+    sesion = Session()
 
     print("\n--- Algoritmo GG (Gavish & Graves) | Gurobi ---")
 
     # manual(prueba de 1 instancia))
     if MODO_MANUAL:
-        archivo = None
-        for grupo, carpeta in carpetas.items():
-            ruta = os.path.join(carpeta, INSTANCIA_MANUAL)
-            if os.path.exists(ruta):
-                archivo = ruta
-                grupo_usado = grupo
-                break
-
-        if not archivo:
+        archivo = str(instance_path(INSTANCIA_MANUAL))
+        if not os.path.exists(archivo):
             print("ERROR: No se encontró la instancia.")
             sys.exit()
 
         print(f"\nProcesando instancia manual: {archivo}")
 
-        n, dist = leer_archivo_tsplib(archivo)
-        res = solve_atsp_gavish_graves(archivo, n, dist)
-        res["Grupo"] = grupo_usado
-        resultados.append(res)
+        fases = instrument.Phases()
+        with fases.phase("Lectura_s"):
+            n, dist = leer_archivo_tsplib(archivo)
+        res = solve_atsp_gavish_graves(archivo, n, dist, fases=fases, env=sesion.env,
+                                       telemetry_dir=CARPETA_TELEMETRIA if TELEMETRIA else None)
+        res["Grupo"] = size_class(n)
+        salida.append(res)
 
         print("\nRESULTADO:")
         print(res)
@@ -177,29 +207,21 @@ if __name__ == "__main__":
     else:
         print("\n[MODO AUTOMÁTICO] Ejecutando todas las instancias...\n")
 
-        for grupo, carpeta in carpetas.items():
-            print(f"> Carpeta {grupo} ({carpeta})")
-
-            archivos = glob.glob(os.path.join(carpeta, "*.atsp"))
-
-            for archivo in archivos:
-                print(f"   - {os.path.basename(archivo)} ... ")
+        for nombre in INSTANCES:
+            archivo = str(instance_path(nombre))
+            if (os.path.basename(archivo),) in hechas:
+                print(f"   - {os.path.basename(archivo)} ya está en {ARCHIVO_SALIDA}, se salta")
+                continue
+            fases = instrument.Phases()
+            with fases.phase("Lectura_s"):
                 n, dist = leer_archivo_tsplib(archivo)
-                res = solve_atsp_gavish_graves(archivo, n, dist)
-                res["Grupo"] = grupo
-                resultados.append(res)
-                print("   ✓ Terminado")
-
-    # exportar resultados   
-    df = pd.DataFrame(resultados)
-    df = df[[
-        "Grupo", "Instancia", "Nodos",
-        "Vars", "Restr",
-        "Tiempo (s)", "Gap (%)",
-        "Best Bound", "Objetivo"
-    ]]
-
-    df.to_csv("Resultados_GG_ATSP.csv", sep=';', index=False)
-
-    print("\nCSV generado: Resultados_GG_ATSP.csv")
+            print(f"   - {os.path.basename(archivo)} ({size_class(n)}) ... ")
+            res = solve_atsp_gavish_graves(archivo, n, dist, fases=fases, env=sesion.env,
+                                           telemetry_dir=CARPETA_TELEMETRIA if TELEMETRIA else None)
+            res["Grupo"] = size_class(n)
+            salida.append(res)
+            print("   ✓ Terminado")
+
+    sesion.close()
+    print(f"\nCSV generado: {ARCHIVO_SALIDA}")
     print("¡Proceso completado!")
@@ -1,10 +1,8 @@
-import re
+import sys
 import json
 import time
-import math
-import cplex
+import numpy as np
 from pathlib import Path
-from docplex.mp.model import Model
 
 ###############################################################################
 # CONFIG
@@ -19,57 +17,37 @@ INPUT_DIR = BASE_DIR / "instancias"
 # Define la ruta del directorio de salida: BASE_DIR / "Resultados"
 OUTPUT_DIR = BASE_DIR / "Resultados"
 
-print("Usando solver: CPLEX (docplex)")
+sys.path.insert(0, str(BASE_DIR))
+from atsp import instrument
+from atsp.cache import load_cached
+from atsp.matrices import arc_mask, compile_mtz, mtz_bounds, start_vector
+from atsp.heuristics import best_tour
+from atsp.backends import cplex as cplex_backend
+from atsp.solution import extract
 
 ###############################################################################
 # PARSER TSPLIB
 ###############################################################################
 
 def parse_matrix_file(file_path):
-    """Lee matriz TSPLIB full matrix o matriz simple."""
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        text = f.read()
-
-    # Detectar líneas de solo números (matriz simple)
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    numeric = [ln for ln in lines if re.match(r"^[\d\.\-\s]+$", ln)]
-
-    if numeric:
-        rows = [re.split(r"\s+", ln) for ln in numeric]
-        n = len(rows)
-        if all(len(r) == n for r in rows):
-            try:
-                M = [[float(x) for x in row] for row in rows]
-                for i in range(n):
-                    # Asignar un costo muy alto a los viajes i -> i
-                    M[i][i] = 1e6 
-                return M
-            except:
-                pass
-
-    # TSPLIB FULL MATRIX
-    m = re.search(r"DIMENSION\s*:\s*(\d+)", text, re.IGNORECASE)
-    if m:
-        n = int(m.group(1))
-        body = re.search(r"EDGE_WEIGHT_SECTION\s*(.*)", text, re.IGNORECASE | re.DOTALL)
-        if body:
-            nums = re.findall(r"[-+]?\d*\.\d+|\d+", body.group(1))
-            if len(nums) >= n * n:
-                nums = nums[:n*n]
-                M = [list(map(float, nums[i*n:(i+1)*n])) for i in range(n)]
-                for i in range(n):
-                    # Asignar un costo muy alto a los viajes i -> i
-                    M[i][i] = 1e6 
-                return M
-
-    raise ValueError(f"No se pudo interpretar {file_path}")
+    """Lee matriz TSPLIB (cualquier EDGE_WEIGHT_FORMAT, .gz/.bz2) o matriz simple."""
+    M = load_cached(file_path).astype(float)
+    # Asignar un costo muy alto a los viajes i -> i
+    np.fill_diagonal(M, 1e6)
+    return M
 
 ###############################################################################
 # CONSTRUIR MODELO MTZ
 ###############################################################################
 
-def build_MTZ_model(matrix, bounded=True):
-    """Devuelve un modelo CPLEX MTZ (formulación de Miller-Tucker-Zemlin)."""
+def build_MTZ_model(matrix, bounded=True, tour=None):
+    """
+    Devuelve un modelo CPLEX MTZ (formulación de Miller-Tucker-Zemlin).
+    Si se entrega un tour, se agrega como MIP start.
+    """
+    # docplex solo hace falta en este constructor (el camino rápido usa cplex.Cplex)
+    from docplex.mp.model import Model
+
     n = len(matrix)
     bigM = n - 1 # El valor de Big M en la formulación MTZ
     nodes = range(n)
@@ -88,7 +66,7 @@ def build_MTZ_model(matrix, bounded=True):
         u = {i: mdl.continuous_var(name=f"u_{i}") for i in nodes if i != 0}
 
     # Objetivo: Minimizar el costo total
-    mdl.minimize(mdl.sum(matrix[i][j] * x[(i,j)] for i in nodes for j in nodes))
+    mdl.minimize(mdl.sum(matrix[i, j] * x[(i,j)] for i in nodes for j in nodes))
 
     # Restricciones de grado de entrada (entrar a cada nodo una vez)
     for j in nodes:
@@ -106,66 +84,137 @@ def build_MTZ_model(matrix, bounded=True):
             # u_i - u_j + (n-1) * x_ij <= n - 2
             mdl.add_constraint(u[i] - u[j] + bigM * x[(i,j)] <= n - 2, ctname=f"mtz_{i}_{j}")
 
+    if tour is not None:
+        cplex_backend.add_mip_start_docplex(mdl, x, tour)
+
     return mdl
 
 
+def build_MTZ_model_fast(matrix, bounded=True, names=False, tour=None):
+    """
+    Modelo MTZ armado de una vez con la API de arreglos de cplex.Cplex.
+    No crea las variables x_i_i (que build_MTZ_model penaliza con 1e6) y, con
+    names=False, tampoco los nombres de variables y restricciones.
+    Devuelve (cpx, cm); con cm y set_u_bounds se cambia de variante.
+    """
+    cm = compile_mtz(matrix, bounded=bounded)
+    cpx = cplex_backend.build_model(cm, names=names)
+    if tour is not None:
+        cplex_backend.add_start(cpx, start_vector(cm, tour))
+    cpx.set_problem_name(f"MTZ_{'bounded' if bounded else 'unbounded'}")
+    return cpx, cm
+
+
+def set_u_bounds(model, bounded, cm=None):
+    """
+    Pasa un modelo ya armado a la variante acotada o no acotada cambiando solo
+    las cotas de u; la incumbente de la resolución anterior queda como MIP start.
+    model es un cplex.Cplex de build_MTZ_model_fast (con su cm) o un modelo
+    docplex de build_MTZ_model.
+    """
+    if cm is not None:
+        start = cplex_backend.incumbent_start(model, cm)
+        cplex_backend.set_bounds(model, *mtz_bounds(cm, bounded))
+        if start is not None:
+            cplex_backend.add_start(model, start)
+        model.set_problem_name(f"MTZ_{'bounded' if bounded else 'unbounded'}")
+        return
+
+    # en build_MTZ_model las únicas variables continuas son las u
+    u = list(model.iter_continuous_vars())
+    n = len(u) + 1
+    sol = model.solution
+    for var in u:
+        var.lb, var.ub = (1, n - 1) if bounded else (0, model.infinity)
+    if sol is not None:
+        model.add_mip_start(sol)
+    model.name = f"MTZ_{'bounded' if bounded else 'unbounded'}"
+
+
 ###############################################################################
 # EXTRACCIÓN DE MÉTRICAS DE CPLEX
 ###############################################################################
 
-def get_stats_docplex(model, t0):
-    """Extrae métricas desde CPLEX vía docplex."""
-    # Intentar resolver el modelo
-    sol = model.solve() 
-
-    elapsed = time.time() - t0
-
-    # Si no hay solución, devolver métricas incompletas
-    if sol is None:
-        return {
-            "objetivo": None,
-            "variables": model.number_of_variables,
-            "restricciones": model.number_of_constraints,
-            "tiempo": elapsed,
-            "gap": 100.0,
-            "best_bound": None
-        }
-
-    details = model.solve_details
-
-    # El valor objetivo de la solución encontrada
-    objective_value = sol.get_objective_value()
+def get_stats_docplex(model, fases):
+    """Resuelve vía docplex y extrae métricas; los tiempos quedan en fases."""
+    # el callback de fases se instala en el cplex.Cplex que docplex tiene por debajo
+    cplex_backend.install_callbacks(model.get_cplex(), [cplex_backend.PhaseCallback(fases)])
 
-    # Gap correcto (en docplex se llama mip_relative_gap)
-    try:
-        gap = details.mip_relative_gap
-        if gap is None:
-            gap = 1.0 # 100% gap si no se conoce
-    except:
-        gap = 1.0
-
-    gap = gap * 100  # convertir a porcentaje
-
-    try:
-        best_bound = details.best_bound
-    except:
-        best_bound = None
+    # Intentar resolver el modelo
+    with fases.phase("Tiempo_s"):
+        sol = model.solve() 
+
+    with fases.phase("Extraccion_s"):
+        # Si no hay solución, devolver métricas incompletas
+        if sol is None:
+            return {
+                "objetivo": None,
+                "variables": model.number_of_variables,
+                "restricciones": model.number_of_constraints,
+                "tiempo": fases.times["Tiempo_s"],
+                "gap": 100.0,
+                "best_bound": None
+            }
+
+        details = model.solve_details
+
+        # El valor objetivo de la solución encontrada
+        objective_value = sol.get_objective_value()
+
+        # Gap correcto (en docplex se llama mip_relative_gap)
+        try:
+            gap = details.mip_relative_gap
+            if gap is None:
+                gap = 1.0 # 100% gap si no se conoce
+        except:
+            gap = 1.0
+
+        gap = gap * 100  # convertir a porcentaje
+
+        try:
+            best_bound = details.best_bound
+        except:
+            best_bound = None
 
     return {
         "objetivo": objective_value,
         "variables": model.number_of_variables,
         "restricciones": model.number_of_constraints,
-        "tiempo": elapsed,
+        "tiempo": fases.times["Tiempo_s"],
         "gap": gap,
         "best_bound": best_bound
     }
 
+def get_stats_cplex(cpx, fases):
+    """Resuelve un cplex.Cplex (camino rápido) y extrae métricas; los tiempos quedan en fases."""
+    fase_cb = cplex_backend.PhaseCallback(fases)
+    cplex_backend.install_callbacks(cpx, [fase_cb])
+    fase_cb.t0 = time.perf_counter()
+    with fases.phase("Tiempo_s"):
+        cpx.solve()
+
+    with fases.phase("Extraccion_s"):
+        stats = cplex_backend.solution_stats(cpx)
+        stats.update({
+            "variables": cpx.variables.get_num(),
+            "restricciones": cpx.linear_constraints.get_num(),
+        })
+    stats["tiempo"] = fases.times["Tiempo_s"]
+    return stats
+
 ###############################################################################
 # SOLVER GENERAL PARA UNA INSTANCIA
 ###############################################################################
 
-def solve_instance(matrix, time_limit=60):
-    """Resuelve MTZ bounded y unbounded y muestra métricas en consola."""
+def solve_instance(matrix, time_limit=60, fast=True, mip_start=True, lectura=None):
+    """
+    Resuelve MTZ bounded y unbounded y muestra métricas en consola. El modelo
+    se arma una sola vez: unbounded se obtiene relajando las cotas de u del
+    modelo bounded ya resuelto, que además le deja su incumbente como MIP start.
+    Con fast=True usa build_MTZ_model_fast (sin x_i_i ni nombres) y con
+    mip_start=True ambos modelos parten del tour de atsp.heuristics.
+    lectura es el tiempo de parseo, que se informa junto a las demás fases.
+    """
     n = len(matrix)
 
     out = {
@@ -173,16 +222,49 @@ def solve_instance(matrix, time_limit=60):
         "modelos": {}
     }
 
+    tour = None
+    if mip_start:
+        t_heur = time.time()
+        tour, heuristica = best_tour(matrix)
+        out["heuristica"] = heuristica
+        out["tiempo_heuristica"] = time.time() - t_heur
+        print(f"Heurística:            {heuristica} ({out['tiempo_heuristica']:.3f} s)")
+
+    model = cm = None
     for bounded_flag in [True, False]:
         name = "MTZ_bounded" if bounded_flag else "MTZ_unbounded"
 
         print(f"\n--- {name} ---")  # encabezado en consola
 
-        model = build_MTZ_model(matrix, bounded=bounded_flag)
-        model.parameters.timelimit = time_limit
-
-        t0 = time.time()
-        stats = get_stats_docplex(model, t0)
+        fases = instrument.Phases()
+        if lectura is not None:
+            fases.add("Lectura_s", lectura)
+        with fases.phase("Construccion_s"):
+            if model is not None:
+                set_u_bounds(model, bounded_flag, cm)
+            elif fast:
+                model, cm = build_MTZ_model_fast(matrix, bounded=bounded_flag, tour=tour)
+                model.parameters.timelimit.set(time_limit)
+            else:
+                model = build_MTZ_model(matrix, bounded=bounded_flag, tour=tour)
+                model.parameters.timelimit = time_limit
+
+        if fast:
+            stats = get_stats_cplex(model, fases)
+        else:
+            stats = get_stats_docplex(model, fases)
+        if stats["objetivo"] is not None:
+            with fases.phase("Extraccion_s"):
+                if fast:
+                    tail, head = cm.tail, cm.head
+                    xval = cplex_backend.x_values(model, cm.num_arcs)
+                else:
+                    # build_MTZ_model crea primero las x_i_j para todo i, j, en orden
+                    tail, head = np.nonzero(arc_mask(n, diagonal=True))
+                    xval = cplex_backend.x_values(model.get_cplex(), tail.size)
+                stats.update(extract(matrix, tail, head, xval, objective=stats["objetivo"]).as_row())
+        stats["construccion"] = fases.times["Construccion_s"]
+        stats.update(fases.as_row())
 
         out["modelos"][name] = stats
 
@@ -190,11 +272,16 @@ def solve_instance(matrix, time_limit=60):
         print(f"Nodos:                 {n}")
         print(f"Variables:             {stats['variables']}")
         print(f"Restricciones:         {stats['restricciones']}")
+        print(f"Construcción (s):      {stats['construccion']:.3f}")
         print(f"Objetivo:              {stats['objetivo']}")
         print(f"Tiempo (s):            {stats['tiempo']:.3f}")
         print(f"Gap (%):               {stats['gap']:.2f}")
         print(f"Best bound:            {stats['best_bound']}")
+        print(f"Tour:                  {stats.get('Tour')} (costo {stats.get('Tour_costo')})")
+        for fase in instrument.COLUMNS:
+            print(f"{fase + ':':<23}{stats[fase]}")
 
+    model.end()
     return out
 
 
@@ -204,6 +291,7 @@ def solve_instance(matrix, time_limit=60):
 
 def main(time_limit=60):
     """Procesa el archivo br17.atsp, resuelve el modelo MTZ y guarda los resultados."""
+    print("Usando solver: CPLEX (docplex)")
     
     # Lista de archivos a procesar (SOLO br17.atsp)
     target_file_name = "br17.atsp"
@@ -220,7 +308,9 @@ def main(time_limit=60):
 
     print(f"\nProcesando {target_file_name}...")
     try:
+        t_lectura = time.perf_counter()
         M = parse_matrix_file(file_path)
+        t_lectura = time.perf_counter() - t_lectura
     except Exception as e:
         print("Error al leer:", e)
         results.append({"instance": target_file_name, "error": str(e)})
@@ -228,7 +318,7 @@ def main(time_limit=60):
         exit(1)
 
     # Resolver la instancia con el límite de tiempo especificado
-    stats = solve_instance(M, time_limit=time_limit) 
+    stats = solve_instance(M, time_limit=time_limit, lectura=t_lectura)
     stats["instance"] = target_file_name
     results.append(stats)
 
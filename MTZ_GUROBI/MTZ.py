@@ -1,93 +1,67 @@
-import pandas as pd
+import numpy as np
 import os
+import sys
+import time
+from pathlib import Path
 from gurobipy import *
 
-# No me roben la licencia porfavor :C
-options = {
-    "WLSACCESSID": "291dcd15-62ac-4c10-9cf8-3195e3506067",
-    "WLSSECRET": "bd688515-ce3d-4361-a937-350ca6c3990f",
-    "LICENSEID": 2734085,
-}
-# Modo puede ser acotado o no_acotado
-MODO = "no_acotado" # en el paper dicen que es mejor no acotarlo para el solver, pero el problema general lo formula así
- 
-CARPETA_INSTANCIAS = "/home/coni/Tarea4_Opti/MTZ_GUROBI/instancias" # sSte formato me funciona más que poner "instancias" sola (no lo encuentra), no sé porque
-ARCHIVO_SALIDA = f'resultados_mtz_{MODO}.csv'
-
-MIS_INSTANCIAS = [
-    'br17.atsp', 'ftv33.atsp', 'ftv55.atsp', 'ftv64.atsp',  # 4 instancias pequeñas
-    'ftv70.atsp', 'kro124p.atsp', 'ftv170.atsp', # 3 medianas
-    'rbg323.atsp', 'rbg358.atsp', 'rbg403.atsp' # 3 grandes, aunque 403 se sale un poco del rango específicado pero no por tanto
-]
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from atsp.cache import load_cached
+from atsp.matrices import arc_mask, compile_mtz, mtz_bounds, start_vector
+from atsp.heuristics import best_tour, successors
+from atsp.instances import INSTANCE_DIR, INSTANCES
+from atsp import instrument
+from atsp.backends.gurobi import Session, build_model, phase_callback, set_start, x_values
+from atsp.results import ResultsSink, report
+from atsp.solution import extract
+
+# La licencia WLS se lee de GRB_WLSACCESSID, GRB_WLSSECRET y GRB_LICENSEID
+# (atsp.backends.gurobi.license_params); sin ellas se usa gurobi.lic.
+# Modos a resolver, del más al menos restringido: el modelo se arma una vez por
+# instancia y no_acotado parte del acotado ya resuelto relajando las cotas de u
+MODOS = ["acotado", "no_acotado"] # en el paper dicen que es mejor no acotarlo para el solver, pero el problema general lo formula así
+MATRICIAL = True # arma el mismo modelo con matrices dispersas (addMVar/addMConstr) en vez de restricción por restricción
+MIP_START = True # entrega el tour de atsp.heuristics como solución inicial
+
+# instancias/ del repositorio, resuelta desde atsp.instances (no depende del directorio actual)
+CARPETA_INSTANCIAS = str(INSTANCE_DIR)
+ARCHIVOS_SALIDA = {modo: f'resultados_mtz_{modo}.csv' for modo in MODOS}
+
+MIS_INSTANCIAS = INSTANCES
 
 def leer_instancia_atsp(filepath):
     if not os.path.exists(filepath):
         print(f"Error: archivo no encontrado {filepath}")
         return None, None
 
-    with open(filepath, 'r') as f:
-        tokens = f.read().split()
-
-    n = 0
-    start_index = -1
-
-    for i, token in enumerate(tokens):
-        if token in ["DIMENSION:"]:
-            if i + 1 < len(tokens):
-                if tokens[i+1] == ":":
-                    n = int(tokens[i+2])
-                else:
-                    try:
-                        n = int(tokens[i+1])
-                    except ValueError:
-                        pass
-        
-        if token == "EDGE_WEIGHT_SECTION":
-            start_index = i + 1
-            break
-            
-    if n == 0 or start_index == -1:
-        print(f"Error: Parseo fallido {filepath}")
+    try:
+        c = load_cached(filepath)
+    except ValueError as e:
+        print(f"Error: Parseo fallido {filepath} ({e})")
         return None, None
 
-    valores_matriz = []
-    for k in range(start_index, len(tokens)):
-        token = tokens[k]
-        if token == "EOF":
-            break
-        if token.lstrip('-').isdigit(): 
-            valores_matriz.append(int(token))
-
-    if len(valores_matriz) != n * n:
-        print(f"Error: Tamaño no corresponde {filepath}")
-        if len(valores_matriz) < n * n:
-            return None, None
+    return len(c), c
 
-    c = []
-    for i in range(n):
-        fila = valores_matriz[i*n : (i+1)*n]
-        c.append(fila)
+def construir_mtz_matricial(nombre_archivo, n, c, modo, env, tour=None):
+    # diagonal/bound_rows reproducen el modelo de construir_mtz (mismas variables y filas)
+    cm = compile_mtz(c, bounded=(modo == "acotado"), diagonal=True, bound_rows=True)
+    mdl, v = build_model(cm, env=env)
+    if tour is not None:
+        set_start(v, start_vector(cm, tour))
+    mdl.ModelName = f'ATSP_MTZ_{nombre_archivo}'
+    return mdl
 
-    return n, c
-
-def resolver_instancia_mtz(nombre_archivo, n, c, modo, env):
+def construir_mtz(nombre_archivo, n, c, modo, env, tour=None):
     I = [i for i in range(n)]        
     I_u = [i for i in range(1, n)]  
 
-    try:
-        mdl = Model(f'ATSP_MTZ_{nombre_archivo}', env=env)
-    except GurobiError as e:
-        print(f"Error creando modelo: {e}")
-        return None
-
-    mdl.setParam('TimeLimit', 3600)
-    mdl.setParam('OutputFlag', 1)
+    mdl = Model(f'ATSP_MTZ_{nombre_archivo}', env=env)
 
     x = mdl.addVars(I, I, vtype=GRB.BINARY, name='x')
     u = mdl.addVars(I_u, vtype=GRB.CONTINUOUS, lb=0, name='u')
 
     mdl.setObjective(
-        quicksum(c[i][j] * x[i,j] for i in I for j in I if i != j),
+        quicksum(c[i, j] * x[i,j] for i in I for j in I if i != j),
         GRB.MINIMIZE
     )
 
@@ -107,61 +81,161 @@ def resolver_instancia_mtz(nombre_archivo, n, c, modo, env):
             mdl.addConstr(u[i] >= 1)
             mdl.addConstr(u[i] <= n - 1)
 
-    mdl.optimize()
-
-    if mdl.SolCount > 0:
-        gap = mdl.MIPGap * 100
-        obj = mdl.ObjVal 
-    else:
-        gap = 100.0
-        obj = float('inf') 
-
-    res = {
-        "Instancia": nombre_archivo,
-        "Nodos": n,
-        "Variables": mdl.NumVars,
-        "Restricciones": mdl.NumConstrs,
-        "Tiempo_s": round(mdl.Runtime, 2),
-        "Gap_Porcentaje": round(gap, 2),
-        "Funcion_Objetivo": round(obj, 2)
-    }
+    if tour is not None:
+        succ = successors(tour)
+        for i in I:
+            for j in I:
+                x[i,j].Start = 1 if succ[i] == j else 0
+
+    return mdl
+
+def resolver_instancia_mtz(nombre_archivo, n, c, modo, env, matricial=MATRICIAL, mip_start=MIP_START,
+                           fases=None):
+    fases = fases if fases is not None else instrument.Phases()
+    tour, heuristica, t_heur = None, None, 0.0
+    if mip_start:
+        inicio = time.time()
+        tour, heuristica = best_tour(c)
+        t_heur = time.time() - inicio
+
+    try:
+        with fases.phase("Construccion_s"):
+            if matricial:
+                mdl = construir_mtz_matricial(nombre_archivo, n, c, modo, env, tour)
+            else:
+                mdl = construir_mtz(nombre_archivo, n, c, modo, env, tour)
+            mdl.update()
+    except GurobiError as e:
+        print(f"Error creando modelo: {e}")
+        return None
+
+    mdl.setParam('TimeLimit', 3600)
+    mdl.setParam('OutputFlag', 1)
+
+    with fases.phase("Tiempo_s"):
+        mdl.optimize(phase_callback(fases))
+
+    with fases.phase("Extraccion_s"):
+        if mdl.SolCount > 0:
+            gap = mdl.MIPGap * 100
+            obj = mdl.ObjVal 
+        else:
+            gap = 100.0
+            obj = float('inf') 
+
+        res = {
+            "Instancia": nombre_archivo,
+            "Nodos": n,
+            "Variables": mdl.NumVars,
+            "Restricciones": mdl.NumConstrs,
+            "Filas_modelo": mdl.NumConstrs,
+            "Heuristica": heuristica,
+            "Heuristica_s": round(t_heur, 2),
+            "Gap_Porcentaje": round(gap, 2),
+            "Funcion_Objetivo": round(obj, 2)
+        }
+        if mdl.SolCount > 0:
+            # ambos constructores crean x[i, j] para todo i, j (diagonal incluida) y primero
+            tail, head = np.nonzero(arc_mask(n, diagonal=True))
+            res.update(extract(c, tail, head, x_values(mdl, tail.size), objective=obj).as_row())
+    res.update(fases.as_row())
 
     mdl.dispose()
     return res
 
+def resolver_variantes_mtz(nombre_archivo, n, c, modos, sesion, mip_start=MIP_START, lectura=None):
+    # un solo modelo para todos los modos: solo cambian las cotas de u
+    tour, heuristica, t_heur = None, None, 0.0
+    if mip_start:
+        inicio = time.time()
+        tour, heuristica = best_tour(c)
+        t_heur = time.time() - inicio
+
+    t_compilar = time.perf_counter()
+    cm = compile_mtz(c, bounded=(modos[0] == "acotado"), diagonal=True)
+    t_compilar = time.perf_counter() - t_compilar
+
+    variantes = [(modo, *mtz_bounds(cm, modo == "acotado")) for modo in modos]
+    resueltas = sesion.solve_variants(cm, variantes, time_limit=3600, log_output=True,
+                                      start=start_vector(cm, tour) if tour is not None else None)
+
+    resultados = {}
+    for i, (modo, stats, fases) in enumerate(resueltas):
+        if lectura is not None:
+            fases.add("Lectura_s", lectura)
+        if i == 0:
+            fases.add("Construccion_s", t_compilar)
+        tour_cols = {}
+        if stats["x"] is not None:
+            with fases.phase("Extraccion_s"):
+                tour_cols = extract(c, cm.tail, cm.head, stats["x"],
+                                    objective=stats["objetivo"]).as_row()
+        resultados[modo] = {
+            "Instancia": nombre_archivo,
+            "Nodos": n,
+            "Variables": cm.num_vars,
+            # Restricciones cuenta 1 <= u_i <= n-1 como filas (como construir_mtz y
+            # los CSV de Resultados/); el modelo compartido las lleva como cotas de
+            # variable, así que las filas cargadas en Gurobi van en Filas_modelo
+            "Restricciones": cm.num_constrs + (2 * (n - 1) if modo == "acotado" else 0),
+            "Filas_modelo": cm.num_constrs,
+            "Heuristica": heuristica,
+            "Heuristica_s": round(t_heur, 2),
+            "Gap_Porcentaje": round(stats["gap"], 2),
+            "Funcion_Objetivo": round(stats["objetivo"], 2) if stats["objetivo"] is not None else float('inf'),
+            **fases.as_row(),
+            **tour_cols,
+        }
+    return resultados
+
+COLUMNAS = [
+    "Instancia", "Nodos", "Variables", "Restricciones", "Filas_modelo",
+    "Heuristica", "Heuristica_s", *instrument.COLUMNS, "Gap_Porcentaje", "Funcion_Objetivo",
+    "Tour_costo", "Tour_valido", "Tour"
+]
+
 if __name__ == "__main__":
-    resultados_lista = []
+    # una fila por instancia y modo, agregada con fsync; al relanzar se saltan las ya resueltas
+    salidas = {modo: ResultsSink(archivo, COLUMNAS, key=("Instancia",))
+               for modo, archivo in ARCHIVOS_SALIDA.items()}
+    hechas = {modo: salida.done() for modo, salida in salidas.items()}
     
     if not os.path.exists(CARPETA_INSTANCIAS):
         print(f"Error: Directorio '{CARPETA_INSTANCIAS}' no encontrado.")
         exit()
 
+    # un solo entorno con licencia para todo el lote
     try:
-        env = Env(params=options)
-        env.start()
+        sesion = Session(output=True)
     except GurobiError as e:
         print(f"License Error: {e}")
         exit()
 
     for archivo in MIS_INSTANCIAS:
+        modos = [modo for modo in MODOS if (archivo,) not in hechas[modo]]
+        if not modos:
+            print(f"{archivo} ya está en {', '.join(ARCHIVOS_SALIDA.values())}, se salta")
+            continue
         ruta = os.path.join(CARPETA_INSTANCIAS, archivo)
+        inicio = time.perf_counter()
         n, matriz_c = leer_instancia_atsp(ruta)
+        lectura = time.perf_counter() - inicio
         
-        if n and matriz_c:
-            resultado = resolver_instancia_mtz(archivo, n, matriz_c, MODO, env)
-            if resultado:
-                resultados_lista.append(resultado)
-                
-                df = pd.DataFrame(resultados_lista)
-                columnas_ordenadas = [
-                    "Instancia", "Nodos", "Variables", "Restricciones", 
-                    "Tiempo_s", "Gap_Porcentaje", "Funcion_Objetivo"
-                ]
-                df = df[columnas_ordenadas]
-                df.to_csv(ARCHIVO_SALIDA, index=False)
-        else:
+        if matriz_c is None:
             print(f"Skipping {archivo}")
+            continue
+        if MATRICIAL:
+            resultados = resolver_variantes_mtz(archivo, n, matriz_c, modos, sesion, lectura=lectura)
+        else:
+            resultados = {}
+            for modo in modos:
+                fases = instrument.Phases()
+                fases.add("Lectura_s", lectura)
+                resultados[modo] = resolver_instancia_mtz(archivo, n, matriz_c, modo, sesion.env, fases=fases)
+        for modo, resultado in resultados.items():
+            if resultado:
+                salidas[modo].append(resultado)
 
-    env.dispose()
-    if resultados_lista:
-        print(pd.DataFrame(resultados_lista)[["Instancia", "Nodos", "Gap_Porcentaje", "Funcion_Objetivo"]].to_string())
\ No newline at end of file
+    sesion.close()
+    for archivo in ARCHIVOS_SALIDA.values():
+        print(report(archivo, columns=["Instancia", "Nodos", "Gap_Porcentaje", "Funcion_Objetivo"]))
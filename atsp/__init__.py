@@ -0,0 +1,5 @@
+"""Código compartido por los cuatro programas (MTZ/GG con CPLEX/GUROBI).
+
+Los submódulos no importan solvers ni pandas al cargarse; cada uno los importa
+recién cuando los necesita.
+"""
@@ -0,0 +1,3 @@
+from atsp.cli import main
+
+main()
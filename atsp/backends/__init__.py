@@ -0,0 +1 @@
+"""Backends de solver; cada uno importa su librería solo al usarse."""
@@ -0,0 +1,343 @@
+"""Carga de un CompiledModel en CPLEX con las llamadas por arreglo de cplex.Cplex."""
+
+import time
+
+import cplex
+import numpy as np
+
+from atsp.instrument import Phases
+
+_SENSE = {"<": "L", ">": "G", "=": "E"}
+
+
+def _finite(values):
+    return np.clip(values, -cplex.infinity, cplex.infinity).tolist()
+
+
+def build_model(cm, names=False, log_output=False):
+    """
+    Crea un cplex.Cplex con un solo variables.add y un solo linear_constraints.add.
+    Sin names no se genera ningún string por variable ni por restricción, lo que
+    deja el modelo (y el .lp si se escribe) bastante más chico.
+    """
+    cpx = cplex.Cplex()
+    if not log_output:
+        cpx.set_log_stream(None)
+        cpx.set_results_stream(None)
+        cpx.set_warning_stream(None)
+    cpx.set_problem_name(cm.name)
+    cpx.objective.set_sense(cpx.objective.sense.minimize)
+
+    kwargs = {"names": cm.var_names()} if names else {}
+    cpx.variables.add(obj=cm.c.tolist(), lb=_finite(cm.lb), ub=_finite(cm.ub),
+                      types="".join(cm.vtype), **kwargs)
+
+    A = cm.A
+    indices, data, ptr = A.indices.tolist(), A.data.tolist(), A.indptr.tolist()
+    lin_expr = [[indices[s:e], data[s:e]] for s, e in zip(ptr[:-1], ptr[1:])]
+    cpx.linear_constraints.add(lin_expr=lin_expr,
+                               senses="".join(_SENSE[s] for s in cm.sense),
+                               rhs=cm.rhs.tolist())
+    return cpx
+
+
+def add_start(cpx, start):
+    """MIP start desde un vector con NaN en las variables sin valor conocido."""
+    idx = np.flatnonzero(~np.isnan(start))
+    cpx.MIP_starts.add(cplex.SparsePair(ind=idx.tolist(), val=start[idx].tolist()),
+                       cpx.MIP_starts.effort_level.repair)
+
+
+def add_mip_start_docplex(mdl, x, tour):
+    """MIP start para un modelo docplex cuyas variables x están en un dict (i, j) -> var."""
+    from docplex.mp.solution import SolveSolution
+
+    tour = list(tour)
+    arcs = set(zip(tour, tour[1:] + tour[:1]))
+    mdl.add_mip_start(SolveSolution(mdl, {var: 1 if key in arcs else 0 for key, var in x.items()}))
+
+
+def set_params(cpx, params):
+    """
+    Parámetros de CPLEX por su ruta en cpx.parameters (p. ej.
+    {"emphasis.mip": 2, "mip.cuts.gomory": 1}).
+    """
+    for name, value in params.items():
+        param = cpx.parameters
+        for part in name.split("."):
+            param = getattr(param, part)
+        param.set(value)
+
+
+def solution_stats(cpx):
+    """Objetivo, gap (%), best bound y nodos de un cplex.Cplex ya resuelto."""
+    stats = {"objetivo": None, "gap": 100.0, "best_bound": None, "nodos_bb": None}
+    try:
+        stats["best_bound"] = cpx.solution.MIP.get_best_objective()
+        stats["nodos_bb"] = cpx.solution.progress.get_num_nodes_processed()
+    except cplex.exceptions.CplexError:
+        pass
+    if cpx.solution.is_primal_feasible():
+        stats["objetivo"] = cpx.solution.get_objective_value()
+        stats["gap"] = cpx.solution.MIP.get_mip_relative_gap() * 100
+    return stats
+
+
+def x_values(cpx, num_x):
+    """
+    Valores de las x de la incumbente en un arreglo, con un solo get_values. Las
+    x son las primeras num_x columnas (cm.num_arcs en un CompiledModel), así que
+    basta el rango, sin lista de índices.
+    """
+    return np.array(cpx.solution.get_values(0, num_x - 1))
+
+
+def _sparse_rows(cuts):
+    return ([cplex.SparsePair(ind=cols.tolist(), val=[1.0] * cols.size) for cols, _, _ in cuts],
+            [_SENSE[sense] for _, sense, _ in cuts],
+            [rhs for _, _, rhs in cuts])
+
+
+class SubtourCallback:
+    """
+    Callback genérico DFJ: rechaza candidatos enteros con subtours (lazy) y
+    agrega cortes de usuario en la relajación ("root" solo en la raíz).
+    """
+
+    contextmask = (cplex.callbacks.Context.id.candidate | cplex.callbacks.Context.id.relaxation)
+
+    def __init__(self, separator, num_x, fractional="root"):
+        self.separator = separator
+        self.num_x = num_x
+        self.fractional = fractional
+
+    def invoke(self, context):
+        cid = context.get_id()
+        if cid == cplex.callbacks.Context.id.candidate and context.is_candidate_point():
+            xval = context.get_candidate_point(0, self.num_x - 1)
+            cuts = self.separator.integer(xval)
+            if cuts:
+                context.reject_candidate(*_sparse_rows(cuts))
+        elif cid == cplex.callbacks.Context.id.relaxation and self.fractional:
+            if self.fractional == "root" and context.get_long_info(
+                    cplex.callbacks.Context.info.node_count) > 0:
+                return
+            xval = context.get_relaxation_point(0, self.num_x - 1)
+            cuts = self.separator.fractional(xval)
+            if cuts:
+                rows, senses, rhs = _sparse_rows(cuts)
+                context.add_user_cuts(rows, senses, rhs,
+                                      [cplex.callbacks.UserCutCallback.use_cut.purge] * len(cuts),
+                                      [False] * len(cuts))
+
+
+class TelemetryCallback:
+    """Registra incumbente, cota y nodos en el contexto global_progress."""
+
+    contextmask = cplex.callbacks.Context.id.global_progress
+
+    def __init__(self, telemetry):
+        self.telemetry = telemetry
+
+    def invoke(self, context):
+        info = cplex.callbacks.Context.info
+        self.telemetry.record(context.get_double_info(info.best_solution),
+                              context.get_double_info(info.best_bound),
+                              context.get_long_info(info.node_count),
+                              context.get_long_info(info.nodes_left))
+
+
+class IncumbentCallback:
+    """
+    Modo carrera (race.Exchange): publica los candidatos enteros que son un
+    tour, entrega en la relajación los tours publicados por los demás procesos
+    (post_heuristic_solution) y aborta la resolución si la carrera terminó.
+    """
+
+    contextmask = (cplex.callbacks.Context.id.candidate | cplex.callbacks.Context.id.relaxation
+                   | cplex.callbacks.Context.id.global_progress)
+
+    def __init__(self, exchange, cm):
+        self.exchange = exchange
+        self.cm = cm
+
+    def invoke(self, context):
+        if self.exchange.stopped():
+            context.abort()
+            return
+        cid = context.get_id()
+        if cid == cplex.callbacks.Context.id.candidate and context.is_candidate_point():
+            self.exchange.found(self.cm, np.array(context.get_candidate_point(0, self.cm.num_arcs - 1)))
+        elif cid == cplex.callbacks.Context.id.relaxation:
+            offer = self.exchange.incoming(self.cm)
+            if offer is None:
+                return
+            start, cost = offer
+            known = ~np.isnan(start)
+            idx = np.flatnonzero(known)
+            # si el tour no determina todas las variables, CPLEX completa el resto
+            strategy = (cplex.callbacks.SolutionStrategy.check_feasible if known.all()
+                        else cplex.callbacks.SolutionStrategy.solve)
+            context.post_heuristic_solution(
+                cplex.SparsePair(ind=idx.tolist(), val=start[idx].tolist()), cost, strategy)
+
+
+class PhaseCallback:
+    """
+    Marca la primera relajación resuelta en la raíz (instrument.Phases). CPLEX
+    no avisa el fin del presolve, así que ese tiempo queda dentro de Raiz_s.
+    Es de un solo uso: con la marca puesta queda en done y _Dispatch lo saca.
+    """
+
+    contextmask = cplex.callbacks.Context.id.relaxation
+
+    def __init__(self, phases):
+        self.phases = phases
+        self.t0 = time.perf_counter()
+        self.done = False
+
+    def invoke(self, context):
+        if self.done:
+            return
+        self.phases.mark_root(time.perf_counter() - self.t0)
+        self.done = True
+
+
+class _Dispatch:
+    """CPLEX admite un solo callback genérico: este reparte a varios handlers."""
+
+    def __init__(self, handlers):
+        self.handlers = tuple(handlers)
+        self.contextmask = 0
+        for h in handlers:
+            self.contextmask |= h.contextmask
+
+    def invoke(self, context):
+        cid = context.get_id()
+        handlers = self.handlers
+        for h in handlers:
+            if h.contextmask & cid:
+                h.invoke(context)
+        # los handlers de un solo uso (PhaseCallback) salen al terminar; la
+        # máscara ya registrada en CPLEX no cambia durante la resolución
+        if any(getattr(h, "done", False) for h in handlers):
+            self.handlers = tuple(h for h in handlers if not getattr(h, "done", False))
+
+
+def install_callbacks(cpx, handlers):
+    """Instala un _Dispatch con los handlers dados (CPLEX acepta uno solo)."""
+    dispatch = _Dispatch(handlers)
+    cpx.set_callback(dispatch, dispatch.contextmask)
+    return dispatch
+
+
+def solve(cm, time_limit=None, threads=None, log_output=False, start=None, separator=None,
+          telemetry=None, phases=None, exchange=None, params=None):
+    """
+    Arma y resuelve el CompiledModel; devuelve las métricas de solution_stats
+    más "x", el arreglo de x_values de la incumbente (None si no hay).
+    start es un vector de matrices.start_vector que se carga como MIP start,
+    separator un dfj.SubtourSeparator (se instala SubtourCallback), telemetry
+    un telemetry.Telemetry que recibe el progreso (TelemetryCallback) y phases
+    un instrument.Phases donde se acumulan construcción, resolución y extracción.
+    exchange es el race.Exchange del modo carrera (IncumbentCallback) y
+    params un dict de parámetros (set_params) que se aplica al final.
+    """
+    phases = phases if phases is not None else Phases()
+    with phases.phase("Construccion_s"):
+        cpx = build_model(cm, log_output=log_output)
+        if start is not None:
+            add_start(cpx, start)
+
+    phase_cb = PhaseCallback(phases)
+    handlers = [phase_cb]
+    if separator is not None:
+        handlers.append(SubtourCallback(separator, cm.num_arcs))
+    if telemetry is not None:
+        telemetry.start()
+        handlers.append(TelemetryCallback(telemetry))
+    if exchange is not None:
+        handlers.append(IncumbentCallback(exchange, cm))
+    install_callbacks(cpx, handlers)
+
+    if time_limit is not None:
+        cpx.parameters.timelimit.set(time_limit)
+    if threads is not None:
+        cpx.parameters.threads.set(threads)
+    if params:
+        set_params(cpx, params)
+    phase_cb.t0 = time.perf_counter()
+    with phases.phase("Tiempo_s"):
+        cpx.solve()
+
+    with phases.phase("Extraccion_s"):
+        stats = solution_stats(cpx)
+        stats["x"] = x_values(cpx, cm.num_arcs) if stats["objetivo"] is not None else None
+    stats["construccion"] = phases.times["Construccion_s"]
+    stats["tiempo"] = phases.times["Tiempo_s"]
+    if separator is not None:
+        stats.update(separator.stats())
+    if telemetry is not None:
+        telemetry.record(stats["objetivo"], stats["best_bound"], stats["nodos_bb"], 0)
+        telemetry.close()
+    cpx.end()
+    return stats
+
+
+def incumbent_start(cpx, cm):
+    """Vector de MIP start con las x de la incumbente (NaN en el resto), o None."""
+    if not cpx.solution.is_primal_feasible():
+        return None
+    start = np.full(cm.num_vars, np.nan)
+    start[cm.blocks["x"]] = x_values(cpx, cm.num_arcs)
+    return start
+
+
+def set_bounds(cpx, lb, ub):
+    """Reemplaza las cotas de todas las variables (arreglos de largo num_vars)."""
+    idx = range(len(lb))
+    cpx.variables.set_lower_bounds(list(zip(idx, _finite(lb))))
+    cpx.variables.set_upper_bounds(list(zip(idx, _finite(ub))))
+
+
+def solve_variants(cm, variants, time_limit=None, threads=None, log_output=False, start=None):
+    """
+    Resuelve cm una vez por cada (nombre, lb, ub) de variants cambiando solo las
+    cotas del cplex.Cplex ya cargado, sin rearmarlo. La incumbente de cada
+    resolución se agrega como MIP start de la siguiente (con advance=1 CPLEX
+    además reusa lo que puede del problema modificado), así que conviene
+    ordenar variants de la más a la menos restringida. Devuelve
+    [(nombre, stats, phases)].
+    """
+    out = []
+    cpx = None
+    for name, lb, ub in variants:
+        phases = Phases()
+        with phases.phase("Construccion_s"):
+            if cpx is None:
+                cpx = build_model(cm, log_output=log_output)
+                if time_limit is not None:
+                    cpx.parameters.timelimit.set(time_limit)
+                if threads is not None:
+                    cpx.parameters.threads.set(threads)
+            else:
+                start = incumbent_start(cpx, cm)
+            set_bounds(cpx, lb, ub)
+            if start is not None:
+                add_start(cpx, start)
+
+        phase_cb = PhaseCallback(phases)
+        install_callbacks(cpx, [phase_cb])
+        phase_cb.t0 = time.perf_counter()
+        with phases.phase("Tiempo_s"):
+            cpx.solve()
+
+        with phases.phase("Extraccion_s"):
+            stats = solution_stats(cpx)
+            stats["x"] = x_values(cpx, cm.num_arcs) if stats["objetivo"] is not None else None
+        stats["construccion"] = phases.times["Construccion_s"]
+        stats["tiempo"] = phases.times["Tiempo_s"]
+        out.append((name, stats, phases))
+    if cpx is not None:
+        cpx.end()
+    return out
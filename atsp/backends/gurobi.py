@@ -0,0 +1,301 @@
+"""Carga de un CompiledModel en Gurobi con la API matricial (MVar/MConstr)."""
+
+import os
+
+import gurobipy as gp
+import numpy as np
+from gurobipy import GRB
+
+from atsp.instrument import Phases
+
+# parámetros de licencia WLS -> variable de entorno que los trae
+LICENSE_ENV = {"WLSACCESSID": "GRB_WLSACCESSID", "WLSSECRET": "GRB_WLSSECRET",
+               "LICENSEID": "GRB_LICENSEID"}
+
+
+def build_model(cm, env=None, names=False):
+    """
+    Crea el gp.Model de un CompiledModel con un addMVar y un addMConstr.
+    Devuelve (model, v) donde v es el MVar con todas las variables; las x son
+    v[cm.blocks["x"]].
+    """
+    model = gp.Model(cm.name, env=env)
+    v = model.addMVar(cm.num_vars, lb=cm.lb, ub=cm.ub, obj=cm.c, vtype=cm.vtype)
+    model.addMConstr(cm.A, v, cm.sense, cm.rhs)
+    model.ModelSense = GRB.MINIMIZE
+    if names:
+        model.update()
+        model.setAttr("VarName", model.getVars(), cm.var_names())
+    return model, v
+
+
+def set_start(v, start):
+    """MIP start desde un vector con NaN en las variables sin valor conocido."""
+    v.Start = np.where(np.isnan(start), GRB.UNDEFINED, start)
+
+
+def set_params(model, params):
+    """Parámetros de Gurobi por nombre (p. ej. {"MIPFocus": 1, "Cuts": 2})."""
+    for name, value in params.items():
+        model.setParam(name, value)
+
+
+def solution_stats(model):
+    """Objetivo, gap (%), best bound y nodos de un gp.Model ya optimizado."""
+    stats = {"objetivo": None, "gap": 100.0, "best_bound": None,
+             "tiempo": model.Runtime, "nodos_bb": None}
+    try:
+        stats["best_bound"] = model.ObjBound
+        stats["nodos_bb"] = int(model.NodeCount)
+    except gp.GurobiError:
+        pass
+    if model.SolCount > 0:
+        stats["objetivo"] = model.ObjVal
+        stats["gap"] = model.MIPGap * 100
+    return stats
+
+
+def x_values(model, num_x):
+    """
+    Valores de las x de la incumbente en un arreglo, con un solo getAttr. Las x
+    son las primeras num_x variables (cm.num_arcs en un CompiledModel).
+    """
+    return np.array(model.getAttr("X", model.getVars()[:num_x]))
+
+
+def _linexpr(xvars, cols):
+    return gp.LinExpr([1.0] * len(cols), [xvars[k] for k in cols])
+
+
+def subtour_callback(separator, xvars, fractional="root"):
+    """
+    Callback DFJ: cortes lazy en MIPSOL y cortes de usuario en MIPNODE.
+    fractional: "root" separa puntos fraccionarios solo en la raíz, "all" en
+    todos los nodos y None nunca.
+    """
+    def callback(model, where):
+        if where == GRB.Callback.MIPSOL:
+            xval = np.array(model.cbGetSolution(xvars))
+            for cols, sense, rhs in separator.integer(xval):
+                model.cbLazy(_linexpr(xvars, cols), sense, rhs)
+        elif (where == GRB.Callback.MIPNODE and fractional
+              and model.cbGet(GRB.Callback.MIPNODE_STATUS) == GRB.OPTIMAL):
+            if fractional == "root" and model.cbGet(GRB.Callback.MIPNODE_NODCNT) > 0:
+                return
+            xval = np.array(model.cbGetNodeRel(xvars))
+            for cols, sense, rhs in separator.fractional(xval):
+                model.cbCut(_linexpr(xvars, cols), sense, rhs)
+    return callback
+
+
+def telemetry_callback(telemetry):
+    """Registra incumbente, cota y nodos en los callbacks MIP y MIPSOL."""
+    def callback(model, where):
+        if where == GRB.Callback.MIP:
+            telemetry.record(model.cbGet(GRB.Callback.MIP_OBJBST),
+                             model.cbGet(GRB.Callback.MIP_OBJBND),
+                             int(model.cbGet(GRB.Callback.MIP_NODCNT)),
+                             int(model.cbGet(GRB.Callback.MIP_NODLFT)),
+                             t=model.cbGet(GRB.Callback.RUNTIME))
+        elif where == GRB.Callback.MIPSOL:
+            telemetry.record(model.cbGet(GRB.Callback.MIPSOL_OBJBST),
+                             model.cbGet(GRB.Callback.MIPSOL_OBJBND),
+                             int(model.cbGet(GRB.Callback.MIPSOL_NODCNT)),
+                             t=model.cbGet(GRB.Callback.RUNTIME))
+    return callback
+
+
+def incumbent_callback(exchange, cm, allvars):
+    """
+    Modo carrera (race.Exchange): publica cada tour de MIPSOL, carga en
+    MIPNODE los tours publicados por los demás procesos (cbSetSolution con las
+    variables que el tour determina) y corta la resolución si la carrera terminó.
+    """
+    xvars = allvars[cm.blocks["x"]]
+
+    def callback(model, where):
+        if exchange.stopped():
+            model.terminate()
+        elif where == GRB.Callback.MIPSOL:
+            exchange.found(cm, np.array(model.cbGetSolution(xvars)))
+        elif where == GRB.Callback.MIPNODE:
+            offer = exchange.incoming(cm)
+            if offer is not None:
+                start, _ = offer
+                idx = np.flatnonzero(~np.isnan(start))
+                model.cbSetSolution([allvars[k] for k in idx], start[idx].tolist())
+                model.cbUseSolution()
+    return callback
+
+
+def combine_callbacks(callbacks):
+    """Gurobi acepta un solo callback en optimize: este llama a todos en orden."""
+    def callback(model, where):
+        for cb in callbacks:
+            cb(model, where)
+    return callback
+
+
+def phase_callback(phases):
+    """
+    Marca el fin del presolve y de la primera relajación (instrument.Phases).
+    Gurobi no permite quitar un callback a mitad de la resolución: con la
+    marca de la raíz puesta vuelve en la primera línea.
+    """
+    def callback(model, where):
+        if phases.root_end is not None or where in (GRB.Callback.POLLING, GRB.Callback.PRESOLVE,
+                                                   GRB.Callback.MESSAGE):
+            return
+        t = model.cbGet(GRB.Callback.RUNTIME)
+        phases.mark_presolve(t)
+        if where == GRB.Callback.MIPNODE:
+            phases.mark_root(t)
+    return callback
+
+
+def solve(cm, time_limit=None, threads=None, log_output=False, env=None, start=None,
+          separator=None, telemetry=None, phases=None, exchange=None, params=None):
+    """
+    Arma y resuelve el CompiledModel; devuelve las métricas de solution_stats
+    más "x", el arreglo de x_values de la incumbente (None si no hay).
+    start es un vector de matrices.start_vector que se carga como MIP start,
+    separator un dfj.SubtourSeparator (activa LazyConstraints y el callback),
+    telemetry un telemetry.Telemetry que recibe el progreso y phases un
+    instrument.Phases donde se acumulan construcción, resolución y extracción.
+    exchange es el race.Exchange del modo carrera (incumbent_callback) y
+    params un dict de parámetros (set_params) que se aplica al final.
+    """
+    phases = phases if phases is not None else Phases()
+    with phases.phase("Construccion_s"):
+        model, v = build_model(cm, env=env)
+        if start is not None:
+            set_start(v, start)
+        model.update()
+
+    callbacks = [phase_callback(phases)]
+    if separator is not None:
+        model.Params.LazyConstraints = 1
+        xvars = model.getVars()[cm.blocks["x"]]
+        callbacks.append(subtour_callback(separator, xvars))
+    if telemetry is not None:
+        telemetry.start()
+        callbacks.append(telemetry_callback(telemetry))
+    if exchange is not None:
+        callbacks.append(incumbent_callback(exchange, cm, model.getVars()))
+
+    model.Params.OutputFlag = int(log_output)
+    if time_limit is not None:
+        model.Params.TimeLimit = time_limit
+    if threads is not None:
+        model.Params.Threads = threads
+    if params:
+        set_params(model, params)
+    with phases.phase("Tiempo_s"):
+        model.optimize(combine_callbacks(callbacks))
+
+    with phases.phase("Extraccion_s"):
+        stats = solution_stats(model)
+        stats["x"] = x_values(model, cm.num_arcs) if model.SolCount > 0 else None
+    stats["construccion"] = phases.times["Construccion_s"]
+    stats["tiempo"] = phases.times["Tiempo_s"]
+    if separator is not None:
+        stats.update(separator.stats())
+    if telemetry is not None:
+        telemetry.record(stats["objetivo"], stats["best_bound"], stats["nodos_bb"], 0, t=model.Runtime)
+        telemetry.close()
+    model.dispose()
+    return stats
+
+
+def incumbent_start(model, cm):
+    """Vector de MIP start con las x de la incumbente (NaN en el resto), o None."""
+    if model.SolCount == 0:
+        return None
+    start = np.full(cm.num_vars, np.nan)
+    start[cm.blocks["x"]] = x_values(model, cm.num_arcs)
+    return start
+
+
+def solve_variants(cm, variants, time_limit=None, threads=None, log_output=False, env=None,
+                   start=None):
+    """
+    Resuelve cm una vez por cada (nombre, lb, ub) de variants cambiando solo las
+    cotas del modelo ya cargado, sin rearmarlo. Cada resolución parte de la
+    incumbente de la anterior (sus x; Gurobi completa el resto), así que
+    conviene ordenar variants de la más a la menos restringida. Después de un
+    MIP Gurobi no expone la base de la raíz, de modo que lo que se reusa es el
+    modelo y la incumbente. Devuelve [(nombre, stats, phases)].
+    """
+    out = []
+    model = v = None
+    for name, lb, ub in variants:
+        phases = Phases()
+        with phases.phase("Construccion_s"):
+            if model is None:
+                model, v = build_model(cm, env=env)
+                model.Params.OutputFlag = int(log_output)
+                if time_limit is not None:
+                    model.Params.TimeLimit = time_limit
+                if threads is not None:
+                    model.Params.Threads = threads
+            else:
+                start = incumbent_start(model, cm)
+            v.LB, v.UB = lb, ub
+            if start is not None:
+                set_start(v, start)
+            model.update()
+
+        with phases.phase("Tiempo_s"):
+            model.optimize(phase_callback(phases))
+
+        with phases.phase("Extraccion_s"):
+            stats = solution_stats(model)
+            stats["x"] = x_values(model, cm.num_arcs) if model.SolCount > 0 else None
+        stats["construccion"] = phases.times["Construccion_s"]
+        stats["tiempo"] = phases.times["Tiempo_s"]
+        out.append((name, stats, phases))
+    if model is not None:
+        model.dispose()
+    return out
+
+
+def license_params():
+    """
+    Parámetros de licencia WLS tomados de GRB_WLSACCESSID, GRB_WLSSECRET y
+    GRB_LICENSEID; vacío si no están definidas (se usa gurobi.lic).
+    """
+    params = {}
+    for param, var in LICENSE_ENV.items():
+        value = os.environ.get(var)
+        if value:
+            params[param] = int(value) if param == "LICENSEID" else value
+    return params
+
+
+class Session:
+    """
+    Un gp.Env con licencia para todo un lote: cada modelo se crea en self.env,
+    así que la licencia (y el contacto con el servidor WLS) se pide una vez.
+    """
+
+    def __init__(self, params=None, output=False):
+        self.env = gp.Env(empty=True)
+        for name, value in (license_params() if params is None else params).items():
+            self.env.setParam(name, value)
+        self.env.setParam("OutputFlag", int(output))
+        self.env.start()
+
+    def solve(self, cm, **kwargs):
+        return solve(cm, env=self.env, **kwargs)
+
+    def solve_variants(self, cm, variants, **kwargs):
+        return solve_variants(cm, variants, env=self.env, **kwargs)
+
+    def close(self):
+        self.env.dispose()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
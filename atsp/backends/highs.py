@@ -0,0 +1,113 @@
+"""
+Resolución de un CompiledModel con HiGHS (scipy.optimize.milp), sin licencia.
+
+milp no admite callbacks ni MIP start: los subtours de DFJ se separan
+resolviendo de nuevo con los cortes agregados, el start se ignora, la
+telemetría solo recibe el punto final de cada resolución y en el modo
+carrera solo se publica el tour final (y se corta entre rondas de cortes).
+"""
+
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from atsp.instrument import Phases
+
+# código de estado de milp para óptimo probado
+_OPTIMAL = 0
+
+
+def constraints(cm):
+    """LinearConstraint con A y los lados lo <= A v <= hi según cm.sense."""
+    lo = np.where(cm.sense == "<", -np.inf, cm.rhs)
+    hi = np.where(cm.sense == ">", np.inf, cm.rhs)
+    return LinearConstraint(cm.A, lo, hi)
+
+
+def _cut_rows(cuts, num_vars):
+    """Filas de los cortes de dfj.SubtourSeparator como LinearConstraint."""
+    rows = np.repeat(np.arange(len(cuts)), [cols.size for cols, _, _ in cuts])
+    cols = np.concatenate([cols for cols, _, _ in cuts])
+    A = sp.csr_matrix((np.ones(cols.size), (rows, cols)), shape=(len(cuts), num_vars))
+    rhs = np.array([r for _, _, r in cuts])
+    sense = np.array([s for _, s, _ in cuts])
+    return LinearConstraint(A, np.where(sense == "<", -np.inf, rhs), np.where(sense == ">", np.inf, rhs))
+
+
+def solution_stats(res):
+    """Objetivo, gap (%), best bound y nodos de un OptimizeResult de milp."""
+    stats = {"objetivo": None, "gap": 100.0, "best_bound": getattr(res, "mip_dual_bound", None),
+             "nodos_bb": getattr(res, "mip_node_count", None)}
+    if res.x is not None:
+        stats["objetivo"] = float(res.fun)
+        gap = getattr(res, "mip_gap", None)
+        if gap is not None:
+            stats["gap"] = gap * 100
+        elif res.status == _OPTIMAL:
+            stats["gap"] = 0.0
+    return stats
+
+
+def solve(cm, time_limit=None, threads=None, log_output=False, start=None, separator=None,
+          telemetry=None, phases=None, exchange=None, params=None):
+    """
+    Misma interfaz que los backends de Gurobi y CPLEX. threads y start no
+    tienen efecto en milp; params se agrega a sus options (p. ej. presolve). Con separator se repite la resolución agregando
+    los cortes de subtour de la solución entera hasta que sea un tour (o se
+    acabe time_limit, que cubre todas las rondas).
+    """
+    phases = phases if phases is not None else Phases()
+    phases.split = False
+    with phases.phase("Construccion_s"):
+        integrality = (cm.vtype != "C").astype(np.uint8)
+        bounds = Bounds(cm.lb, cm.ub)
+        rows = [constraints(cm)]
+
+    if telemetry is not None:
+        telemetry.start()
+    nodes, remaining, cancelled = 0, time_limit, False
+    t0 = time.perf_counter()
+    while True:
+        options = {"disp": log_output, **(params or {})}
+        if remaining is not None:
+            options["time_limit"] = max(remaining, 0.0)
+        with phases.phase("Tiempo_s"):
+            res = milp(cm.c, integrality=integrality, bounds=bounds, constraints=rows,
+                       options=options)
+        nodes += getattr(res, "mip_node_count", 0) or 0
+        if time_limit is not None:
+            remaining = time_limit - (time.perf_counter() - t0)
+        if separator is None or res.status != _OPTIMAL:
+            break
+        cuts = separator.integer(res.x[cm.blocks["x"]])
+        if not cuts:
+            break
+        if exchange is not None and exchange.stopped():
+            # carrera terminada: la solución todavía tiene subtours
+            cancelled = True
+            break
+        if telemetry is not None:
+            # la solución con subtours es una cota inferior válida
+            telemetry.record(None, res.fun, nodes, 0)
+        rows.append(_cut_rows(cuts, cm.num_vars))
+
+    with phases.phase("Extraccion_s"):
+        stats = solution_stats(res)
+        stats["nodos_bb"] = nodes
+        if cancelled or (separator is not None and res.x is not None and res.status != _OPTIMAL
+                         and separator.integer(res.x[cm.blocks["x"]])):
+            # ronda cortada por tiempo (o por la carrera) con subtours en la incumbente
+            stats["objetivo"], stats["gap"] = None, 100.0
+        stats["x"] = res.x[cm.blocks["x"]] if stats["objetivo"] is not None else None
+    if exchange is not None and stats["x"] is not None:
+        exchange.found(cm, stats["x"])
+    stats["construccion"] = phases.times["Construccion_s"]
+    stats["tiempo"] = phases.times["Tiempo_s"]
+    if separator is not None:
+        stats.update(separator.stats())
+    if telemetry is not None:
+        telemetry.record(stats["objetivo"], stats["best_bound"], stats["nodos_bb"], 0)
+        telemetry.close()
+    return stats
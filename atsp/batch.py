@@ -0,0 +1,199 @@
+"""
+Ejecución en lote de {MTZ acotado, MTZ no acotado, GG} x {Gurobi, CPLEX} x
+instancias en un pool de procesos, repartiendo los núcleos de la máquina entre
+los trabajos simultáneos mediante el parámetro Threads de cada solver.
+
+Uso:
+    python -m atsp.batch [--time-limit 3600] [--cores 16] [--salida archivo.csv]
+"""
+
+import argparse
+import csv
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from atsp.cache import load_cached
+from atsp.instances import INSTANCES, RESULTS_DIR, instance_path, size_class
+from atsp.matrices import arc_mask
+from atsp.results import ResultsSink, report
+from atsp.runner import COLUMNS, FORMULATIONS, SOLVERS, run_job, variant_name
+
+# Threads por trabajo según el grupo de la instancia: las pequeñas se empaquetan
+# de a muchas por máquina y las rbg reciben más núcleos.
+THREADS_BY_CLASS = {"Pequeños": 1, "Medianos": 2, "Grandes": 4}
+
+# la matriz de la tarea; "dfj" y las demás se piden con --formulations
+DEFAULT_FORMULATIONS = ["mtz_acotado", "mtz_no_acotado", "gg"]
+
+# highs se pide con --solvers (sin licencia, pero mucho más lento en las grandes)
+DEFAULT_SOLVERS = ["gurobi", "cplex"]
+
+# Resultados seriales existentes, para comparar el makespan.
+_SERIAL_CSV = {
+    ("mtz_acotado", "gurobi"): ("GUROBI/resultados_mtz_acotado.csv", ",", "Tiempo_s"),
+    ("mtz_no_acotado", "gurobi"): ("GUROBI/resultados_mtz_no_acotado.csv", ",", "Tiempo_s"),
+    ("gg", "gurobi"): ("Gurobi_GG/Resultados_GG.csv", ";", "Tiempo (s)"),
+}
+
+
+def make_jobs(instances, formulations, solvers, cores, threads_by_class=THREADS_BY_CLASS):
+    """
+    Lista de trabajos (dicts con los argumentos de run_job), ordenada de más a
+    menos costosa (LPT) para que las instancias grandes no queden al final; el
+    costo es la cantidad de no ceros que declara la formulación.
+    """
+    jobs = []
+    for inst in instances:
+        n = load_cached(instance_path(inst)).shape[0]
+        threads = min(cores, threads_by_class[size_class(n)])
+        for formulation in formulations:
+            for solver in solvers:
+                jobs.append({
+                    "instance": inst, "formulation": formulation, "solver": solver,
+                    "threads": threads, "_cost": FORMULATIONS[formulation].size(arc_mask(n)).nnz,
+                })
+    jobs.sort(key=lambda j: j["_cost"], reverse=True)
+    return jobs
+
+
+def worker_pool(cores):
+    """
+    Pool con un proceso nuevo por trabajo: la memoria pico que informa cada
+    fila es la suya. Con max_tasks_per_child el pool usaría spawn y cada
+    proceso reimportaría numpy, scipy y atsp; con forkserver nacen de un
+    servidor que ya importó atsp.runner, y el backend (gurobipy, cplex) lo
+    importa solo quien lo usa. Donde no hay forkserver (Windows) se usa spawn.
+    """
+    if "forkserver" in mp.get_all_start_methods():
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload(["atsp.runner"])
+    else:
+        ctx = mp.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=cores, max_tasks_per_child=1, mp_context=ctx)
+
+
+def run_batch(jobs, cores, time_limit=3600, on_result=None, **job_kwargs):
+    """
+    Ejecuta los trabajos sin pasar nunca de `cores` threads en uso. Cuando el
+    siguiente trabajo no cabe se lanzan los más chicos que sí caben.
+    job_kwargs se pasan a run_job (reduce, k, ...). Devuelve (filas, makespan_s).
+    """
+    pending = list(jobs)
+    running = {}
+    free = cores
+    rows = []
+    t0 = time.perf_counter()
+
+    with worker_pool(cores) as pool:
+        while pending or running:
+            for job in list(pending):
+                if job["threads"] <= free:
+                    pending.remove(job)
+                    free -= job["threads"]
+                    args = {k: v for k, v in job.items() if not k.startswith("_")}
+                    running[pool.submit(run_job, time_limit=time_limit, **args, **job_kwargs)] = job
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                job = running.pop(fut)
+                free += job["threads"]
+                try:
+                    row = fut.result()
+                except Exception as e:
+                    print(f"Error en {job['instance']} {job['formulation']} {job['solver']}: {e}")
+                    continue
+                rows.append(row)
+                if on_result is not None:
+                    on_result(row)
+                print(f"   ✓ {row['Instancia']} {row['Formulacion']} {row['Solver']} "
+                      f"({row['Threads']} threads): {row['Tiempo_s']} s")
+
+    return rows, time.perf_counter() - t0
+
+
+def serial_reference(jobs):
+    """Suma de tiempos de las corridas seriales en Resultados/ (si existen)."""
+    total, found = 0.0, 0
+    tables = {}
+    for key, (rel, sep, col) in _SERIAL_CSV.items():
+        path = RESULTS_DIR / rel
+        if path.exists():
+            with open(path, newline="", encoding="utf-8") as f:
+                tables[key] = {r["Instancia"]: float(r[col]) for r in csv.DictReader(f, delimiter=sep)}
+    for job in jobs:
+        times = tables.get((job["formulation"], job["solver"]), {})
+        name = instance_path(job["instance"]).name
+        if name in times:
+            total += times[name]
+            found += 1
+    return total, found
+
+
+def makespan_report(rows, makespan, jobs):
+    """Texto con el makespan del lote comparado con la suma serial."""
+    serial = sum(r["Lectura_s"] + r["Heuristica_s"] + r["Reduccion_s"] + r["Construccion_s"] + r["Tiempo_s"]
+                 for r in rows)
+    lines = [
+        f"Trabajos terminados:          {len(rows)}/{len(jobs)}",
+        f"Makespan (s):                 {makespan:.2f}",
+        f"Suma serial de trabajos (s):  {serial:.2f}",
+        f"Aceleración:                  {serial / makespan if makespan else float('nan'):.2f}x",
+    ]
+    ref, found = serial_reference(jobs)
+    if found:
+        lines.append(f"Serial en Resultados/ (s):    {ref:.2f} ({found} trabajos con referencia)")
+    return "\n".join(lines)
+
+
+def pending_jobs(jobs, sink, **job_kwargs):
+    """Descarta los trabajos que ya tienen fila en el CSV de resultados."""
+    done = sink.done()
+    variant = variant_name(**job_kwargs)
+    return [j for j in jobs
+            if sink.key_of({"Instancia": instance_path(j["instance"]).name,
+                            "Formulacion": j["formulation"], "Solver": j["solver"],
+                            "Variante": variant}) not in done]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--instances", nargs="+", default=INSTANCES)
+    parser.add_argument("--formulations", nargs="+", default=DEFAULT_FORMULATIONS, choices=list(FORMULATIONS))
+    parser.add_argument("--solvers", nargs="+", default=DEFAULT_SOLVERS, choices=list(SOLVERS))
+    parser.add_argument("--time-limit", type=float, default=3600)
+    parser.add_argument("--cores", type=int, default=os.cpu_count())
+    parser.add_argument("--salida", default=str(RESULTS_DIR / "resultados_lote.csv"))
+    parser.add_argument("--reduce", action="store_true", help="eliminar arcos por costo reducido")
+    parser.add_argument("--k", type=int, help="grafo de k vecinos con pricing de arcos")
+    parser.add_argument("--exacto", action="store_true",
+                        help="con n <= exact.EXACT_MAX_N probar antes Held-Karp / branch-and-bound "
+                             "de asignación (las filas ya no comparan formulaciones ni solvers)")
+    parser.add_argument("--perfil", help="JSON de parámetros por clase de tamaño (atsp.tuning)")
+    parser.add_argument("--telemetria", metavar="DIR", help="guardar el progreso de cada trabajo en DIR/*.jsonl")
+    parser.add_argument("--desde-cero", action="store_true",
+                        help="borrar --salida en vez de saltar los trabajos ya registrados")
+    parser.add_argument("--reporte", action="store_true", help="imprimir la tabla final (usa pandas)")
+    args = parser.parse_args(argv)
+
+    if args.desde_cero:
+        Path(args.salida).unlink(missing_ok=True)
+    sink = ResultsSink(args.salida, COLUMNS)
+    job_kwargs = {"reduce": args.reduce, "k": args.k, "telemetry_dir": args.telemetria,
+                  "profile": args.perfil, "exact": args.exacto}
+
+    jobs = make_jobs(args.instances, args.formulations, args.solvers, args.cores)
+    todo = pending_jobs(jobs, sink, **job_kwargs)
+    print(f"{len(todo)} trabajos pendientes ({len(jobs) - len(todo)} ya registrados) en {args.cores} núcleos")
+    rows, makespan = run_batch(todo, args.cores, time_limit=args.time_limit,
+                               on_result=sink.append, **job_kwargs)
+    print(makespan_report(rows, makespan, todo))
+    print("Resultados en:", args.salida)
+    if args.reporte:
+        print(report(args.salida))
+
+
+if __name__ == "__main__":
+    main()
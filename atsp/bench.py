@@ -0,0 +1,353 @@
+"""
+Benchmarks de lectura, construcción de modelos y resolución completa sobre las
+instancias de instancias/, guardados como JSON para comparar contra una base.
+
+Uso:
+    python -m atsp.bench run [--suites parse build solve] [--time-limit 60]
+                             [--salida Resultados/benchmarks/actual.json]
+    python -m atsp.bench compare [BASE.json] [NUEVO.json] [--tol-tiempo 0.1]
+    python -m atsp.bench scaling [--tipo ftv] [--tamanos 50 100 200 400 800]
+
+La base versionada (Resultados/benchmarks/base.json) se generó con
+`python -m atsp.bench run --salida Resultados/benchmarks/base.json` (HiGHS,
+el único solver instalado en esa máquina; su "meta" dice cuál y con qué
+commit) y es la que compare usa por defecto. Los tiempos dependen de la
+máquina: para comparar en otra, generar primero una base propia.
+
+compare termina con código 1 si algún caso empeora más que la tolerancia en
+tiempo, nodos de B&B o gap final. scaling resuelve instancias sintéticas de
+atsp.generator de tamaño creciente y grafica tiempo y memoria pico contra n
+por formulación y solver (matplotlib, opcional, se importa solo para el
+gráfico; si no está, scaling deja el CSV y avisa).
+"""
+
+import argparse
+import importlib.util
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from atsp.batch import DEFAULT_FORMULATIONS, THREADS_BY_CLASS, make_jobs, pending_jobs, run_batch
+from atsp.cache import load_cached
+from atsp.generator import KINDS, generate
+from atsp.instances import BASE_DIR, INSTANCES, RESULTS_DIR, instance_path
+from atsp.results import ResultsSink
+from atsp.runner import COLUMNS, FORMULATIONS, SOLVERS, get_backend
+from atsp.tsplib import read_tsplib
+
+BENCH_DIR = RESULTS_DIR / "benchmarks"
+SUITES = ("parse", "build", "solve")
+
+# tiempo de pared de un run completo (lo que ve quien lanza el script)
+_E2E = ("Lectura_s", "Heuristica_s", "Reduccion_s", "Construccion_s", "Tiempo_s", "Extraccion_s")
+
+_MODULES = {"gurobi": "gurobipy", "cplex": "cplex", "highs": "scipy"}
+
+
+def available_solvers(solvers=SOLVERS, warn=True):
+    """Solvers cuyo paquete está instalado (el resto se salta, con aviso si warn)."""
+    ok = [s for s in solvers if importlib.util.find_spec(_MODULES[s]) is not None]
+    if warn:
+        for s in set(solvers) - set(ok):
+            print(f"{s}: {_MODULES[s]} no está instalado, se salta")
+    return ok
+
+
+def _timeit(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"tiempo_s": statistics.median(times), "tiempos": times}
+
+
+def bench_parse(instances, repeat):
+    """Parser TSPLIB desde el archivo y lectura desde la caché .npy."""
+    cases = []
+    for inst in instances:
+        path = instance_path(inst)
+        load_cached(path)  # deja la caché al día antes de medirla
+        cases.append({"suite": "parse", "instancia": path.name, "caso": "tsplib",
+                      **_timeit(lambda: read_tsplib(path), repeat)})
+        cases.append({"suite": "parse", "instancia": path.name, "caso": "cache",
+                      **_timeit(lambda: np.asarray(load_cached(path)).sum(), repeat)})
+    return cases
+
+
+def _load_into(solver, cm):
+    backend = get_backend(solver)
+    if solver == "gurobi":
+        model, _ = backend.build_model(cm)
+        model.update()
+        model.dispose()
+    elif solver == "cplex":
+        backend.build_model(cm).end()
+    else:
+        backend.constraints(cm)
+
+
+def bench_build(instances, formulations, solvers, repeat):
+    """
+    Compilación de cada formulación a matrices (atsp.matrices) y, por cada
+    solver instalado, compilación más carga del modelo en el solver.
+    """
+    cases = []
+    for inst in instances:
+        path = instance_path(inst)
+        C = load_cached(path)
+        for formulation in formulations:
+            compile_fn = FORMULATIONS[formulation]
+            cm = compile_fn(C)
+            base = {"suite": "build", "instancia": path.name, "variables": cm.num_vars,
+                    "restricciones": cm.num_constrs}
+            cases.append({**base, "caso": f"{formulation}/matrices",
+                          **_timeit(lambda: compile_fn(C), repeat)})
+            for solver in solvers:
+                cases.append({**base, "caso": f"{formulation}/{solver}",
+                              **_timeit(lambda: _load_into(solver, compile_fn(C)), repeat)})
+    return cases
+
+
+def bench_solve(instances, formulations, solvers, time_limit, threads):
+    """
+    Runs completos de atsp.runner, uno a la vez y con `threads` threads cada
+    uno, para que los tiempos no dependan de lo que corre al lado.
+    """
+    jobs = make_jobs(instances, formulations, solvers, threads,
+                     threads_by_class={c: threads for c in THREADS_BY_CLASS})
+    rows, _ = run_batch(jobs, threads, time_limit=time_limit)
+    cases = []
+    for row in rows:
+        cases.append({
+            "suite": "solve", "instancia": row["Instancia"],
+            "caso": f"{row['Formulacion']}/{row['Solver']}",
+            "tiempo_s": sum(row[c] or 0.0 for c in _E2E),
+            "nodos_bb": row["Nodos_BB"], "gap": row["Gap_Porcentaje"],
+            "objetivo": row["Funcion_Objetivo"], "fila": row,
+        })
+    return cases
+
+
+def scaling(kind, sizes, seed, formulations, solvers, time_limit, threads, out, mip_start=False):
+    """
+    Runs completos sobre instancias sintéticas de tamaño creciente (se generan
+    si no existen), agregados al CSV out con las columnas de atsp.runner: las
+    filas ya registradas se saltan y los modelos que no caben en memoria
+    (formulations.ModelTooLarge) quedan sin fila. Sin mip_start, porque la
+    heurística de arranque domina el tiempo para n grande.
+    """
+    solvers = available_solvers(solvers)
+    paths = [str(generate(kind, n, seed)) for n in sizes]
+    sink = ResultsSink(out, COLUMNS)
+    jobs = make_jobs(paths, formulations, solvers, threads,
+                     threads_by_class={c: threads for c in THREADS_BY_CLASS})
+    todo = pending_jobs(jobs, sink)
+    print(f"{len(todo)} trabajos pendientes ({len(jobs) - len(todo)} ya registrados)")
+    run_batch(todo, threads, time_limit=time_limit, on_result=sink.append, mip_start=mip_start)
+    names = {instance_path(p).name for p in paths}
+    return [r for r in sink.rows() if r["Instancia"] in names]
+
+
+def _number(value):
+    return float(value) if value not in (None, "") else 0.0
+
+
+def plot_scaling(rows, path, title=""):
+    """Tiempo de pared y memoria pico contra n (log-log), una curva por formulación y solver."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    series = {}
+    for row in rows:
+        point = (int(row["Nodos"]), sum(_number(row[c]) for c in _E2E), _number(row["Memoria_pico_MB"]))
+        series.setdefault(f"{row['Formulacion']}/{row['Solver']}", []).append(point)
+
+    fig, (ax_t, ax_m) = plt.subplots(1, 2, figsize=(11, 4.5))
+    for label, points in sorted(series.items()):
+        n, t, mem = zip(*sorted(points))
+        ax_t.plot(n, t, marker="o", label=label)
+        ax_m.plot(n, mem, marker="o", label=label)
+    for ax, ylabel in ((ax_t, "tiempo total (s)"), (ax_m, "memoria pico (MB)")):
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("n (nodos)")
+        ax.set_ylabel(ylabel)
+        ax.grid(True, which="both", alpha=0.3)
+    ax_t.legend(fontsize=8)
+    fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(suites, instances, formulations, solvers, time_limit, threads, repeat):
+    """Corre las suites pedidas y devuelve el documento JSON de resultados."""
+    solvers = available_solvers(solvers) if {"build", "solve"} & set(suites) else []
+    cases = []
+    if "parse" in suites:
+        cases += bench_parse(instances, repeat)
+    if "build" in suites:
+        cases += bench_build(instances, formulations, solvers, repeat)
+    if "solve" in suites and solvers:
+        cases += bench_solve(instances, formulations, solvers, time_limit, threads)
+    return {
+        "meta": {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "maquina": platform.node(),
+            "plataforma": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "time_limit": time_limit,
+            "threads": threads,
+            "repeticiones": repeat,
+        },
+        "casos": cases,
+    }
+
+
+def _key(case):
+    return case["suite"], case["instancia"], case["caso"]
+
+
+def compare(base, new, tol_time=0.10, min_time=0.01, tol_nodes=0.10, tol_gap=0.01):
+    """
+    Compara dos documentos de run(); devuelve una lista de (clave, métrica,
+    base, nuevo, estado) con estado "regresion", "mejora", "ok" o "faltante".
+    El tiempo se compara en forma relativa, con un piso absoluto min_time
+    (ruido de reloj), los nodos en forma relativa y el gap en puntos
+    porcentuales.
+    """
+    old = {_key(c): c for c in base["casos"]}
+    cur = {_key(c): c for c in new["casos"]}
+    out = []
+    for key, b in old.items():
+        c = cur.get(key)
+        if c is None:
+            out.append((key, "-", None, None, "faltante"))
+            continue
+        t0, t1 = b["tiempo_s"], c["tiempo_s"]
+        if t1 > t0 * (1 + tol_time) and t1 - t0 > min_time:
+            state = "regresion"
+        elif t1 < t0 / (1 + tol_time) and t0 - t1 > min_time:
+            state = "mejora"
+        else:
+            state = "ok"
+        out.append((key, "tiempo_s", t0, t1, state))
+        if b.get("nodos_bb") is not None and c.get("nodos_bb") is not None:
+            n0, n1 = b["nodos_bb"], c["nodos_bb"]
+            # +1: pasar de 0 a 1 nodo no es una regresión del 100 %
+            state = ("regresion" if n1 + 1 > (n0 + 1) * (1 + tol_nodes)
+                     else "mejora" if n1 + 1 < (n0 + 1) / (1 + tol_nodes) else "ok")
+            out.append((key, "nodos_bb", n0, n1, state))
+        if b.get("gap") is not None and c.get("gap") is not None:
+            g0, g1 = b["gap"], c["gap"]
+            state = "regresion" if g1 > g0 + tol_gap else "mejora" if g1 < g0 - tol_gap else "ok"
+            out.append((key, "gap", g0, g1, state))
+    return out
+
+
+def _fmt(v):
+    return "-" if v is None else f"{v:.4g}" if isinstance(v, float) else str(v)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="correr benchmarks y guardar el JSON")
+    p_run.add_argument("--suites", nargs="+", default=list(SUITES), choices=SUITES)
+    p_run.add_argument("--instances", nargs="+", default=INSTANCES)
+    p_run.add_argument("--formulations", nargs="+", default=DEFAULT_FORMULATIONS, choices=list(FORMULATIONS))
+    p_run.add_argument("--solvers", nargs="+", default=available_solvers(warn=False), choices=list(SOLVERS),
+                       help="por defecto los que están instalados")
+    p_run.add_argument("--time-limit", type=float, default=60)
+    p_run.add_argument("--threads", type=int, default=1, help="threads por resolución")
+    p_run.add_argument("--repeticiones", type=int, default=5, help="repeticiones de parse y build (mediana)")
+    p_run.add_argument("--salida", default=str(BENCH_DIR / "actual.json"))
+
+    p_cmp = sub.add_parser("compare", help="comparar contra una base")
+    p_cmp.add_argument("base", nargs="?", default=str(BENCH_DIR / "base.json"),
+                       help="por defecto la base versionada en Resultados/benchmarks/base.json")
+    p_cmp.add_argument("nuevo", nargs="?", default=str(BENCH_DIR / "actual.json"))
+    p_cmp.add_argument("--tol-tiempo", type=float, default=0.10, help="tolerancia relativa de tiempo")
+    p_cmp.add_argument("--min-tiempo", type=float, default=0.01, help="diferencia mínima de tiempo (s)")
+    p_cmp.add_argument("--tol-nodos", type=float, default=0.10, help="tolerancia relativa de nodos B&B")
+    p_cmp.add_argument("--tol-gap", type=float, default=0.01, help="tolerancia de gap (puntos %%)")
+    p_cmp.add_argument("--todo", action="store_true", help="mostrar también los casos sin cambios")
+    p_sc = sub.add_parser("scaling", help="tiempo y memoria contra n en instancias sintéticas")
+    p_sc.add_argument("--tipo", choices=KINDS, default="ftv")
+    p_sc.add_argument("--tamanos", nargs="+", type=int, default=[50, 100, 200, 400, 800])
+    p_sc.add_argument("--semilla", type=int, default=0)
+    p_sc.add_argument("--formulations", nargs="+", default=DEFAULT_FORMULATIONS, choices=list(FORMULATIONS))
+    p_sc.add_argument("--solvers", nargs="+", default=available_solvers(warn=False), choices=list(SOLVERS),
+                      help="por defecto los que están instalados")
+    p_sc.add_argument("--time-limit", type=float, default=600)
+    p_sc.add_argument("--threads", type=int, default=1, help="threads por resolución")
+    p_sc.add_argument("--mip-start", action="store_true", help="usar el tour heurístico como solución inicial")
+    p_sc.add_argument("--salida", help="CSV (por defecto Resultados/benchmarks/escalamiento_TIPO.csv)")
+    p_sc.add_argument("--grafico", help="PNG (por defecto junto al CSV)")
+    p_sc.add_argument("--sin-grafico", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "scaling":
+        out = args.salida or str(BENCH_DIR / f"escalamiento_{args.tipo}.csv")
+        rows = scaling(args.tipo, args.tamanos, args.semilla, args.formulations, args.solvers,
+                       args.time_limit, args.threads, out, mip_start=args.mip_start)
+        print(f"{len(rows)} filas en {out}")
+        if not args.sin_grafico and rows:
+            png = args.grafico or str(Path(out).with_suffix(".png"))
+            try:
+                plot_scaling(rows, png, f"{args.tipo}, límite {args.time_limit:g} s, {args.threads} thread(s)")
+            except ImportError:
+                print("matplotlib no está instalado: no se dibuja el gráfico (el CSV sí quedó). "
+                      "Instalarlo con `pip install matplotlib` o usar --sin-grafico.")
+            else:
+                print("Gráfico en:", png)
+        return 0
+
+    if args.cmd == "run":
+        doc = run(args.suites, args.instances, args.formulations, args.solvers,
+                  args.time_limit, args.threads, args.repeticiones)
+        BENCH_DIR.mkdir(parents=True, exist_ok=True)
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=1, ensure_ascii=False)
+        print(f"{len(doc['casos'])} casos guardados en {args.salida}")
+        return 0
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.nuevo, encoding="utf-8") as f:
+        new = json.load(f)
+    results = compare(base, new, args.tol_tiempo, args.min_tiempo, args.tol_nodos, args.tol_gap)
+    print(f"{'Suite':<7}{'Instancia':<15}{'Caso':<24}{'Métrica':<10}{'Base':>11}{'Nuevo':>11}  Estado")
+    for (suite, inst, case), metric, b, c, state in results:
+        if state != "ok" or args.todo:
+            print(f"{suite:<7}{inst:<15}{case:<24}{metric:<10}{_fmt(b):>11}{_fmt(c):>11}  {state}")
+    regressions = sum(r[-1] == "regresion" for r in results)
+    missing = sum(r[-1] == "faltante" for r in results)
+    print(f"{regressions} regresiones, {missing} casos faltantes, "
+          f"{sum(r[-1] == 'mejora' for r in results)} mejoras")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Caché en disco de matrices de costos parseadas (.npy, leídas con mmap)."""
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from atsp.tsplib import load_atsp
+
+# Se puede redirigir con ATSP_CACHE_DIR (p. ej. a un disco local en cada nodo).
+CACHE_DIR = Path(os.environ.get("ATSP_CACHE_DIR",
+                                Path(__file__).resolve().parent.parent / ".cache" / "instancias"))
+
+
+def file_digest(path):
+    """Hash del contenido del archivo; cambia si la instancia cambia."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stem(path):
+    name = Path(path).name
+    for suffix in (".gz", ".bz2"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def _prefix(path):
+    """
+    Prefijo de las entradas de un archivo: nombre más hash de la ruta
+    resuelta, para que dos instancias con el mismo nombre en carpetas
+    distintas (o x.atsp y x.atsp.gz) no compartan ni se borren entradas.
+    """
+    resolved = str(Path(path).resolve())
+    return f"{_stem(path)}-{hashlib.blake2b(resolved.encode(), digest_size=4).hexdigest()}"
+
+
+def _digest(path, stamp_file):
+    """
+    file_digest, salvo que el .stat de la última vez tenga el mismo tamaño y
+    mtime: así no se vuelve a leer el archivo completo en cada carga.
+    """
+    st = os.stat(path)
+    stamp = f"{st.st_size} {st.st_mtime_ns}"
+    try:
+        saved_stamp, digest = stamp_file.read_text().rsplit(" ", 1)
+        if saved_stamp == stamp:
+            return digest
+    except (FileNotFoundError, ValueError):
+        pass
+    digest = file_digest(path)
+    stamp_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = stamp_file.with_name(f"{stamp_file.name}.{os.getpid()}.tmp")
+    tmp.write_text(f"{stamp} {digest}")
+    os.replace(tmp, stamp_file)
+    return digest
+
+
+def load_cached(path, cache_dir=None):
+    """
+    Devuelve la matriz de costos de la instancia como ndarray de solo lectura
+    mapeado en memoria. La primera vez se parsea el texto y se guarda un .npy
+    con la ruta y el hash del contenido en el nombre; las entradas de
+    versiones anteriores del mismo archivo (misma ruta) se borran al escribir
+    la nueva. Mientras el tamaño y el mtime no cambien no se vuelve a hashear.
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    prefix = _prefix(path)
+    entry = cache_dir / f"{prefix}-{_digest(path, cache_dir / f'{prefix}.stat')}.npy"
+
+    if not entry.exists():
+        matrix = load_atsp(path)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # escribir a un temporal y renombrar: otro proceso nunca ve un .npy a medias
+        tmp = entry.with_name(f"{entry.stem}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp, entry)
+        for old in cache_dir.glob(f"{prefix}-*.npy"):
+            if old != entry:
+                try:
+                    old.unlink()
+                except FileNotFoundError:
+                    pass
+
+    return np.load(entry, mmap_mode="r")
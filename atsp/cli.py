@@ -0,0 +1,187 @@
+"""
+Punto de entrada único: `python -m atsp <comando> [opciones]`.
+
+  leer        lee las instancias (y deja la matriz en caché): nodos, clase, tiempo
+  heuristica  mejor tour de atsp.heuristics contra el óptimo conocido
+  lp          cota de la relajación lineal con HiGHS (atsp.lpbound)
+  resolver    solver x formulación x variante sobre las instancias
+
+Cada comando importa solo lo que usa: leer carga numpy y el caché,
+heuristica y lp además scipy, y ninguno de los tres importa un backend. El
+backend del solver (gurobipy, cplex) se importa recién en run_job y pandas
+solo con --reporte. Los módulos con main propio (carrera, ajuste, ...) se
+despachan por nombre sin importarlos hasta elegirlos.
+
+Uso:
+    python -m atsp leer br17 ftv33
+    python -m atsp heuristica
+    python -m atsp lp ftv70 --formulations mtz_acotado gg
+    python -m atsp resolver --solver gurobi --formulations gg --variante k10 \\
+                            --instances ftv70 --time-limit 600 [--cores 8] [--salida archivo.csv]
+    python -m atsp carrera ftv170 --configs mtz_acotado:gurobi gg:cplex
+"""
+
+import argparse
+import importlib
+import sys
+import time
+
+from atsp.instances import INSTANCES, instance_path
+
+# comandos que delegan en el main(argv) de otro módulo
+TOOLS = {
+    "carrera": "atsp.race",
+    "ajuste": "atsp.tuning",
+    "lagrangiana": "atsp.lagrangian",
+    "exacto": "atsp.exact",
+    "reduccion": "atsp.reduction",
+    "generar": "atsp.generator",
+    "bench": "atsp.bench",
+    "lote": "atsp.batch",
+    "cola": "atsp.workqueue",
+    "tamanos": "atsp.formulations",
+}
+
+
+def parse_variant(text):
+    """'base' | 'reducido' | 'k<N>' -> argumentos de run_job (reduce, k)."""
+    if text == "base":
+        return {"reduce": False, "k": None}
+    if text == "reducido":
+        return {"reduce": True, "k": None}
+    if text.startswith("k") and text[1:].isdigit() and int(text[1:]) > 0:
+        return {"reduce": False, "k": int(text[1:])}
+    raise argparse.ArgumentTypeError(f"variante inválida: {text} (base, reducido o k<N>, p. ej. k10)")
+
+
+def _leer(args):
+    from atsp.cache import load_cached
+    from atsp.instances import size_class
+
+    print(f"{'Instancia':<14}{'Nodos':>7}{'Clase':>10}{'Lectura (s)':>13}")
+    for name in args.instances:
+        t0 = time.perf_counter()
+        C = load_cached(instance_path(name))
+        print(f"{instance_path(name).name:<14}{len(C):>7}{size_class(len(C)):>10}"
+              f"{time.perf_counter() - t0:>13.3f}")
+
+
+def _heuristica(args):
+    from atsp import heuristics
+
+    heuristics.main(args.instances)
+
+
+def _lp(args):
+    from atsp import lpbound
+
+    argv = list(args.instances)
+    if args.formulations:
+        argv += ["--formulations", *args.formulations]
+    if args.salida:
+        argv += ["--salida", args.salida]
+    lpbound.main(argv)
+
+
+def _resolver(args, parser):
+    from atsp.batch import make_jobs, pending_jobs, run_batch
+    from atsp.results import ResultsSink, report
+    from atsp.runner import COLUMNS, FORMULATIONS, SOLVERS, run_job
+
+    bad = [s for s in args.solvers if s not in SOLVERS] + [f for f in args.formulations if f not in FORMULATIONS]
+    if bad:
+        parser.error(f"solver/formulación desconocida: {', '.join(bad)} "
+                     f"(solvers: {', '.join(SOLVERS)}; formulaciones: {', '.join(FORMULATIONS)})")
+    if args.reporte and not args.salida:
+        parser.error("--reporte necesita --salida")
+
+    job_kwargs = {**args.variante, "telemetry_dir": args.telemetria, "profile": args.perfil,
+                  "exact": args.exacto}
+    jobs = make_jobs(args.instances, args.formulations, args.solvers, args.cores)
+    if args.threads:
+        for job in jobs:
+            job["threads"] = min(args.threads, args.cores)
+    sink = ResultsSink(args.salida, COLUMNS) if args.salida else None
+    todo = pending_jobs(jobs, sink, **job_kwargs) if sink else jobs
+    if len(todo) < len(jobs):
+        print(f"{len(jobs) - len(todo)} trabajos ya registrados en {args.salida}")
+
+    if args.cores > 1 and len(todo) > 1:
+        run_batch(todo, args.cores, time_limit=args.time_limit,
+                  on_result=sink.append if sink else None, **job_kwargs)
+    else:
+        # un solo núcleo: en este proceso, sin pool
+        for job in todo:
+            job = {k: v for k, v in job.items() if not k.startswith("_")}
+            try:
+                row = run_job(time_limit=args.time_limit, log_output=args.log, **job, **job_kwargs)
+            except Exception as e:
+                print(f"Error en {job['instance']} {job['formulation']} {job['solver']}: {e}")
+                continue
+            if sink:
+                sink.append(row)
+            print(f"   ✓ {row['Instancia']} {row['Formulacion']} {row['Solver']} {row['Variante']}: "
+                  f"{row['Funcion_Objetivo']} (gap {row['Gap_Porcentaje']} %, {row['Tiempo_s']} s"
+                  f"{', ' + row['Metodo'] if row['Metodo'] else ''})")
+    if args.salida:
+        print("Resultados en:", args.salida)
+    if args.reporte:
+        print(report(args.salida))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m atsp", description="ATSP: lectura, heurísticas, cotas LP y resolución",
+        epilog="otros comandos (ver --help de cada uno): " + ", ".join(TOOLS))
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("leer", help="leer instancias y dejarlas en caché")
+    p.add_argument("instances", nargs="*", default=INSTANCES)
+    p.set_defaults(func=_leer)
+
+    p = sub.add_parser("heuristica", help="mejor tour heurístico")
+    p.add_argument("instances", nargs="*", default=INSTANCES)
+    p.set_defaults(func=_heuristica)
+
+    p = sub.add_parser("lp", help="cota de la relajación lineal (HiGHS)")
+    p.add_argument("instances", nargs="*", default=INSTANCES)
+    p.add_argument("--formulations", nargs="+", help="por defecto las de atsp.lpbound.PAIRS")
+    p.add_argument("--salida", help="CSV donde se agregan las filas (se saltan las ya hechas)")
+    p.set_defaults(func=_lp)
+
+    p = sub.add_parser("resolver", help="resolver con un solver MIP")
+    p.add_argument("--solvers", "--solver", nargs="+", default=["highs"],
+                   help="gurobi, cplex o highs (por defecto highs, sin licencia)")
+    p.add_argument("--formulations", "--formulation", nargs="+", default=["mtz_acotado"])
+    p.add_argument("--variante", type=parse_variant, default=parse_variant("base"),
+                   help="base, reducido (eliminación de arcos) o k<N> (k vecinos con pricing)")
+    p.add_argument("--instances", nargs="+", default=INSTANCES)
+    p.add_argument("--time-limit", type=float, default=3600)
+    p.add_argument("--threads", type=int, help="threads por trabajo (por defecto según la clase de tamaño)")
+    p.add_argument("--cores", type=int, default=1,
+                   help="núcleos del lote; con más de 1 los trabajos van al pool de atsp.batch")
+    p.add_argument("--salida", help="CSV donde se agregan las filas (se saltan los trabajos ya hechos)")
+    p.add_argument("--perfil", help="JSON de parámetros por clase de tamaño (atsp.tuning)")
+    p.add_argument("--exacto", action="store_true",
+                   help="con n <= exact.EXACT_MAX_N probar antes Held-Karp / branch-and-bound "
+                        "de asignación (las filas ya no comparan formulaciones ni solvers)")
+    p.add_argument("--telemetria", metavar="DIR", help="guardar el progreso de cada trabajo en DIR/*.jsonl")
+    p.add_argument("--log", action="store_true", help="mostrar el log del solver (solo con --cores 1)")
+    p.add_argument("--reporte", action="store_true", help="imprimir la tabla final (usa pandas)")
+    p.set_defaults(func=_resolver)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in TOOLS:
+        return importlib.import_module(TOOLS[argv[0]]).main(argv[1:])
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.func is _resolver:
+        return _resolver(args, parser)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Separación de restricciones de eliminación de subtours (DFJ).
+
+El modelo parte solo de las restricciones de asignación (matrices.compile_assignment)
+y los backends llaman a SubtourSeparator desde sus callbacks:
+  - soluciones enteras: componentes fuertemente conexas -> cortes lazy;
+  - puntos fraccionarios: componentes del soporte y luego flujo máximo / corte
+    mínimo entre el nodo 0 y cada k -> cortes de usuario.
+Cada corte es (columnas x, sentido, rhs) con coeficientes 1:
+  sum_{i,j en S} x_ij <= |S| - 1   o   sum_{i en S, j fuera} x_ij >= 1.
+"""
+
+import threading
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import breadth_first_order, connected_components, maximum_flow
+
+# los flujos de scipy son enteros: las x fraccionarias se escalan
+_SCALE = 1_000_000
+
+
+class SubtourSeparator:
+
+    def __init__(self, cm, eps=1e-6, max_user_cuts=50):
+        self.n = cm.n
+        self.tail = cm.tail
+        self.head = cm.head
+        self.eps = eps
+        self.max_user_cuts = max_user_cuts
+        self.num_lazy = 0
+        self.num_user = 0
+        self.time = 0.0
+        # CPLEX puede llamar a los callbacks desde varios threads
+        self._lock = threading.Lock()
+
+    def _count(self, lazy, user, elapsed):
+        with self._lock:
+            self.num_lazy += lazy
+            self.num_user += user
+            self.time += elapsed
+
+    def _components(self, xval, threshold):
+        sel = xval > threshold
+        graph = sp.csr_matrix((np.ones(sel.sum()), (self.tail[sel], self.head[sel])),
+                              shape=(self.n, self.n))
+        return connected_components(graph, directed=True, connection="strong")
+
+    def _packing(self, nodes):
+        """sum_{i,j en S} x_ij <= |S| - 1 sobre el lado más chico."""
+        inside = np.zeros(self.n, dtype=bool)
+        inside[nodes] = True
+        if nodes.size > self.n // 2:
+            inside = ~inside
+        cols = np.flatnonzero(inside[self.tail] & inside[self.head])
+        return cols, "<", float(inside.sum() - 1)
+
+    def _subtour_cuts(self, xval, threshold):
+        ncomp, labels = self._components(xval, threshold)
+        if ncomp == 1:
+            return []
+        return [self._packing(np.flatnonzero(labels == k)) for k in range(ncomp)]
+
+    def integer(self, xval):
+        """Cortes lazy para una solución entera (vacío si ya es un tour)."""
+        t0 = time.perf_counter()
+        cuts = self._subtour_cuts(np.asarray(xval), 0.5)
+        self._count(len(cuts), 0, time.perf_counter() - t0)
+        return cuts
+
+    def fractional(self, xval):
+        """Cortes de usuario violados por un punto fraccionario."""
+        t0 = time.perf_counter()
+        xval = np.asarray(xval)
+        cuts = self._subtour_cuts(xval, self.eps)
+        if not cuts:
+            cuts = self._min_cuts(xval)
+        cuts = cuts[:self.max_user_cuts]
+        self._count(0, len(cuts), time.perf_counter() - t0)
+        return cuts
+
+    def _min_cuts(self, xval):
+        sel = xval > self.eps
+        cap = np.rint(xval[sel] * _SCALE).astype(np.int32)
+        graph = sp.csr_matrix((cap, (self.tail[sel], self.head[sel])), shape=(self.n, self.n))
+
+        cuts, seen = [], set()
+        limit = _SCALE * (1 - self.eps)
+        for k in range(1, self.n):
+            for s, t in ((0, k), (k, 0)):
+                res = maximum_flow(graph, s, t)
+                if res.flow_value >= limit:
+                    continue
+                # residual disperso: res.flow es antisimétrico, así que graph - flow
+                # trae también los arcos inversos de los arcos con flujo
+                residual = graph - res.flow
+                residual.data = (residual.data > 0).astype(np.int8)
+                residual.eliminate_zeros()
+                reach = breadth_first_order(residual, s, directed=True, return_predecessors=False)
+                key = frozenset(reach.tolist())
+                if key in seen:
+                    continue
+                seen.add(key)
+                inside = np.zeros(self.n, dtype=bool)
+                inside[reach] = True
+                cols = np.flatnonzero(inside[self.tail] & ~inside[self.head])
+                cuts.append((cols, ">", 1.0))
+                if len(cuts) >= self.max_user_cuts:
+                    return cuts
+        return cuts
+
+    def stats(self):
+        return {"cortes_lazy": self.num_lazy, "cortes_usuario": self.num_user,
+                "separacion": self.time}
@@ -0,0 +1,231 @@
+"""
+Solución exacta en el mismo proceso, sin solver MIP, para instancias chicas:
+con br17 la licencia, el entorno y el armado del modelo cuestan más que la
+búsqueda (GG/Gurobi informa 0.095 s y MTZ/Gurobi 1.0 s).
+
+  n <= HELD_KARP_MAX_N   programación dinámica de Held y Karp sobre
+                         subconjuntos (máscaras de bits), O(2^n n^2) y
+                         vectorizada por capas de igual cardinalidad.
+  n <= EXACT_MAX_N       branch-and-bound con la cota de asignación: cada
+                         nodo resuelve la asignación con los arcos fijados y
+                         prohibidos, une sus subtours (patching) para la
+                         cota superior y ramifica sobre el subtour más corto
+                         con la partición de Carpaneto y Toth (el hijo r
+                         prohíbe el arco r y fija los anteriores).
+
+runner.run_job usa este camino solo con exact=True (--exacto en atsp.batch
+y `python -m atsp resolver`) y n <= EXACT_MAX_N; si el branch-and-bound no
+prueba el óptimo en EXACT_TIME_LIMIT segundos se sigue con el solver MIP,
+con el mejor tour como MIP start. Con 10 s ftv55 no alcanza a probarse
+(1608 contra cota 1606). tests/test_exact.py compara ambos métodos con
+fuerza bruta y con los óptimos de br17 y ftv33.
+
+Uso:
+    python -m atsp.exact [instancias...] [--time-limit 10]
+"""
+
+import argparse
+import heapq
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from atsp.cache import load_cached
+from atsp.heuristics import patch_cycles, tour_cost, tour_from_successors
+from atsp.instances import INSTANCES, instance_path, known_optima
+
+# dp es 2^(n-1) x (n-1) float64 (80 MB con n = 20) más la matriz de bits en
+# bool (10 MB) y el temporal de la capa más grande: ~110 MB de pico con n = 20
+HELD_KARP_MAX_N = 20
+
+# hasta acá el runner prueba primero el camino exacto
+EXACT_MAX_N = 70
+
+# tiempo del branch-and-bound dentro de run_job antes de pasar al solver MIP
+EXACT_TIME_LIMIT = 10.0
+
+
+@dataclass
+class ExactResult:
+    tour: np.ndarray
+    cost: int
+    lower_bound: int
+    optimal: bool
+    nodes: int              # subproblemas resueltos (0 en Held-Karp)
+    seconds: float
+    method: str             # "held_karp" o "bb_asignacion"
+
+    @property
+    def gap(self):
+        return 100.0 * (self.cost - self.lower_bound) / max(abs(self.cost), 1e-9)
+
+
+def _costs(C):
+    D = np.array(C, dtype=float)
+    np.fill_diagonal(D, np.inf)
+    return D
+
+
+###############################################################################
+# HELD-KARP
+###############################################################################
+
+def held_karp(C):
+    """
+    Tour óptimo por programación dinámica desde el nodo 0. dp[S, k] es el
+    costo del mejor camino 0 -> ... -> k que visita exactamente S (bits de
+    los nodos 1..n-1); las máscaras se procesan por cardinalidad, y en cada
+    capa y para cada k se toma el mínimo sobre el nodo anterior de una vez.
+    """
+    t0 = time.perf_counter()
+    D = _costs(C)
+    n = len(D)
+    if n <= 2:
+        tour = np.arange(n)
+        return ExactResult(tour, tour_cost(C, tour), tour_cost(C, tour), True, 0,
+                           time.perf_counter() - t0, "held_karp")
+    m = n - 1
+    inner = D[1:, 1:]
+    masks = np.arange(1 << m, dtype=np.int64)
+    # en bool y por columna: en int64 era otra matriz del tamaño de dp
+    bits = np.empty((1 << m, m), dtype=bool)
+    for k in range(m):
+        bits[:, k] = (masks >> k) & 1
+    size = bits.sum(axis=1, dtype=np.int8)
+
+    dp = np.full((1 << m, m), np.inf)
+    dp[1 << np.arange(m), np.arange(m)] = D[0, 1:]
+    for p in range(2, m + 1):
+        layer = masks[size == p]
+        for k in range(m):
+            S = layer[bits[layer, k]]
+            dp[S, k] = (dp[S ^ (1 << k)] + inner[:, k]).min(axis=1)
+
+    full = (1 << m) - 1
+    k = int(np.argmin(dp[full] + D[1:, 0]))
+    path, S = [k], full
+    while S != 1 << k:
+        prev = S ^ (1 << k)
+        k = int(np.argmin(dp[prev] + inner[:, k]))
+        path.append(k)
+        S = prev
+    tour = np.array([0] + [j + 1 for j in reversed(path)])
+    cost = tour_cost(C, tour)
+    return ExactResult(tour, cost, cost, True, 0, time.perf_counter() - t0, "held_karp")
+
+
+###############################################################################
+# BRANCH-AND-BOUND CON COTA DE ASIGNACIÓN
+###############################################################################
+
+def _cycles(succ):
+    """Ciclos de una asignación (listas de nodos)."""
+    seen = np.zeros(succ.size, dtype=bool)
+    cycles = []
+    for s in range(succ.size):
+        if not seen[s]:
+            cyc = tour_from_successors(succ, s)
+            seen[cyc] = True
+            cycles.append(cyc)
+    return cycles
+
+
+def _assignment(D, big, fixed, banned):
+    """Asignación con los arcos fixed obligatorios y banned prohibidos: (costo, succ)."""
+    M = D.copy()
+    for i, j in banned:
+        M[i, j] = big
+    for i, j in fixed:
+        cost = M[i, j]
+        M[i, :] = big
+        M[:, j] = big
+        M[i, j] = cost
+    rows, succ = linear_sum_assignment(M)
+    value = M[rows, succ].sum()
+    return (math.inf if value >= big else value), succ
+
+
+def assignment_bb(C, time_limit=None, node_limit=None, tour=None):
+    """
+    Branch-and-bound de mejor cota primero con la relajación de asignación.
+    Con costos enteros un nodo se poda si el techo de su cota no mejora el
+    tour. tour (opcional) da la cota superior inicial. Si se corta por
+    tiempo o nodos, optimal es False y lower_bound la menor cota abierta.
+    """
+    t0 = time.perf_counter()
+    D = _costs(C)
+    finite = np.isfinite(D)
+    big = np.abs(D[finite]).max() * len(D) + 1
+    D = np.where(finite, D, big)
+
+    best, ub = (np.asarray(tour), tour_cost(C, tour)) if tour is not None else (None, math.inf)
+    root, succ = _assignment(D, big, (), ())
+    cand = patch_cycles(D, succ)
+    if tour_cost(C, cand) < ub:
+        best, ub = cand, tour_cost(C, cand)
+    heap = [(root, 0, (), (), succ)]
+    counter, nodes = 1, 1
+    while heap:
+        if ((time_limit is not None and time.perf_counter() - t0 >= time_limit)
+                or (node_limit is not None and nodes >= node_limit)):
+            break
+        lb, _, fixed, banned, succ = heapq.heappop(heap)
+        if math.ceil(lb - 1e-6) >= ub:
+            continue
+        cycles = _cycles(succ)
+        if len(cycles) == 1:
+            best, ub = cycles[0], tour_cost(C, cycles[0])
+            continue
+        cand = patch_cycles(D, succ)
+        if tour_cost(C, cand) < ub:
+            best, ub = cand, tour_cost(C, cand)
+
+        # subtour con menos arcos libres; el hijo r prohíbe su arco r y fija los anteriores
+        fixed_set = set(fixed)
+        arcs = min(([(int(i), int(succ[i])) for i in cyc if (int(i), int(succ[i])) not in fixed_set]
+                    for cyc in cycles), key=len)
+        for r, arc in enumerate(arcs):
+            child_fixed, child_banned = fixed + tuple(arcs[:r]), banned + (arc,)
+            value, child = _assignment(D, big, child_fixed, child_banned)
+            nodes += 1
+            if math.ceil(value - 1e-6) < ub:
+                heapq.heappush(heap, (value, counter, child_fixed, child_banned, child))
+                counter += 1
+
+    optimal = not heap or math.ceil(heap[0][0] - 1e-6) >= ub
+    lower = ub if optimal else math.ceil(heap[0][0] - 1e-6)
+    best = np.roll(best, -int(np.flatnonzero(best == 0)[0]))
+    return ExactResult(best, int(ub), int(lower), optimal, nodes, time.perf_counter() - t0,
+                       "bb_asignacion")
+
+
+def solve_exact(C, time_limit=None, tour=None):
+    """Held-Karp si n <= HELD_KARP_MAX_N; si no, branch-and-bound de asignación."""
+    if len(C) <= HELD_KARP_MAX_N:
+        return held_karp(C)
+    return assignment_bb(C, time_limit=time_limit, tour=tour)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solución exacta sin solver MIP (instancias chicas)")
+    parser.add_argument("instances", nargs="*", default=[i for i in INSTANCES
+                                                          if load_cached(instance_path(i)).shape[0] <= EXACT_MAX_N])
+    parser.add_argument("--time-limit", type=float, default=EXACT_TIME_LIMIT)
+    args = parser.parse_args(argv)
+
+    optima = known_optima()
+    print(f"{'Instancia':<14}{'Nodos':>6}{'Método':>15}{'Costo':>8}{'Cota':>8}{'Óptimo':>8}"
+          f"{'Subproblemas':>14}{'Tiempo (s)':>12}")
+    for name in args.instances:
+        C = load_cached(instance_path(name))
+        res = solve_exact(C, time_limit=args.time_limit)
+        opt = optima.get(instance_path(name).name)
+        print(f"{instance_path(name).name:<14}{len(C):>6}{res.method:>15}{res.cost:>8}{res.lower_bound:>8}"
+              f"{opt if opt else '-':>8}{res.nodes:>14}{res.seconds:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Registro de formulaciones: nombre -> Formulation (compilador de atsp.matrices
+más el tamaño que va a tener el modelo, calculado antes de armarlo).
+
+Para agregar una formulación basta una función compile_*(C, arcs=None) que
+devuelva un CompiledModel y su conteo de variables, filas y no ceros a partir
+de la máscara de arcos; con register() queda disponible en el runner, batch,
+bench y lpbound.
+
+El runner rechaza (ModelTooLarge) los modelos cuya memoria estimada supera la
+disponible, en vez de quedarse sin memoria a mitad de la construcción.
+
+Uso:
+    python -m atsp.formulations [instancias...]    tamaño declarado de cada formulación
+"""
+
+import argparse
+import os
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+
+from atsp.dfj import SubtourSeparator
+from atsp.matrices import (arc_mask, compile_assignment, compile_fgg, compile_gg, compile_gp,
+                           compile_mtz, compile_sd, compile_wong)
+
+# Bytes por no cero y por fila/columna. Armar el modelo (COO + CSR en
+# atsp.matrices) mide ~65 B por no cero con la memoria pico de atsp.instrument
+# (ftv70..ftv170); el resto es margen para la copia del solver, que guarda A
+# por filas y por columnas. Es una estimación gruesa, pensada para rechazar
+# modelos que claramente no caben.
+BYTES_PER_NNZ = 100
+BYTES_PER_ROW = 150
+
+# fracción de la memoria libre que puede usar un modelo
+MEMORY_FRACTION = 0.8
+
+
+class Size(NamedTuple):
+    num_vars: int
+    num_constrs: int
+    nnz: int                 # cota superior (los coeficientes nulos se eliminan)
+
+    def memory_mb(self):
+        return (self.nnz * BYTES_PER_NNZ + (self.num_vars + self.num_constrs) * BYTES_PER_ROW) / 2**20
+
+
+class ModelTooLarge(MemoryError):
+    pass
+
+
+@dataclass(frozen=True)
+class Formulation:
+    name: str
+    compile: Callable          # (C, arcs=None) -> CompiledModel
+    size: Callable             # máscara n x n de arcos -> Size
+    description: str = ""
+    separator: Optional[type] = None    # cortes separados en callbacks (dfj)
+
+    def __call__(self, C, arcs=None):
+        return self.compile(C, arcs=arcs)
+
+
+FORMULATIONS = {}
+
+
+def register(name, compile, size, description="", separator=None):
+    FORMULATIONS[name] = Formulation(name, compile, size, description, separator)
+    return FORMULATIONS[name]
+
+
+# ---------------------------------------------------------------------------
+# Tamaños. Todos usan la máscara sin diagonal (la del runner) y se verificaron
+# contra num_vars, num_constrs y A.nnz de los modelos compilados.
+# ---------------------------------------------------------------------------
+
+class _Counts:
+    """Cantidades de la máscara que usan los conteos."""
+
+    def __init__(self, mask):
+        self.n = n = mask.shape[0]
+        self.m = int(mask.sum())
+        self.out0 = int(mask[0].sum())            # arcos 0 -> j
+        self.in0 = int(mask[:, 0].sum())          # arcos i -> 0
+        inner = mask[1:, 1:]
+        self.inner = int(inner.sum())             # arcos entre nodos != 0
+        self.both = int((inner & inner.T).sum())  # arcos internos con su inverso
+        self.pairs = int((inner | inner.T).sum())  # pares ordenados con algún arco
+        self.nu = n - 1
+
+
+def _size_assignment(c):
+    return c.m, 2 * c.n, 2 * c.m
+
+
+def size_dfj(mask):
+    c = _Counts(mask)
+    return Size(*_size_assignment(c))
+
+
+def size_mtz(mask, lifted=False):
+    c = _Counts(mask)
+    v, r, z = _size_assignment(c)
+    v, r, z = v + c.nu, r + c.inner, z + 3 * c.inner
+    if lifted:
+        r += 2 * c.nu
+        z += c.both + 2 * c.nu + 2 * (c.out0 + c.in0)
+    return Size(v, r, z)
+
+
+def size_gg(mask, tight=False):
+    c = _Counts(mask)
+    mg = c.m - c.out0
+    v, r, z = _size_assignment(c)
+    v, r, z = v + mg, r + c.nu + mg, z + (2 * mg - c.in0) + 2 * mg
+    if tight:
+        out_deg = mask.sum(axis=1)
+        r += mg + c.out0
+        z += 2 * mg + int(out_deg[1:][mask[0, 1:]].sum()) + c.out0
+    return Size(v, r, z)
+
+
+def size_wong(mask):
+    c = _Counts(mask)
+    nk = c.n - 1
+    v, r, z = _size_assignment(c)
+    # por cada commodity y sentido: balance en n-1 nodos y f <= x por arco
+    return Size(v + 2 * nk * c.m, r + 2 * nk * (c.n - 1 + c.m),
+                z + 2 * nk * ((c.m - c.out0) + (c.m - c.in0) + 2 * c.m))
+
+
+def size_sd(mask):
+    c = _Counts(mask)
+    my = c.inner
+    v, r, z = _size_assignment(c)
+    v += c.nu + my
+    r += 2 * c.nu + 2 * my + 2 * c.pairs + 2 * c.nu
+    z += (my + c.in0 + c.nu) + (my + c.nu) + 4 * my \
+        + (c.pairs + 4 * my) + (c.pairs + 3 * my) + 2 * c.nu + 2 * (c.out0 + c.in0)
+    return Size(v, r, z)
+
+
+def size_fgg(mask):
+    c = _Counts(mask)
+    mr = c.out0 + c.in0 + (c.n - 2) * c.inner
+    v, r, z = _size_assignment(c)
+    # x = sum_t r, etapas 2..n-1, balance de posición en i != 0
+    return Size(v + mr, r + c.m + (c.n - 2) + (c.n - 1),
+                z + (mr + c.m) + (c.n - 2) * c.inner + (mr - c.out0) + (mr - c.in0))
+
+
+def size_gp(mask):
+    c = _Counts(mask)
+    nn = c.n - 1                                 # nodos != 0
+    v, r, z = _size_assignment(c)
+    v += nn * (nn - 1)
+    r, z = r + 2 * c.inner, z + 4 * c.inner
+    # tríos (i, j, k) con algún arco en la fila; los que no tienen ninguno se omiten
+    rows_22 = c.pairs * (nn - 2)
+    free = (~mask[1:, 1:]).astype(np.int64)
+    np.fill_diagonal(free, 0)
+    rows_23 = nn * (nn - 1) * (nn - 2) - int((free * (free @ free)).sum())
+    r += rows_22 + rows_23
+    z += 2 * rows_22 + 2 * c.inner * (nn - 2) + 2 * rows_23 + 3 * c.inner * (nn - 2)
+    return Size(v, r, z)
+
+
+register("mtz_acotado", partial(compile_mtz, bounded=True), size_mtz,
+         "MTZ con 1 <= u_i <= n-1")
+register("mtz_no_acotado", partial(compile_mtz, bounded=False), size_mtz,
+         "MTZ con u_i >= 0 sin cota superior")
+register("mtz_lifted", partial(compile_mtz, lifted=True), partial(size_mtz, lifted=True),
+         "MTZ levantado de Desrochers y Laporte")
+register("gg", compile_gg, size_gg, "flujo de un solo commodity de Gavish y Graves")
+register("gg_tight", partial(compile_gg, tight=True), partial(size_gg, tight=True),
+         "GG con el enlace entre g y x ajustado")
+register("dfj", compile_assignment, size_dfj,
+         "asignación con cortes de subtour en callbacks", separator=SubtourSeparator)
+register("wong", compile_wong, size_wong, "multiflujo de Wong (2(n-1) commodities)")
+register("sd", compile_sd, size_sd, "Sherali y Driscoll (MTZ-DL reformulado por RLT)")
+register("fgg", compile_fgg, size_fgg, "por etapas de Fox, Gavish y Graves")
+register("gp", compile_gp, size_gp, "Gouveia y Pires (L3RMTZ)")
+
+
+# ---------------------------------------------------------------------------
+# Memoria
+# ---------------------------------------------------------------------------
+
+def available_memory_mb():
+    """
+    Memoria que puede usar un modelo: ATSP_MEMORIA_MB si está definida, si no
+    una fracción de la memoria libre del sistema (None si no se puede saber).
+    """
+    if os.environ.get("ATSP_MEMORIA_MB"):
+        return float(os.environ["ATSP_MEMORIA_MB"])
+    try:
+        free = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None     # p. ej. en Windows
+    return MEMORY_FRACTION * free / 2**20
+
+
+def check_fits(formulation, n, arcs=None, limit_mb=None):
+    """
+    Size de la formulación sobre n nodos (y arcs); ModelTooLarge si la
+    memoria estimada supera limit_mb (por defecto, available_memory_mb()).
+    """
+    size = FORMULATIONS[formulation].size(arc_mask(n, arcs))
+    limit_mb = available_memory_mb() if limit_mb is None else limit_mb
+    if limit_mb is not None and size.memory_mb() > limit_mb:
+        raise ModelTooLarge(
+            f"{formulation} con n = {n}: {size.num_vars} variables, {size.num_constrs} "
+            f"restricciones y {size.nnz} no ceros (~{size.memory_mb():.0f} MB, "
+            f"disponibles {limit_mb:.0f} MB); para cotas sin armar el modelo: "
+            f"python -m atsp.lagrangian")
+    return size
+
+
+def main(argv=None):
+    from atsp.cache import load_cached
+    from atsp.instances import INSTANCES, instance_path
+
+    parser = argparse.ArgumentParser(description="Tamaño declarado de cada formulación")
+    parser.add_argument("instances", nargs="*", default=INSTANCES)
+    parser.add_argument("--formulations", nargs="+", default=list(FORMULATIONS),
+                        choices=list(FORMULATIONS))
+    args = parser.parse_args(argv)
+
+    limit = available_memory_mb()
+    print(f"Memoria disponible: {'?' if limit is None else f'{limit:.0f} MB'}")
+    print(f"{'Instancia':<14}{'Formulación':<16}{'Variables':>12}{'Filas':>12}{'No ceros':>13}"
+          f"{'MB':>9}  Cabe")
+    for name in args.instances:
+        n = load_cached(instance_path(name)).shape[0]
+        mask = arc_mask(n)
+        for f in args.formulations:
+            size = FORMULATIONS[f].size(mask)
+            fits = "?" if limit is None else "sí" if size.memory_mb() <= limit else "no"
+            print(f"{instance_path(name).name:<14}{f:<16}{size.num_vars:>12}{size.num_constrs:>12}"
+                  f"{size.nnz:>13}{size.memory_mb():>9.0f}  {fits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Instancias ATSP sintéticas en TSPLIB (FULL_MATRIX), para estudiar cómo escalan
+las formulaciones y los solvers más allá de rbg403:
+
+  uniforme  c_ij entero uniforme en [1, 1000].
+  ftv       puntos al azar en el plano y distancia euclidiana con una
+            perturbación distinta en cada sentido (como las ftv de Fischetti,
+            Toth y Vigo: costos de 1 a ~400; con el factor uniforme en
+            [1, 2] de cada arco la asimetría media |c_ij - c_ji| / max es
+            ~19-22 % según n, como en ftv33..ftv170, 21-25 %).
+  rbg       stacker crane (como las rbg de Ascheuer): cada nodo es un trabajo
+            que toma una carga en p_i y la deja en d_i; c_ij es el traslado
+            vacío de d_i a p_j en distancia de Chebyshev (la grúa mueve los dos
+            ejes a la vez) sobre un estante de 34 x 8 posiciones, con un cuarto
+            de los trabajos concentrados en pocas posiciones frecuentes.
+
+Cada fila se genera con su propio generador, derivado de (semilla, fila): la
+misma semilla da el mismo archivo sin importar el tamaño de bloque, y la
+matriz se escribe por bloques de filas sin armarse nunca completa (una
+instancia de 5000 nodos son 25M de valores).
+
+Uso:
+    python -m atsp.generator ftv 500 1000 2000 [--semilla 0] [--dir instancias/sinteticas]
+"""
+
+import argparse
+import gzip
+from pathlib import Path
+
+import numpy as np
+
+from atsp.instances import INSTANCE_DIR
+
+SYNTHETIC_DIR = INSTANCE_DIR / "sinteticas"
+KINDS = ("uniforme", "ftv", "rbg")
+
+# valor de la diagonal, como en las ftv de TSPLIB (los modelos no la usan)
+DIAGONAL = 100000000
+
+# filas por bloque escrito: 256 x 5000 valores int64 son ~10 MB
+BLOCK = 256
+
+_COMMENT = {
+    "uniforme": "Costos uniformes en [1, 1000]",
+    "ftv": "Euclidiana perturbada, tipo ftv",
+    "rbg": "Stacker crane, tipo rbg",
+}
+
+
+def instance_name(kind, n, seed=0):
+    return f"{kind}{n}_s{seed}.atsp"
+
+
+def _nodes(kind, n, seed):
+    """Atributos de los nodos (O(n) de memoria), comunes a todas las filas."""
+    rng = np.random.default_rng([seed, 0])
+    if kind == "ftv":
+        return {"xy": rng.uniform(0.0, 150.0, size=(n, 2))}
+    if kind == "rbg":
+        shelf = np.array([34, 8])
+        hot = rng.integers(0, shelf, size=(max(4, n // 20), 2))
+
+        def positions():
+            pos = rng.integers(0, shelf, size=(n, 2))
+            busy = rng.random(n) < 0.25
+            pos[busy] = hot[rng.integers(0, hot.shape[0], size=busy.sum())]
+            return pos
+
+        return {"pickup": positions(), "drop": positions()}
+    return {}
+
+
+def _row_block(kind, nodes, n, seed, start, stop):
+    """Filas start..stop-1 de la matriz (int64, con la diagonal ya puesta)."""
+    block = np.empty((stop - start, n), dtype=np.int64)
+    for r, i in enumerate(range(start, stop)):
+        rng = np.random.default_rng([seed, 1, i])
+        if kind == "uniforme":
+            block[r] = rng.integers(1, 1001, size=n)
+        elif kind == "ftv":
+            d = np.hypot(*(nodes["xy"] - nodes["xy"][i]).T)
+            block[r] = np.maximum(1, np.rint(d * rng.uniform(1.0, 2.0, size=n)))
+        else:
+            block[r] = np.abs(nodes["pickup"] - nodes["drop"][i]).max(axis=1)
+        block[r, i] = DIAGONAL
+    return block
+
+
+def rows(kind, n, seed=0, block=BLOCK):
+    """Bloques de filas consecutivos de la instancia (cada uno de block x n)."""
+    if kind not in KINDS:
+        raise ValueError(f"tipo de instancia desconocido: {kind} (opciones: {', '.join(KINDS)})")
+    nodes = _nodes(kind, n, seed)
+    for start in range(0, n, block):
+        yield _row_block(kind, nodes, n, seed, start, min(start + block, n))
+
+
+def write_instance(path, kind, n, seed=0, block=BLOCK):
+    """Escribe la instancia en path (.gz se comprime) fila por fila."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(tmp, "wt", encoding="ascii") as f:
+        f.write(f"NAME: {path.name.split('.')[0]}\n"
+                "TYPE: ATSP\n"
+                f"COMMENT: {_COMMENT[kind]} (semilla {seed})\n"
+                f"DIMENSION: {n}\n"
+                "EDGE_WEIGHT_TYPE: EXPLICIT\n"
+                "EDGE_WEIGHT_FORMAT: FULL_MATRIX\n"
+                "EDGE_WEIGHT_SECTION\n")
+        for values in rows(kind, n, seed, block):
+            np.savetxt(f, values, fmt="%d")
+        f.write("EOF\n")
+    # un archivo a medio escribir nunca queda con el nombre final
+    tmp.replace(path)
+    return path
+
+
+def generate(kind, n, seed=0, directory=SYNTHETIC_DIR):
+    """Ruta de la instancia, generándola si todavía no existe."""
+    path = Path(directory) / instance_name(kind, n, seed)
+    if not path.exists():
+        write_instance(path, kind, n, seed)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera instancias ATSP sintéticas (TSPLIB)")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("sizes", nargs="+", type=int, help="número de nodos")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--dir", default=str(SYNTHETIC_DIR))
+    args = parser.parse_args(argv)
+    for n in args.sizes:
+        print(generate(args.kind, n, args.semilla, args.dir))
+
+
+if __name__ == "__main__":
+    main()
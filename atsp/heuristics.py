@@ -0,0 +1,249 @@
+"""
+Heurísticas de construcción y búsqueda local para el ATSP sobre la matriz NumPy.
+
+Un tour es un arreglo con la secuencia de nodos empezando en 0. Las búsquedas
+locales nunca invierten segmentos, así que son válidas con costos asimétricos.
+
+Uso:
+    python -m atsp.heuristics [instancias...]
+"""
+
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from atsp.cache import load_cached
+from atsp.instances import INSTANCES, instance_path, known_optima
+
+
+def _costs(C):
+    """Copia float64 con la diagonal en +inf (nunca se usa un arco i -> i)."""
+    D = np.array(C, dtype=float)
+    np.fill_diagonal(D, np.inf)
+    return D
+
+
+def tour_cost(C, tour):
+    tour = np.asarray(tour)
+    return int(np.asarray(C)[tour, np.roll(tour, -1)].sum())
+
+
+def successors(tour):
+    """Arreglo succ con succ[i] = nodo siguiente a i."""
+    tour = np.asarray(tour)
+    succ = np.empty_like(tour)
+    succ[tour] = np.roll(tour, -1)
+    return succ
+
+
+def tour_from_successors(succ, start=0):
+    """Recorre succ desde start; el largo es menor a n si succ tiene subtours."""
+    succ = np.asarray(succ)
+    tour = [start]
+    node = succ[start]
+    while node != start and len(tour) <= succ.size:
+        tour.append(node)
+        node = succ[node]
+    return np.array(tour)
+
+
+def _rotate(tour):
+    k = int(np.flatnonzero(tour == 0)[0])
+    return np.roll(tour, -k)
+
+
+###############################################################################
+# CONSTRUCCIÓN
+###############################################################################
+
+def nearest_neighbor(C, start=0):
+    D = _costs(C)
+    n = len(D)
+    visited = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=np.int64)
+    node = start
+    for k in range(n):
+        tour[k] = node
+        visited[node] = True
+        if k < n - 1:
+            row = np.where(visited, np.inf, D[node])
+            node = int(np.argmin(row))
+    return _rotate(tour)
+
+
+def greedy_arc(C):
+    """Agrega arcos de menor a mayor costo mientras no cierren un subtour."""
+    D = _costs(C)
+    n = len(D)
+    order = np.argsort(D, axis=None, kind="stable")
+    succ = np.full(n, -1)
+    pred = np.full(n, -1)
+    # extremo final del camino que empieza en i / inicial del que termina en j
+    path_end = np.arange(n)
+    path_start = np.arange(n)
+    added = 0
+    for idx in order:
+        if added == n - 1:
+            break
+        i, j = divmod(int(idx), n)
+        if i == j or succ[i] >= 0 or pred[j] >= 0 or path_end[j] == i:
+            continue
+        succ[i], pred[j] = j, i
+        s, e = path_start[i], path_end[j]
+        path_end[s], path_start[e] = e, s
+        added += 1
+    last = int(np.flatnonzero(succ < 0)[0])
+    succ[last] = int(np.flatnonzero(pred < 0)[0])
+    return tour_from_successors(succ)
+
+
+def assignment_patching(C):
+    """
+    Resuelve la relajación de asignación y une sus ciclos (patching de Karp):
+    el ciclo más grande se fusiona con el resto eligiendo el par de arcos de
+    menor costo de reemplazo.
+    """
+    D = _costs(C)
+    big = np.nanmax(np.where(np.isfinite(D), D, np.nan)) * len(D) + 1
+    D = np.where(np.isfinite(D), D, big)
+    _, succ = linear_sum_assignment(D)
+    return patch_cycles(D, succ)
+
+
+def patch_cycles(D, succ):
+    """
+    Tour a partir de una asignación succ con subtours, uniendo los ciclos por
+    el par de arcos de menor costo de reemplazo según D (finita).
+    """
+    succ = np.array(succ)
+    while True:
+        labels = np.full(len(D), -1)
+        cycles = []
+        for s in range(len(D)):
+            if labels[s] < 0:
+                cyc = tour_from_successors(succ, s)
+                labels[cyc] = len(cycles)
+                cycles.append(cyc)
+        if len(cycles) == 1:
+            return _rotate(cycles[0])
+
+        main = max(range(len(cycles)), key=lambda k: cycles[k].size)
+        a = cycles[main]
+        b = np.flatnonzero(labels != main)
+        # reemplazar a->succ(a) y b->succ(b) por a->succ(b) y b->succ(a)
+        delta = (D[a[:, None], succ[b][None, :]] + D[b[None, :], succ[a][:, None]]
+                 - D[a, succ[a]][:, None] - D[b, succ[b]][None, :])
+        ia, ib = np.unravel_index(np.argmin(delta), delta.shape)
+        na, nb = a[ia], b[ib]
+        succ[na], succ[nb] = succ[nb], succ[na]
+
+
+###############################################################################
+# BÚSQUEDA LOCAL
+###############################################################################
+
+def or_opt(C, tour, max_segment=3):
+    """Mueve segmentos de 1..max_segment nodos a la mejor posición (sin invertir)."""
+    D = _costs(C)
+    tour = np.array(tour)
+    n = tour.size
+    improved = True
+    while improved:
+        improved = False
+        for length in range(1, max_segment + 1):
+            for s in range(n):
+                if length >= n - 2:
+                    break
+                seg = np.take(tour, range(s, s + length), mode="wrap")
+                prev, nxt = tour[(s - 1) % n], tour[(s + length) % n]
+                gain = D[prev, seg[0]] + D[seg[-1], nxt] - D[prev, nxt]
+                rest = np.roll(tour, -(s + length))[:n - length]   # empieza en nxt
+                a, b = rest, np.roll(rest, -1)
+                cost = D[a, seg[0]] + D[seg[-1], b] - D[a, b]
+                cost[-1] = np.inf   # volver a insertarlo entre prev y nxt
+                k = int(np.argmin(cost))
+                if cost[k] < gain - 1e-9:
+                    tour = np.concatenate([rest[:k + 1], seg, rest[k + 1:]])
+                    improved = True
+    return _rotate(tour)
+
+
+def or3opt(C, tour):
+    """
+    3-opt sin inversión (intercambio de segmentos consecutivos): A B C -> A C B.
+    Es el único movimiento 3-opt que conserva la orientación de todos los arcos.
+    """
+    D = _costs(C)
+    tour = np.array(tour)
+    n = tour.size
+    improved = True
+    while improved:
+        improved = False
+        nxt = np.roll(tour, -1)
+        removed = D[tour, nxt]
+        jj, kk = np.triu_indices(n, 1)
+        for i in range(n - 2):
+            sel = jj > i
+            j, k = jj[sel], kk[sel]
+            if j.size == 0:
+                break
+            delta = (D[tour[i], nxt[j]] + D[tour[k], nxt[i]] + D[tour[j], nxt[k]]
+                     - removed[i] - removed[j] - removed[k])
+            m = int(np.argmin(delta))
+            if delta[m] < -1e-9:
+                j, k = j[m], k[m]
+                tour = np.concatenate([tour[:i + 1], tour[j + 1:k + 1], tour[i + 1:j + 1], tour[k + 1:]])
+                improved = True
+                break
+    return _rotate(tour)
+
+
+def local_search(C, tour):
+    """Or-opt y or3opt alternados hasta que ninguno mejora."""
+    cost = tour_cost(C, tour)
+    while True:
+        tour = or3opt(C, or_opt(C, tour))
+        new = tour_cost(C, tour)
+        if new >= cost:
+            return tour
+        cost = new
+
+
+CONSTRUCTIONS = {
+    "patching": assignment_patching,
+    "greedy": greedy_arc,
+    "nn": nearest_neighbor,
+}
+
+
+def best_tour(C, methods=tuple(CONSTRUCTIONS), improve=True):
+    """Aplica cada construcción (y la búsqueda local) y devuelve (tour, costo)."""
+    best, best_cost = None, np.inf
+    for method in methods:
+        tour = CONSTRUCTIONS[method](C)
+        if improve:
+            tour = local_search(C, tour)
+        cost = tour_cost(C, tour)
+        if cost < best_cost:
+            best, best_cost = tour, cost
+    return best, best_cost
+
+
+def main(argv=None):
+    names = (argv if argv is not None else sys.argv[1:]) or INSTANCES
+    optima = known_optima()
+    print(f"{'Instancia':<14}{'Nodos':>6}{'Heurística':>12}{'Óptimo':>10}{'Gap (%)':>9}{'Tiempo (s)':>12}")
+    for name in names:
+        C = load_cached(instance_path(name))
+        t0 = time.perf_counter()
+        _, cost = best_tour(C)
+        elapsed = time.perf_counter() - t0
+        opt = optima.get(instance_path(name).name)
+        gap = f"{100 * (cost - opt) / opt:.2f}" if opt else "-"
+        print(f"{instance_path(name).name:<14}{len(C):>6}{cost:>12}{opt if opt else '-':>10}{gap:>9}{elapsed:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Instancias del enunciado y su clasificación por tamaño."""
+
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+INSTANCE_DIR = BASE_DIR / "instancias"
+RESULTS_DIR = BASE_DIR / "Resultados"
+
+INSTANCES = [
+    "br17.atsp", "ftv33.atsp", "ftv55.atsp", "ftv64.atsp",   # pequeñas
+    "ftv70.atsp", "kro124p.atsp", "ftv170.atsp",             # medianas
+    "rbg323.atsp", "rbg358.atsp", "rbg403.atsp",             # grandes
+]
+
+
+def size_class(n):
+    """Grupo de la instancia según su número de nodos (como en GG_Gurobi/GG.py)."""
+    if n <= 65:
+        return "Pequeños"
+    if n <= 200:
+        return "Medianos"
+    return "Grandes"
+
+
+def instance_path(name):
+    """Ruta de una instancia: se acepta el nombre (br17 / br17.atsp) o una ruta."""
+    path = Path(name)
+    if path.exists():
+        return path
+    if not path.suffix:
+        path = path.with_suffix(".atsp")
+    return INSTANCE_DIR / path.name
+
+
+def known_optima():
+    """Óptimos probados (gap 0) según los CSV de Resultados/: {instancia: valor}."""
+    import csv
+
+    optima = {}
+    for path in RESULTS_DIR.rglob("*.csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            sep = ";" if ";" in f.readline() else ","
+            f.seek(0)
+            for row in csv.DictReader(f, delimiter=sep):
+                gap = row.get("Gap_Porcentaje", row.get("Gap (%)"))
+                obj = row.get("Funcion_Objetivo", row.get("Objetivo"))
+                try:
+                    if float(gap) == 0.0:
+                        optima[row["Instancia"]] = int(round(float(obj)))
+                except (TypeError, ValueError):
+                    continue
+    return optima
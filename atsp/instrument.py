@@ -0,0 +1,115 @@
+"""
+Tiempos por fase y memoria pico, con las mismas definiciones en los cuatro
+programas y en atsp.runner:
+
+  Lectura_s       parseo de la instancia (o lectura de la caché)
+  Construccion_s  armado del modelo en Python y carga en el solver
+  Presolve_s      desde el inicio de la resolución hasta el fin del presolve
+                  (CPLEX no lo informa por separado: queda vacío y va en Raiz_s;
+                  HiGHS no tiene callbacks y deja vacías las tres fases)
+  Raiz_s          desde el fin del presolve hasta la primera relajación resuelta
+  BB_s            resto de la resolución (cortes, heurísticas y ramificación)
+  Tiempo_s        reloj de pared de la llamada al solver (= Presolve + Raiz + BB)
+  Extraccion_s    lectura de la solución y métricas desde el solver
+  Memoria_pico_MB máximo de memoria residente desde que se creó el Phases
+                  del trabajo (Linux: VmHWM, que Phases reinicia). Donde no se
+                  puede reiniciar (macOS, Windows) es el pico de todo el
+                  proceso, acumulado entre instancias en los scripts que
+                  resuelven varias seguidas.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+PHASES = ["Lectura_s", "Construccion_s", "Presolve_s", "Raiz_s", "BB_s", "Tiempo_s", "Extraccion_s"]
+COLUMNS = PHASES + ["Memoria_pico_MB"]
+
+
+def reset_peak_rss():
+    """
+    Reinicia el pico de memoria residente del proceso (Linux >= 4.0, con
+    /proc/self/clear_refs). Devuelve si se pudo.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Memoria residente máxima en MB desde el último reset_peak_rss (None si no se puede medir)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 2**10, 1)
+    except OSError:
+        pass
+    # sin /proc: pico de toda la vida del proceso
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 2**20, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB y macOS bytes
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+class Phases:
+    """Acumula la duración de cada fase de un run."""
+
+    def __init__(self):
+        self.times = {}
+        # marcas (segundos desde el inicio de la resolución) que ponen los callbacks
+        self.presolve_end = None
+        self.root_end = None
+        # False si el solver no puede marcar fases (Tiempo_s no se reparte)
+        self.split = True
+        # Memoria_pico_MB cuenta desde acá (si el sistema lo permite)
+        self.peak_reset = reset_peak_rss()
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def mark_presolve(self, t):
+        if self.presolve_end is None:
+            self.presolve_end = t
+
+    def mark_root(self, t):
+        if self.root_end is None:
+            self.root_end = t
+
+    def split_solve(self):
+        """Reparte Tiempo_s en Presolve_s, Raiz_s y BB_s según las marcas."""
+        total = self.times.get("Tiempo_s")
+        if total is None or not self.split:
+            return
+        presolve = min(self.presolve_end, total) if self.presolve_end is not None else None
+        root = min(self.root_end, total) if self.root_end is not None else total
+        start_root = presolve or 0.0
+        self.times["Presolve_s"] = presolve
+        self.times["Raiz_s"] = max(root - start_root, 0.0)
+        self.times["BB_s"] = max(total - root, 0.0)
+
+    def as_row(self, digits=4):
+        self.split_solve()
+        row = {name: (round(self.times[name], digits) if self.times.get(name) is not None else None)
+               for name in PHASES}
+        row["Memoria_pico_MB"] = peak_rss_mb()
+        return row
@@ -0,0 +1,317 @@
+"""
+Cotas por relajación lagrangiana para instancias demasiado grandes para los
+modelos compactos (GG con n >= 1000 no se llega a armar).
+
+Relajación: 1-arborescencia con raíz r = 0 (arborescencia de costo mínimo
+más el arco más barato que entra a r; cada nodo conserva grado de entrada 1)
+con las restricciones de grado de salida llevadas a la función objetivo:
+
+    L(lam) = min_{x 1-arborescencia} sum_ij (c_ij + lam_i) x_ij - sum_i lam_i
+
+L(lam) es cota inferior para todo lam. Los multiplicadores parten de los
+duales de la asignación (lam = -u, así L >= cota AP desde la primera
+iteración) y se mejoran por subgradiente con paso de Polyak contra la mejor
+cota superior. Cada cierto número de iteraciones (sin pasar de una fracción
+del tiempo) se arma un tour con los costos penalizados (greedy de arcos con y sin prioridad para los arcos de la
+1-arborescencia, más or-opt con los costos reales) y, si sobra tiempo, el
+mejor tour se pule con la búsqueda local completa.
+
+Uso:
+    python -m atsp.lagrangian [instancias...] [--time-limit 60] [--salida archivo.csv]
+"""
+
+import argparse
+import math
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from atsp.cache import load_cached
+from atsp.heuristics import (assignment_patching, greedy_arc, local_search, or_opt, tour_cost,
+                             tour_from_successors)
+from atsp.instances import INSTANCES, instance_path, known_optima
+from atsp.reduction import assignment_bound
+from atsp.results import ResultsSink
+from atsp.solution import format_tour
+
+# hasta este n se pule el mejor tour con heuristics.local_search (or3opt es
+# O(n^3) por pasada: con n mayor no entra en presupuestos razonables)
+POLISH_MAX_N = 500
+
+# fracción del tiempo transcurrido que pueden usar los tours guiados (con
+# n = 2000 cada uno lleva ~8 s, contra ~0.6 s de una iteración)
+HEURISTIC_SHARE = 0.3
+
+COLUMNS = [
+    "Instancia", "Nodos", "Cota_AP", "Cota_inferior", "Cota_superior", "Gap_Porcentaje",
+    "Iteraciones", "Tiempo_s", "Tour",
+]
+
+
+###############################################################################
+# ARBORESCENCIA DE COSTO MÍNIMO (Chu-Liu / Edmonds)
+###############################################################################
+
+def min_arborescence(W, root=0):
+    """
+    Arborescencia de costo mínimo con raíz root sobre la matriz densa W
+    (W[i, j] = costo de i -> j; la diagonal y la columna de root se ignoran).
+    Edmonds en versión densa O(n^2): se sigue el arco de entrada más barato
+    desde cada nodo y cada ciclo se contrae en el lugar (fila = mínimo de las
+    filas, columna = mínimo de los costos reducidos), guardando el arco
+    original detrás de cada entrada para expandir al final.
+    Devuelve pred con pred[root] = -1.
+    """
+    n = len(W)
+    M = np.array(W, dtype=float)
+    M[:, root] = np.inf
+    np.fill_diagonal(M, np.inf)
+    tail = np.repeat(np.arange(n, dtype=np.int32)[:, None], n, axis=1)
+    head = np.repeat(np.arange(n, dtype=np.int32)[None, :], n, axis=0)
+    best = np.argmin(M, axis=0)
+    alive = np.ones(n, dtype=bool)
+
+    # supernodos: 0..n-1 son los nodos; cada contracción crea uno nuevo
+    node = list(range(n))               # supernodo de cada índice vivo de M
+    parent, members, cycle_arc = {}, {}, {}
+
+    def contract(cyc):
+        C = np.array(cyc)
+        c = cyc[0]
+        sid = len(parent) + n
+        members[sid] = [node[v] for v in cyc]
+        for v in cyc:
+            parent[node[v]] = sid
+            cycle_arc[node[v]] = (int(tail[best[v], v]), int(head[best[v], v]))
+        inc = M[best[C], C]
+        i = np.argmin(M[C], axis=0)
+        row, row_t, row_h = M[C[i], np.arange(n)], tail[C[i], np.arange(n)], head[C[i], np.arange(n)]
+        cols = M[:, C] - inc[None, :]
+        j = np.argmin(cols, axis=1)
+        col = cols[np.arange(n), j]
+        col_t, col_h = tail[np.arange(n), C[j]], head[np.arange(n), C[j]]
+        M[C, :] = np.inf
+        M[:, C] = np.inf
+        M[c, :], tail[c, :], head[c, :] = row, row_t, row_h
+        M[:, c], tail[:, c], head[:, c] = col, col_t, col_h
+        M[C, c] = np.inf
+        M[c, C] = np.inf
+        alive[C[1:]] = False
+        node[c] = sid
+        best[np.isin(best, C)] = c
+        best[c] = np.argmin(M[:, c])
+        return c
+
+    state = np.zeros(n, dtype=np.int8)  # 0 sin visitar, 1 en el camino, 2 llega a root
+    state[root] = 2
+    for s in range(n):
+        if state[s]:
+            continue
+        path = [s]
+        state[s] = 1
+        while True:
+            u = int(best[path[-1]])
+            if state[u] == 2:
+                break
+            if state[u] == 0:
+                state[u] = 1
+                path.append(u)
+                continue
+            # ciclo u -> ... -> path[-1] -> u: queda representado por u
+            k = path.index(u)
+            contract(path[k:])
+            del path[k + 1:]
+        state[path] = 2
+
+    # expansión: el arco que entra a un supernodo reemplaza el arco de ciclo
+    # del miembro que contiene su cabeza; los demás miembros conservan el suyo
+    pred = np.full(n, -1, dtype=np.int64)
+    stack = [(node[v], (int(tail[best[v], v]), int(head[best[v], v])))
+             for v in np.flatnonzero(alive) if v != root]
+    while stack:
+        sid, (t, h) = stack.pop()
+        if sid < n:
+            pred[sid] = t
+            continue
+        x = h
+        while parent[x] != sid:
+            x = parent[x]
+        stack.extend((m, (t, h) if m == x else cycle_arc[m]) for m in members[sid])
+    return pred
+
+
+###############################################################################
+# SUBGRADIENTE
+###############################################################################
+
+@dataclass
+class LagrangianResult:
+    lower_bound: int            # cota certificada: techo de la mejor L(lam)
+    upper_bound: int
+    tour: np.ndarray
+    ap_bound: float
+    iterations: int
+    seconds: float
+    multipliers: np.ndarray
+    history: list = field(default_factory=list)   # (iteración, L, UB, segundos)
+
+    @property
+    def gap(self):
+        """Gap (%) entre las cotas, relativo a la superior."""
+        return 100.0 * (self.upper_bound - self.lower_bound) / max(abs(self.upper_bound), 1e-9)
+
+    def as_row(self):
+        return {
+            "Cota_AP": round(self.ap_bound, 4), "Cota_inferior": self.lower_bound,
+            "Cota_superior": self.upper_bound, "Gap_Porcentaje": round(self.gap, 4),
+            "Iteraciones": self.iterations, "Tiempo_s": round(self.seconds, 4),
+            "Tour": format_tour(self.tour),
+        }
+
+
+def one_arborescence(D, lam, root=0):
+    """
+    1-arborescencia de costo mínimo con los costos c_ij + lam_i. Devuelve
+    (tails, L(lam), g): tails[j] es la cola del arco que entra a j (también
+    para root) y g = grado de salida - 1 es el subgradiente.
+    L se suma con math.fsum sobre los costos enteros para no acumular error.
+    """
+    n = len(D)
+    pred = min_arborescence(D + lam[:, None], root)
+    into_root = int(np.argmin(D[:, root] + lam))
+    tails = pred.copy()
+    tails[root] = into_root
+    g = np.bincount(tails, minlength=n) - 1
+    value = math.fsum(D[tails, np.arange(n)]) + math.fsum(lam * g)
+    return tails, value, g
+
+
+def _guided_tour(C, D, lam, tails=None):
+    """
+    Tour guiado por la relajación: greedy de arcos con los costos penalizados
+    c_ij + lam_i y, si se da tails, el mismo greedy tomando primero los arcos
+    de la 1-arborescencia; el mejor después de or-opt. (La asignación y el
+    vecino más cercano no cambian con lam: es constante por fila.)
+    """
+    W = D + lam[:, None]
+    best, best_cost = None, np.inf
+    for first in (False, True) if tails is not None else (False,):
+        if first:
+            W[tails, np.arange(len(W))] -= np.abs(W[np.isfinite(W)]).max() + 1
+        tour = or_opt(C, greedy_arc(W))
+        cost = tour_cost(C, tour)
+        if cost < best_cost:
+            best, best_cost = tour, cost
+    return best, best_cost
+
+
+def lagrangian_bound(C, time_limit=60.0, max_iter=100000, root=0, tour=None,
+                     heuristic_every=25, patience=20, min_step=1e-4, log=None):
+    """
+    Subgradiente sobre L(lam) hasta que se acabe time_limit, se cierre el gap
+    (techo de L >= UB: el tour es óptimo) o el factor de paso baje de min_step;
+    el pulido final con local_search puede pasarse del límite.
+    tour (opcional) da la cota superior inicial; si no, se usa el tour guiado
+    por los duales de la asignación (y patching con or-opt si n <= POLISH_MAX_N). log(iteración, L, UB) se llama en cada mejora.
+    """
+    t0 = time.perf_counter()
+    D = np.array(C, dtype=float)
+    np.fill_diagonal(D, np.inf)
+
+    ap, _, u, _ = assignment_bound(C)
+    lam = -u
+    if tour is None:
+        tour, ub = _guided_tour(C, D, lam)
+        if len(D) <= POLISH_MAX_N:
+            # con n grande patching + or-opt tarda más que muchas iteraciones
+            cand = or_opt(C, assignment_patching(C))
+            if tour_cost(C, cand) < ub:
+                tour, ub = cand, tour_cost(C, cand)
+    else:
+        ub = tour_cost(C, tour)
+    heuristic_s = time.perf_counter() - t0
+
+    best_l, best_lam = -np.inf, lam.copy()
+    mu, stall = 2.0, 0
+    history = []
+    it = 0
+    while it < max_iter and time.perf_counter() - t0 < time_limit:
+        it += 1
+        tails, value, g = one_arborescence(D, lam, root)
+        if value > best_l + 1e-9:
+            best_l, best_lam, stall = value, lam.copy(), 0
+            history.append((it, value, ub, time.perf_counter() - t0))
+            if log is not None:
+                log(it, value, ub)
+        else:
+            stall += 1
+        if not g.any():
+            # la 1-arborescencia es un tour: óptimo para la relajación y factible
+            succ = np.empty(len(D), dtype=np.int64)
+            succ[tails] = np.arange(len(D))
+            cand = tour_from_successors(succ)
+            if tour_cost(C, cand) < ub:
+                tour, ub = cand, tour_cost(C, cand)
+            break
+        elapsed = time.perf_counter() - t0
+        if it % heuristic_every == 0 and heuristic_s <= HEURISTIC_SHARE * elapsed:
+            cand, cost = _guided_tour(C, D, lam, tails)
+            heuristic_s += time.perf_counter() - t0 - elapsed
+            if cost < ub:
+                tour, ub = cand, cost
+                history.append((it, best_l, ub, time.perf_counter() - t0))
+                if log is not None:
+                    log(it, best_l, ub)
+        if _certified(best_l) >= ub:
+            break
+        if stall >= patience:
+            mu, stall = mu / 2, 0
+            lam = best_lam.copy()
+            if mu < min_step:
+                break
+        lam = lam + mu * (ub - value) / float(g @ g) * g
+
+    if _certified(best_l) < ub and len(D) <= POLISH_MAX_N and time.perf_counter() - t0 < time_limit:
+        cand = local_search(C, tour)
+        if tour_cost(C, cand) < ub:
+            tour, ub = cand, tour_cost(C, cand)
+            history.append((it, best_l, ub, time.perf_counter() - t0))
+
+    return LagrangianResult(
+        lower_bound=max(_certified(best_l), int(math.ceil(ap - 1e-6))), upper_bound=int(ub),
+        tour=np.asarray(tour), ap_bound=float(ap), iterations=it,
+        seconds=time.perf_counter() - t0, multipliers=best_lam, history=history)
+
+
+def _certified(value):
+    """Techo de una cota con costos enteros, con holgura por redondeo."""
+    return int(math.ceil(value - 1e-6 * max(1.0, abs(value))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cotas por relajación lagrangiana (1-arborescencia)")
+    parser.add_argument("instances", nargs="*", default=INSTANCES)
+    parser.add_argument("--time-limit", type=float, default=60.0, help="segundos por instancia")
+    parser.add_argument("--salida", help="CSV donde se agregan las filas")
+    parser.add_argument("--verbose", action="store_true", help="mostrar cada mejora de las cotas")
+    args = parser.parse_args(argv)
+
+    sink = ResultsSink(args.salida, COLUMNS, key=("Instancia",)) if args.salida else None
+    optima = known_optima()
+    print(f"{'Instancia':<16}{'Nodos':>6}{'Cota AP':>10}{'Cota LR':>10}{'Tour':>10}{'Gap %':>8}"
+          f"{'Óptimo':>9}{'Iter':>7}{'Tiempo (s)':>12}")
+    for name in args.instances:
+        C = load_cached(instance_path(name))
+        log = (lambda it, lb, ub: print(f"   iter {it:>6}  L = {lb:.2f}  UB = {ub}")) if args.verbose else None
+        res = lagrangian_bound(C, time_limit=args.time_limit, log=log)
+        inst = instance_path(name).name
+        if sink:
+            sink.append({"Instancia": inst, "Nodos": len(C), **res.as_row()})
+        opt = optima.get(inst)
+        print(f"{inst:<16}{len(C):>6}{res.ap_bound:>10.0f}{res.lower_bound:>10}{res.upper_bound:>10}"
+              f"{res.gap:>8.2f}{opt if opt else '-':>9}{res.iterations:>7}{res.seconds:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Comparación de las formulaciones reforzadas (mtz_lifted, gg_tight) con las de
+la tarea: cota de la relajación lineal en la raíz y, con --solver, nodos,
+tiempo y gap de la resolución completa.
+
+La cota LP se calcula con HiGHS (scipy), así que es la misma sin importar el
+solver; el gap de la raíz se mide contra el óptimo conocido de Resultados/ o,
+si no hay, contra el mejor tour heurístico.
+
+Uso:
+    python -m atsp.lpbound [instancias...]
+    python -m atsp.lpbound --solver gurobi --time-limit 3600 [--salida archivo.csv]
+"""
+
+import argparse
+import time
+
+from scipy.optimize import Bounds, milp
+
+from atsp.backends.highs import constraints
+from atsp.cache import load_cached
+from atsp.heuristics import best_tour
+from atsp.instances import INSTANCES, instance_path, known_optima
+from atsp.results import ResultsSink
+from atsp.runner import FORMULATIONS, SOLVERS, run_job
+
+# (formulación de la tarea, variante reforzada)
+PAIRS = [("mtz_acotado", "mtz_lifted"), ("gg", "gg_tight")]
+
+COLUMNS = [
+    "Instancia", "Nodos", "Formulacion", "Solver", "Variables", "Restricciones",
+    "Cota_LP", "Gap_raiz_Porcentaje", "LP_s", "Referencia",
+    "Tiempo_s", "Nodos_BB", "Gap_Porcentaje", "Funcion_Objetivo",
+]
+
+
+def lp_bound(cm):
+    """(valor de la relajación lineal, segundos) con HiGHS."""
+    t0 = time.perf_counter()
+    res = milp(cm.c, bounds=Bounds(cm.lb, cm.ub), constraints=constraints(cm))
+    return (float(res.fun) if res.x is not None else None), time.perf_counter() - t0
+
+
+def compare(instance, formulations, solver=None, time_limit=3600, reference=None):
+    """Una fila por formulación con la cota LP y, si hay solver, la resolución."""
+    C = load_cached(instance_path(instance))
+    if reference is None:
+        _, reference = best_tour(C)
+    rows = []
+    for formulation in formulations:
+        cm = FORMULATIONS[formulation](C)
+        bound, seconds = lp_bound(cm)
+        row = {
+            "Instancia": instance_path(instance).name, "Nodos": cm.n,
+            "Formulacion": formulation, "Solver": solver or "",
+            "Variables": cm.num_vars, "Restricciones": cm.num_constrs,
+            "Cota_LP": round(bound, 4) if bound is not None else None,
+            "Gap_raiz_Porcentaje": (round(100 * (reference - bound) / reference, 4)
+                                    if bound is not None and reference else None),
+            "LP_s": round(seconds, 4), "Referencia": reference,
+        }
+        if solver:
+            full = run_job(instance, formulation, solver, time_limit=time_limit)
+            row.update({"Tiempo_s": full["Tiempo_s"], "Nodos_BB": full["Nodos_BB"],
+                        "Gap_Porcentaje": full["Gap_Porcentaje"],
+                        "Funcion_Objetivo": full["Funcion_Objetivo"]})
+        rows.append(row)
+    return rows
+
+
+def _fmt(v, spec):
+    return f"{'-':>{spec.split('.')[0]}}" if v is None or v == "" else f"{v:{spec}}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cota LP de la raíz de las formulaciones reforzadas")
+    parser.add_argument("instances", nargs="*", default=INSTANCES)
+    parser.add_argument("--formulations", nargs="+", default=[f for pair in PAIRS for f in pair],
+                        choices=list(FORMULATIONS))
+    parser.add_argument("--solver", choices=list(SOLVERS), help="si se da, resuelve cada formulación")
+    parser.add_argument("--time-limit", type=float, default=3600)
+    parser.add_argument("--salida", help="CSV donde se agregan las filas (se saltan las ya hechas)")
+    args = parser.parse_args(argv)
+
+    sink = ResultsSink(args.salida, COLUMNS, key=("Instancia", "Formulacion", "Solver")) if args.salida else None
+    done = sink.done() if sink else set()
+    optima = known_optima()
+
+    print(f"{'Instancia':<14}{'Formulación':<16}{'Filas':>8}{'Cota LP':>12}{'Gap raíz %':>12}{'LP (s)':>9}"
+          + (f"{'Tiempo (s)':>12}{'Nodos':>10}{'Gap %':>8}" if args.solver else ""))
+    for name in args.instances:
+        todo = [f for f in args.formulations
+                if (instance_path(name).name, f, args.solver or "") not in done]
+        if not todo:
+            continue
+        for row in compare(name, todo, args.solver, args.time_limit,
+                           reference=optima.get(instance_path(name).name)):
+            if sink:
+                sink.append(row)
+            line = (f"{row['Instancia']:<14}{row['Formulacion']:<16}{row['Restricciones']:>8}"
+                    f"{_fmt(row['Cota_LP'], '12.1f')}{_fmt(row['Gap_raiz_Porcentaje'], '12.2f')}"
+                    f"{row['LP_s']:>9.2f}")
+            if args.solver:
+                line += (f"{_fmt(row['Tiempo_s'], '12.2f')}{_fmt(row['Nodos_BB'], '10')}"
+                         f"{_fmt(row['Gap_Porcentaje'], '8.2f')}")
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
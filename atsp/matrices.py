@@ -0,0 +1,543 @@
+"""
+Formulaciones compactas del ATSP (MTZ, GG, Wong, Sherali-Driscoll, Fox-Gavish-
+Graves y Gouveia-Pires) compiladas a forma matricial dispersa.
+
+Cada función devuelve un CompiledModel (c, A en CSR, sentidos, lado derecho,
+cotas y tipos de variable) que los backends cargan de una sola vez, sin un
+addConstr por restricción. Las variables x van primero, en el orden de los
+arcos (tail, head); después vienen las variables propias de cada formulación.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import scipy.sparse as sp
+
+
+@dataclass
+class CompiledModel:
+    name: str
+    n: int
+    tail: np.ndarray          # arco de cada variable x: tail[k] -> head[k]
+    head: np.ndarray
+    c: np.ndarray             # costo por variable
+    lb: np.ndarray
+    ub: np.ndarray
+    vtype: np.ndarray         # 'B', 'I' o 'C' (mismas letras en Gurobi y CPLEX)
+    A: sp.csr_matrix
+    sense: np.ndarray         # '<', '>' o '='
+    rhs: np.ndarray
+    blocks: dict = field(default_factory=dict)   # nombre -> slice de columnas
+    labels: dict = field(default_factory=dict)   # nombre -> índices de cada variable
+
+    @property
+    def num_vars(self):
+        return self.A.shape[1]
+
+    @property
+    def num_constrs(self):
+        return self.A.shape[0]
+
+    @property
+    def num_arcs(self):
+        return self.tail.size
+
+    def var_names(self):
+        """Nombres estilo x_i_j / u_i / g_i_j; solo se generan si se piden."""
+        names = [f"x_{i}_{j}" for i, j in zip(self.tail.tolist(), self.head.tolist())]
+        for block, labels in self.labels.items():
+            names.extend(f"{block}_" + "_".join(map(str, t))
+                         for t in zip(*(a.tolist() for a in labels)))
+        return names
+
+
+class _Rows:
+    """Acumula filas en formato COO y las arma en CSR al final."""
+
+    def __init__(self):
+        self.rows, self.cols, self.vals = [], [], []
+        self.sense, self.rhs = [], []
+        self.count = 0
+
+    def add(self, rows, cols, vals, nrows, sense, rhs):
+        self.rows.append(np.asarray(rows, dtype=np.int64) + self.count)
+        self.cols.append(np.asarray(cols, dtype=np.int64))
+        self.vals.append(np.broadcast_to(np.asarray(vals, dtype=float), np.shape(cols)))
+        self.sense.append(np.broadcast_to(np.asarray(sense, dtype="U1"), (nrows,)))
+        self.rhs.append(np.broadcast_to(np.asarray(rhs, dtype=float), (nrows,)))
+        self.count += nrows
+
+    def build(self, num_vars):
+        A = sp.coo_matrix((np.concatenate(self.vals),
+                           (np.concatenate(self.rows), np.concatenate(self.cols))),
+                          shape=(self.count, num_vars)).tocsr()
+        A.eliminate_zeros()
+        return A, np.concatenate(self.sense), np.concatenate(self.rhs)
+
+
+def arc_mask(n, arcs=None, diagonal=False):
+    """Máscara booleana n x n de los arcos que tendrán variable x."""
+    mask = np.ones((n, n), dtype=bool) if arcs is None else np.array(arcs, dtype=bool)
+    np.fill_diagonal(mask, diagonal)
+    return mask
+
+
+def _x_block(C, mask):
+    tail, head = np.nonzero(mask)
+    cost = np.asarray(C, dtype=float)[tail, head]
+    cost[tail == head] = 0.0
+    return tail, head, cost
+
+
+def _degree_rows(rows, n, tail, head):
+    """Grado de salida y de entrada = 1 (los arcos i->i no participan)."""
+    k = np.flatnonzero(tail != head)
+    rows.add(tail[k], k, 1.0, n, "=", 1.0)
+    rows.add(head[k], k, 1.0, n, "=", 1.0)
+
+
+def _mtz_u_bounds(n, bounded):
+    if bounded:
+        return np.ones(n - 1), np.full(n - 1, n - 1.0)
+    return np.zeros(n - 1), np.full(n - 1, np.inf)
+
+
+def mtz_bounds(cm, bounded):
+    """
+    Cotas (lb, ub) de todas las variables de un modelo de compile_mtz (sin
+    bound_rows) para la variante acotada o no acotada: solo cambian las de u,
+    así que un modelo ya cargado pasa de una a otra sin rearmarse.
+    """
+    lb, ub = cm.lb.copy(), cm.ub.copy()
+    lb[cm.blocks["u"]], ub[cm.blocks["u"]] = _mtz_u_bounds(cm.n, bounded)
+    return lb, ub
+
+
+def _x_index(n, tail, head):
+    """Matriz n x n con la columna x de cada arco (-1 si el arco no tiene variable)."""
+    x_of = np.full((n, n), -1, dtype=np.int64)
+    x_of[tail, head] = np.arange(tail.size)
+    return x_of
+
+
+def _terms(*parts):
+    """
+    Concatena términos (filas, columnas, coeficiente) de una restricción y
+    omite los de columna -1 (arcos sin variable, que valen 0).
+    """
+    rr, cc, vv = [], [], []
+    for r, cols, coef in parts:
+        ok = cols >= 0
+        rr.append(r[ok]), cc.append(cols[ok])
+        vv.append(np.broadcast_to(np.asarray(coef, dtype=float), np.shape(cols))[ok])
+    return np.concatenate(rr), np.concatenate(cc), np.concatenate(vv)
+
+
+def _lifted_u_rows(rows, n, tail, head, u):
+    """2 - x_0i + (n-3) x_i0 <= u_i <= n-2 + x_i0 - (n-3) x_0i, i = 1..n-1."""
+    x_of = _x_index(n, tail, head)
+    nodes = np.arange(1, n)
+    r = np.arange(n - 1)
+    lo_r, lo_c, lo_v = [r], [u], [np.ones(n - 1)]
+    hi_r, hi_c, hi_v = [r + n - 1], [u], [np.ones(n - 1)]
+    # x_0i y x_i0 (sin variable si el arco no está)
+    for cols, lo_coef, hi_coef in ((x_of[0, nodes], 1.0, n - 3.0), (x_of[nodes, 0], -(n - 3.0), -1.0)):
+        ok = cols >= 0
+        lo_r.append(r[ok]), lo_c.append(cols[ok]), lo_v.append(np.full(ok.sum(), lo_coef))
+        hi_r.append(r[ok] + n - 1), hi_c.append(cols[ok]), hi_v.append(np.full(ok.sum(), hi_coef))
+    rows.add(np.concatenate(lo_r + hi_r), np.concatenate(lo_c + hi_c), np.concatenate(lo_v + hi_v),
+             2 * (n - 1), np.repeat([">", "<"], n - 1), np.repeat([2.0, n - 2.0], n - 1))
+
+
+def compile_mtz(C, bounded=True, arcs=None, diagonal=False, bound_rows=False, lifted=False):
+    """
+    MTZ: u_i - u_j + (n-1) x_ij <= n-2 para i, j != 0.
+
+    diagonal=True agrega las x_ii (costo 0, sin restricciones) y bound_rows=True
+    escribe 1 <= u_i <= n-1 como filas en vez de cotas; juntas reproducen el
+    modelo de MTZ_GUROBI/MTZ.py variable por variable.
+
+    lifted=True usa el levantamiento de Desrochers y Laporte:
+      u_i - u_j + (n-1) x_ij + (n-3) x_ji <= n-2
+      2 - x_0i + (n-3) x_i0 <= u_i <= n-2 + x_i0 - (n-3) x_0i
+    (los términos de arcos que no están en arcs se omiten: esas x valen 0).
+    """
+    n = len(C)
+    tail, head, cost = _x_block(C, arc_mask(n, arcs, diagonal))
+    m = tail.size
+    nu = n - 1
+    u = m + np.arange(nu)                # columna de u_i es u[i-1]
+
+    rows = _Rows()
+    _degree_rows(rows, n, tail, head)
+
+    k = np.flatnonzero((tail != 0) & (head != 0) & (tail != head))
+    r = np.arange(k.size)
+    rr, cc = [r, r, r], [u[tail[k] - 1], u[head[k] - 1], k]
+    vv = [np.ones(k.size), -np.ones(k.size), np.full(k.size, n - 1.0)]
+    if lifted:
+        # (n-3) x_ji con el arco inverso de cada fila, si tiene variable
+        rev = _x_index(n, tail, head)[head[k], tail[k]]
+        has = rev >= 0
+        rr.append(r[has]), cc.append(rev[has]), vv.append(np.full(has.sum(), n - 3.0))
+    rows.add(np.concatenate(rr), np.concatenate(cc), np.concatenate(vv), k.size, "<", n - 2.0)
+    if lifted:
+        _lifted_u_rows(rows, n, tail, head, u)
+
+    u_lb, u_ub = _mtz_u_bounds(n, (bounded or lifted) and not bound_rows)
+    if bounded and bound_rows:
+        r = np.arange(nu)
+        rows.add(np.concatenate([2 * r, 2 * r + 1]), np.concatenate([u, u]), 1.0,
+                 2 * nu, np.tile([">", "<"], nu), np.tile([1.0, n - 1.0], nu))
+
+    num_vars = m + nu
+    A, sense, rhs = rows.build(num_vars)
+    return CompiledModel(
+        name="MTZ_lifted" if lifted else f"MTZ_{'bounded' if bounded else 'unbounded'}", n=n, tail=tail, head=head,
+        c=np.concatenate([cost, np.zeros(nu)]),
+        lb=np.concatenate([np.zeros(m), u_lb]),
+        ub=np.concatenate([np.ones(m), u_ub]),
+        vtype=np.array(["B"] * m + ["C"] * nu),
+        A=A, sense=sense, rhs=rhs,
+        blocks={"x": slice(0, m), "u": slice(m, num_vars)},
+        labels={"u": (np.arange(1, n),)})
+
+
+def compile_gg(C, arcs=None, diagonal=False, tight=False):
+    """
+    GG: flujo g_ij (i != 0) con sum_j g_ij - sum_k g_ki = 1 y g_ij <= (n-1) x_ij.
+
+    diagonal=True agrega las g_ii fijadas con g_ii = 0, igual que
+    GG_Gurobi/GG.py (mismo NumVars/NumConstrs que Resultados_GG.csv).
+
+    tight=True ajusta el enlace con x (el flujo de un arco es la posición de su
+    cola en el tour, entre 1 y n-1):
+      x_ij <= g_ij <= (n-2) x_ij  (j != 0),   g_i0 = (n-1) x_i0,
+      sum_j g_ij <= (n-1) - (n-2) x_0i       (el sucesor de 0 envía 1).
+    """
+    n = len(C)
+    mask = arc_mask(n, arcs)
+    tail, head, cost = _x_block(C, mask)
+    m = tail.size
+
+    gmask = mask.copy()
+    gmask[0, :] = False
+    if diagonal:
+        gmask[np.arange(1, n), np.arange(1, n)] = True
+    g_tail, g_head = np.nonzero(gmask)
+    mg = g_tail.size
+    g = m + np.arange(mg)
+
+    # columna x de cada arco de g (-1 para g_ii)
+    x_of = _x_index(n, tail, head)
+    gx = x_of[g_tail, g_head]
+
+    rows = _Rows()
+    _degree_rows(rows, n, tail, head)
+
+    # balance de flujo para i = 1..n-1 (fila i-1)
+    into = g_head != 0
+    rows.add(np.concatenate([g_tail - 1, g_head[into] - 1]),
+             np.concatenate([g, g[into]]),
+             np.concatenate([np.ones(mg), -np.ones(into.sum())]),
+             n - 1, "=", 1.0)
+
+    diag = gx < 0
+    r = np.arange(mg)
+    off = ~diag
+    if tight:
+        coef = np.where(g_head[off] == 0, n - 1.0, n - 2.0)
+        sense = np.where(diag, "=", np.where(g_head == 0, "=", "<"))
+    else:
+        coef = np.full(off.sum(), n - 1.0)
+        sense = np.where(diag, "=", "<")
+    rows.add(np.concatenate([r, r[off]]), np.concatenate([g, gx[off]]),
+             np.concatenate([np.ones(mg), -coef]), mg, sense, 0.0)
+
+    if tight:
+        # g_ij >= x_ij
+        k = np.flatnonzero(off)
+        r = np.arange(k.size)
+        rows.add(np.concatenate([r, r]), np.concatenate([g[k], gx[k]]),
+                 np.concatenate([np.ones(k.size), -np.ones(k.size)]), k.size, ">", 0.0)
+        # sum_j g_ij + (n-2) x_0i <= n-1 para los i con arco 0 -> i
+        x0 = x_of[0, 1:]
+        has = x0 >= 0
+        slot = np.cumsum(has) - 1          # fila de cada nodo con arco desde 0
+        mine = has[g_tail - 1]
+        rows.add(np.concatenate([slot[g_tail[mine] - 1], np.arange(has.sum())]),
+                 np.concatenate([g[mine], x0[has]]),
+                 np.concatenate([np.ones(mine.sum()), np.full(has.sum(), n - 2.0)]),
+                 int(has.sum()), "<", n - 1.0)
+
+    num_vars = m + mg
+    A, sense, rhs = rows.build(num_vars)
+    return CompiledModel(
+        name="GG_tight" if tight else "GG", n=n, tail=tail, head=head,
+        c=np.concatenate([cost, np.zeros(mg)]),
+        lb=np.zeros(num_vars),
+        ub=np.concatenate([np.ones(m), np.full(mg, n - 1.0)]),
+        vtype=np.array(["B"] * m + ["C"] * mg),
+        A=A, sense=sense, rhs=rhs,
+        blocks={"x": slice(0, m), "g": slice(m, num_vars)},
+        labels={"g": (g_tail, g_head)})
+
+
+def compile_wong(C, arcs=None):
+    """
+    Multiflujo de Wong: por cada k != 0 una unidad de 0 a k (f^k) y otra de k
+    a 0 (h^k), cada una acotada por x en cada arco (i = 1..n-1 en el balance):
+      sum_j f^k_ij - sum_j f^k_ji = -[i == k],   f^k_ij <= x_ij
+      sum_j h^k_ij - sum_j h^k_ji =  [i == k],   h^k_ij <= x_ij
+    Las variables y las filas crecen como 2 n^3.
+    """
+    n = len(C)
+    tail, head, cost = _x_block(C, arc_mask(n, arcs))
+    m = tail.size
+    nk = n - 1
+    commodity = np.arange(nk)[:, None]            # k - 1
+    out, into = tail != 0, head != 0
+
+    rows = _Rows()
+    _degree_rows(rows, n, tail, head)
+    for offset, sign in ((m, -1.0), (m + nk * m, 1.0)):
+        cols = offset + np.arange(nk * m).reshape(nk, m)
+        # balance de k en el nodo i: fila (k-1) (n-1) + i - 1
+        rhs = np.zeros((nk, n - 1))
+        np.fill_diagonal(rhs, sign)
+        rows.add(np.concatenate([(commodity * (n - 1) + tail[out] - 1).ravel(),
+                                 (commodity * (n - 1) + head[into] - 1).ravel()]),
+                 np.concatenate([cols[:, out].ravel(), cols[:, into].ravel()]),
+                 np.concatenate([np.ones(nk * out.sum()), -np.ones(nk * into.sum())]),
+                 nk * (n - 1), "=", rhs.ravel())
+        r = np.arange(nk * m)
+        rows.add(np.concatenate([r, r]), np.concatenate([cols.ravel(), np.tile(np.arange(m), nk)]),
+                 np.concatenate([np.ones(nk * m), -np.ones(nk * m)]), nk * m, "<", 0.0)
+
+    num_vars = m + 2 * nk * m
+    A, sense, rhs = rows.build(num_vars)
+    labels = (np.repeat(np.arange(1, n), m), np.tile(tail, nk), np.tile(head, nk))
+    return CompiledModel(
+        name="Wong", n=n, tail=tail, head=head,
+        c=np.concatenate([cost, np.zeros(2 * nk * m)]),
+        lb=np.zeros(num_vars), ub=np.ones(num_vars),
+        vtype=np.array(["B"] * m + ["C"] * (2 * nk * m)),
+        A=A, sense=sense, rhs=rhs,
+        blocks={"x": slice(0, m), "f": slice(m, m + nk * m), "h": slice(m + nk * m, num_vars)},
+        labels={"f": labels, "h": labels})
+
+
+def compile_sd(C, arcs=None):
+    """
+    Sherali-Driscoll: MTZ con las cotas de Desrochers-Laporte reformulado por
+    RLT, con y_ij = u_i x_ij (orden del arco ij en el tour) para i, j != 0:
+      sum_j y_ij + (n-1) x_i0 = u_i,   sum_i y_ij = u_j - 1
+      x_ij <= y_ij <= (n-2) x_ij
+      u_j + (n-2) x_ij + (n-1) x_ji - y_ij - y_ji <= n-1
+      y_ij + y_ji - u_j - x_ji <= -1
+      2 - x_0j + (n-3) x_j0 <= u_j <= n-2 + x_j0 - (n-3) x_0j
+    Las restricciones MTZ originales quedan implicadas y no se escriben.
+    """
+    n = len(C)
+    tail, head, cost = _x_block(C, arc_mask(n, arcs))
+    m = tail.size
+    nu = n - 1
+    u = m + np.arange(nu)                       # columna de u_i es u[i-1]
+    inner = np.flatnonzero((tail != 0) & (head != 0))
+    my = inner.size
+    y = m + nu + np.arange(my)
+    x_of = _x_index(n, tail, head)
+    y_of = np.full((n, n), -1, dtype=np.int64)
+    y_of[tail[inner], head[inner]] = y
+
+    rows = _Rows()
+    _degree_rows(rows, n, tail, head)
+    r = np.arange(nu)
+    rows.add(*_terms((tail[inner] - 1, y, 1.0), (r, x_of[1:, 0], n - 1.0), (r, u, -1.0)),
+             nu, "=", 0.0)
+    rows.add(np.concatenate([head[inner] - 1, r]), np.concatenate([y, u]),
+             np.concatenate([np.ones(my), -np.ones(nu)]), nu, "=", -1.0)
+
+    r = np.arange(my)
+    rows.add(np.concatenate([r, r]), np.concatenate([inner, y]),
+             np.concatenate([np.ones(my), -np.ones(my)]), my, "<", 0.0)
+    rows.add(np.concatenate([r, r]), np.concatenate([y, inner]),
+             np.concatenate([np.ones(my), np.full(my, -(n - 2.0))]), my, "<", 0.0)
+
+    # pares ordenados (i, j) con algún arco entre i y j
+    pair = (x_of >= 0) | (x_of.T >= 0)
+    pair[0, :] = pair[:, 0] = False
+    pi, pj = np.nonzero(pair)
+    r = np.arange(pi.size)
+    xij, xji, yij, yji = x_of[pi, pj], x_of[pj, pi], y_of[pi, pj], y_of[pj, pi]
+    rows.add(*_terms((r, u[pj - 1], 1.0), (r, xij, n - 2.0), (r, xji, n - 1.0),
+                     (r, yij, -1.0), (r, yji, -1.0)), pi.size, "<", n - 1.0)
+    rows.add(*_terms((r, yij, 1.0), (r, yji, 1.0), (r, u[pj - 1], -1.0), (r, xji, -1.0)),
+             pi.size, "<", -1.0)
+    _lifted_u_rows(rows, n, tail, head, u)
+
+    num_vars = m + nu + my
+    A, sense, rhs = rows.build(num_vars)
+    return CompiledModel(
+        name="SD", n=n, tail=tail, head=head,
+        c=np.concatenate([cost, np.zeros(nu + my)]),
+        lb=np.concatenate([np.zeros(m), np.ones(nu), np.zeros(my)]),
+        ub=np.concatenate([np.ones(m), np.full(nu, n - 1.0), np.full(my, n - 2.0)]),
+        vtype=np.array(["B"] * m + ["C"] * (nu + my)),
+        A=A, sense=sense, rhs=rhs,
+        blocks={"x": slice(0, m), "u": slice(m, m + nu), "y": slice(m + nu, num_vars)},
+        labels={"u": (np.arange(1, n),), "y": (tail[inner], head[inner])})
+
+
+def compile_fgg(C, arcs=None):
+    """
+    Formulación por etapas de Fox, Gavish y Graves: r_ijt = 1 si ij es el
+    t-ésimo arco del tour (t = 1..n). Los arcos que salen de 0 solo van en la
+    etapa 1 y los que entran a 0 en la etapa n:
+      x_ij = sum_t r_ijt
+      sum_ij r_ijt = 1                             t = 2..n-1
+      sum_jt t r_ijt - sum_jt t r_jit = 1          i = 1..n-1
+    Con x entera las r pueden ser continuas: la última familia, sumada sobre
+    un subtour que no pasa por 0, da 0 = |S|.
+    """
+    n = len(C)
+    tail, head, cost = _x_block(C, arc_mask(n, arcs))
+    m = tail.size
+    t_lo = np.where(tail == 0, 1, np.where(head == 0, n, 2))
+    t_hi = np.where(tail == 0, 1, np.where(head == 0, n, n - 1))
+    count = t_hi - t_lo + 1
+    r_arc = np.repeat(np.arange(m), count)
+    mr = r_arc.size
+    stage = t_lo[r_arc] + np.arange(mr) - np.repeat(np.cumsum(count) - count, count)
+    r = m + np.arange(mr)
+
+    rows = _Rows()
+    _degree_rows(rows, n, tail, head)
+    rows.add(np.concatenate([r_arc, np.arange(m)]), np.concatenate([r, np.arange(m)]),
+             np.concatenate([np.ones(mr), -np.ones(m)]), m, "=", 0.0)
+    mid = (stage >= 2) & (stage <= n - 1)
+    rows.add(stage[mid] - 2, r[mid], 1.0, n - 2, "=", 1.0)
+    out, into = tail[r_arc] != 0, head[r_arc] != 0
+    rows.add(np.concatenate([tail[r_arc][out] - 1, head[r_arc][into] - 1]),
+             np.concatenate([r[out], r[into]]),
+             np.concatenate([stage[out], -stage[into]]), n - 1, "=", 1.0)
+
+    num_vars = m + mr
+    A, sense, rhs = rows.build(num_vars)
+    return CompiledModel(
+        name="FGG", n=n, tail=tail, head=head,
+        c=np.concatenate([cost, np.zeros(mr)]),
+        lb=np.zeros(num_vars), ub=np.ones(num_vars),
+        vtype=np.array(["B"] * m + ["C"] * mr),
+        A=A, sense=sense, rhs=rhs,
+        blocks={"x": slice(0, m), "r": slice(m, num_vars)},
+        labels={"r": (tail[r_arc], head[r_arc], stage)})
+
+
+def compile_gp(C, arcs=None):
+    """
+    Gouveia-Pires (L3RMTZ): v_ij = 1 si i está en el camino de 0 a j, para
+    i != j, ambos != 0, y para i, j, k distintos y != 0:
+      x_ij <= v_ij,   x_ij + v_ji <= 1
+      x_ij + x_ji + v_ki - v_kj <= 1
+      x_ij + x_ik + x_kj + v_ki - v_kj <= 1
+    Las dos últimas familias tienen del orden de n^3 filas; las que no tienen
+    ningún arco se omiten (serían v_ki - v_kj <= 1).
+    """
+    n = len(C)
+    mask = arc_mask(n, arcs)
+    tail, head, cost = _x_block(C, mask)
+    m = tail.size
+    x_of = _x_index(n, tail, head)
+    nodes = np.arange(1, n)
+    vmask = np.zeros((n, n), dtype=bool)
+    vmask[1:, 1:] = True
+    np.fill_diagonal(vmask, False)
+    v_tail, v_head = np.nonzero(vmask)
+    mv = v_tail.size
+    v_of = np.full((n, n), -1, dtype=np.int64)
+    v_of[v_tail, v_head] = m + np.arange(mv)
+
+    rows = _Rows()
+    _degree_rows(rows, n, tail, head)
+    inner = np.flatnonzero((tail != 0) & (head != 0))
+    r = np.arange(inner.size)
+    rows.add(np.concatenate([r, r]), np.concatenate([inner, v_of[tail[inner], head[inner]]]),
+             np.concatenate([np.ones(inner.size), -np.ones(inner.size)]), inner.size, "<", 0.0)
+    rows.add(np.concatenate([r, r]), np.concatenate([inner, v_of[head[inner], tail[inner]]]),
+             1.0, inner.size, "<", 1.0)
+
+    i, j, k = (a.ravel() for a in np.meshgrid(nodes, nodes, nodes, indexing="ij"))
+    keep = (i != j) & (j != k) & (i != k)
+    i, j, k = i[keep], j[keep], k[keep]
+    for arcs_ in ((x_of[i, j], x_of[j, i]), (x_of[i, j], x_of[i, k], x_of[k, j])):
+        some = np.any(np.stack(arcs_) >= 0, axis=0)
+        r = np.arange(some.sum())
+        rows.add(*_terms(*((r, a[some], 1.0) for a in arcs_),
+                         (r, v_of[k[some], i[some]], 1.0), (r, v_of[k[some], j[some]], -1.0)),
+                 r.size, "<", 1.0)
+
+    num_vars = m + mv
+    A, sense, rhs = rows.build(num_vars)
+    return CompiledModel(
+        name="GP", n=n, tail=tail, head=head,
+        c=np.concatenate([cost, np.zeros(mv)]),
+        lb=np.zeros(num_vars), ub=np.ones(num_vars),
+        vtype=np.array(["B"] * m + ["C"] * mv),
+        A=A, sense=sense, rhs=rhs,
+        blocks={"x": slice(0, m), "v": slice(m, num_vars)},
+        labels={"v": (v_tail, v_head)})
+
+
+def start_vector(cm, tour):
+    """
+    Solución completa (x y las variables propias de la formulación)
+    correspondiente a un tour, para usar como MIP start. Las entradas que no
+    se pueden deducir quedan en NaN.
+    """
+    tour = np.asarray(tour)
+    n = cm.n
+    succ = np.empty(n, dtype=np.int64)
+    succ[tour] = np.roll(tour, -1)
+    pos = np.empty(n, dtype=np.int64)
+    pos[tour] = np.arange(n)            # el tour empieza en 0: pos[0] = 0
+
+    values = np.full(cm.num_vars, np.nan)
+    values[cm.blocks["x"]] = (succ[cm.tail] == cm.head).astype(float)
+    if "u" in cm.blocks:
+        (nodes,) = cm.labels["u"]
+        values[cm.blocks["u"]] = pos[nodes]
+    if "g" in cm.blocks:
+        # el nodo en la posición p envía p unidades a su sucesor
+        g_tail, g_head = cm.labels["g"]
+        values[cm.blocks["g"]] = np.where(succ[g_tail] == g_head, pos[g_tail], 0.0)
+    if "f" in cm.blocks:
+        # f^k en el camino 0 -> k, h^k en el camino k -> 0
+        k, tail, head = cm.labels["f"]
+        on = succ[tail] == head
+        values[cm.blocks["f"]] = on & (pos[tail] < pos[k])
+        values[cm.blocks["h"]] = on & (pos[tail] >= pos[k])
+    if "y" in cm.blocks:
+        y_tail, y_head = cm.labels["y"]
+        values[cm.blocks["y"]] = np.where(succ[y_tail] == y_head, pos[y_tail], 0.0)
+    if "r" in cm.blocks:
+        r_tail, r_head, stage = cm.labels["r"]
+        values[cm.blocks["r"]] = (succ[r_tail] == r_head) & (stage == pos[r_tail] + 1)
+    if "v" in cm.blocks:
+        v_tail, v_head = cm.labels["v"]
+        values[cm.blocks["v"]] = pos[v_tail] < pos[v_head]
+    return values
+
+
+def compile_assignment(C, arcs=None):
+    """Solo las restricciones de grado (base de DFJ, que agrega los subtours aparte)."""
+    n = len(C)
+    tail, head, cost = _x_block(C, arc_mask(n, arcs))
+    m = tail.size
+    rows = _Rows()
+    _degree_rows(rows, n, tail, head)
+    A, sense, rhs = rows.build(m)
+    return CompiledModel(
+        name="DFJ", n=n, tail=tail, head=head, c=cost,
+        lb=np.zeros(m), ub=np.ones(m), vtype=np.array(["B"] * m),
+        A=A, sense=sense, rhs=rhs, blocks={"x": slice(0, m)})
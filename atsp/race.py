@@ -0,0 +1,262 @@
+"""
+Modo carrera: varias configuraciones (formulación, solver) resuelven la misma
+instancia a la vez, cada una en su proceso, compartiendo incumbentes.
+
+Según Resultados/ la configuración más rápida cambia de una instancia a otra
+(en ftv170 MTZ acotado con Gurobi tarda 7.5 s, GG 50 s y MTZ no acotado
+178 s; en otras gana GG). En la carrera cada tour nuevo que encuentra un
+solver se publica en un Exchange en memoria compartida y los demás lo cargan
+como incumbente desde sus callbacks (cbSetSolution en Gurobi,
+post_heuristic_solution en CPLEX), lo que además les sirve de cutoff. En
+cuanto una configuración prueba optimalidad se cancela el resto
+(terminate/abort desde el callback; los procesos que no respondan en
+--gracia segundos se matan). HiGHS no tiene callbacks: solo publica su
+solución final y se detiene entre rondas de cortes de DFJ.
+
+El resultado es el tiempo hasta el óptimo de la mejor configuración sin
+saber de antemano cuál es.
+
+Uso:
+    python -m atsp.race ftv170 [--configs mtz_acotado:gurobi gg:cplex ...]
+                        [--time-limit 3600] [--cores 8] [--salida archivo.csv]
+"""
+
+import argparse
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from atsp.batch import DEFAULT_FORMULATIONS, DEFAULT_SOLVERS
+from atsp.cache import load_cached
+from atsp.heuristics import best_tour, tour_from_successors
+from atsp.instances import instance_path
+from atsp.matrices import start_vector
+from atsp.results import ResultsSink
+from atsp.runner import FORMULATIONS, SOLVERS, run_job
+from atsp.solution import OPTIMAL_GAP, format_tour, parse_tour, successors_from_x
+
+COLUMNS = [
+    "Instancia", "Nodos", "Configuraciones", "Ganador", "Optimo_probado", "Tiempo_s",
+    "Funcion_Objetivo", "Best_Bound", "Gap_Porcentaje", "Incumbentes_publicados",
+    "Heuristica_Obj", "Tour",
+]
+
+
+class Exchange:
+    """
+    Mejor tour conocido en memoria compartida entre procesos. publish lo
+    reemplaza si el costo mejora; incoming devuelve, una vez por versión, el
+    MIP start del tour para el CompiledModel de quien lo pide. Los callbacks
+    de CPLEX corren en varios threads, por eso el estado local va con lock.
+    """
+
+    def __init__(self, n, ctx=None):
+        ctx = ctx or mp.get_context()
+        self.n = n
+        self._tour = ctx.RawArray("q", n)
+        self._cost = ctx.RawValue("d", math.inf)
+        self._version = ctx.RawValue("q", 0)
+        self._lock = ctx.Lock()
+        self._stop = ctx.Event()
+        self._init_local()
+
+    def _init_local(self):
+        self._seen = 0
+        self._local = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_seen"], state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_local()
+
+    def publish(self, tour, cost):
+        """Registra el tour si mejora el mejor conocido; devuelve si lo hizo."""
+        with self._lock:
+            if cost >= self._cost.value:
+                return False
+            self._tour[:] = np.asarray(tour, dtype=np.int64).tolist()
+            self._cost.value = cost
+            self._version.value += 1
+            version = self._version.value
+        with self._local:
+            # el propio tour no se vuelve a ofrecer a quien lo publicó
+            self._seen = max(self._seen, version)
+        return True
+
+    def best(self):
+        """(costo, tour) del mejor tour publicado; (inf, None) si no hay."""
+        with self._lock:
+            if self._version.value == 0:
+                return math.inf, None
+            return self._cost.value, np.array(self._tour[:], dtype=np.int64)
+
+    @property
+    def published(self):
+        return self._version.value
+
+    def found(self, cm, xval):
+        """Publica los valores x de un solver si forman un único tour."""
+        succ, message = successors_from_x(cm.n, cm.tail, cm.head, xval)
+        if message:
+            return False
+        tour = tour_from_successors(succ)
+        if tour.size != cm.n:
+            return False
+        return self.publish(tour, float(cm.c[cm.blocks["x"]] @ (np.asarray(xval) > 0.5)))
+
+    def incoming(self, cm):
+        """(start, costo) si hay un tour publicado que este proceso no vio; si no None."""
+        with self._local:
+            version = self._version.value
+            if version <= self._seen:
+                return None
+            self._seen = version
+        cost, tour = self.best()
+        return start_vector(cm, tour), cost
+
+    def stop(self):
+        self._stop.set()
+
+    def stopped(self):
+        return self._stop.is_set()
+
+
+def parse_config(text):
+    """'formulacion:solver' -> (formulacion, solver)."""
+    formulation, _, solver = text.partition(":")
+    if formulation not in FORMULATIONS or solver not in SOLVERS:
+        raise argparse.ArgumentTypeError(
+            f"configuración inválida: {text} (formulación:solver, p. ej. mtz_acotado:gurobi)")
+    return formulation, solver
+
+
+def _run(config, instance, time_limit, threads, tour, exchange, results):
+    """Proceso de una configuración: run_job con el Exchange; la fila va a results."""
+    formulation, solver = config
+    try:
+        row = run_job(instance, formulation, solver, time_limit=time_limit, threads=threads,
+                      start_tour=tour, exchange=exchange)
+    except Exception as e:
+        results.put((config, None, f"{type(e).__name__}: {e}"))
+        return
+    results.put((config, row, ""))
+
+
+def _proved(row):
+    return (row is not None and row["Funcion_Objetivo"] is not None and bool(row["Tour_valido"])
+            and row["Gap_Porcentaje"] <= OPTIMAL_GAP)
+
+
+def race(instance, configs, time_limit=3600, cores=None, grace=10.0, mip_start=True, log=print):
+    """
+    Corre las configuraciones en paralelo (cores / len(configs) threads cada
+    una) hasta que una prueba optimalidad o todas terminan. El tour de
+    heuristics.best_tour se publica antes de empezar si mip_start.
+    Devuelve (fila con COLUMNS, {config: fila de run_job o mensaje de error}).
+    """
+    C = load_cached(instance_path(instance))
+    n = len(C)
+    cores = cores or os.cpu_count()
+    threads = max(1, cores // len(configs))
+
+    ctx = mp.get_context()
+    exchange = Exchange(n, ctx)
+    tour, heur_obj = best_tour(C) if mip_start else (None, None)
+    if tour is not None:
+        exchange.publish(tour, heur_obj)
+
+    results = ctx.Queue()
+    procs = {config: ctx.Process(target=_run, daemon=True,
+                                 args=(config, instance, time_limit, threads, tour, exchange, results))
+             for config in configs}
+    t0 = time.perf_counter()
+    for p in procs.values():
+        p.start()
+
+    # margen para lectura, compilación y extracción fuera del TimeLimit del solver
+    deadline = t0 + time_limit + 60 + grace
+    rows, winner, elapsed = {}, None, None
+    while len(rows) < len(procs) and time.perf_counter() < deadline:
+        try:
+            config, row, error = results.get(timeout=1.0)
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs.values()) and results.empty():
+                break
+            continue
+        rows[config] = row if row is not None else error
+        if row is not None and row["Tour"]:
+            exchange.publish(parse_tour(row["Tour"]), row["Tour_costo"])
+        status = "error: " + error if row is None else f"{row['Tiempo_s']} s, gap {row['Gap_Porcentaje']} %"
+        log(f"   {'✓' if _proved(row) else '·'} {config[0]} {config[1]}: {status}")
+        if winner is None and _proved(row):
+            winner, elapsed = config, time.perf_counter() - t0
+            exchange.stop()
+            deadline = time.perf_counter() + grace
+    for p in procs.values():
+        p.join(timeout=0 if winner is None else max(0.0, deadline - time.perf_counter()))
+        if p.is_alive():
+            p.terminate()
+            p.join()
+
+    cost, best = exchange.best()
+    bounds = [r["Best_Bound"] for r in rows.values() if isinstance(r, dict) and r["Best_Bound"] is not None]
+    bound = max(bounds, default=None)
+    summary = {
+        "Instancia": instance_path(instance).name,
+        "Nodos": n,
+        "Configuraciones": " ".join(f"{f}:{s}" for f, s in configs),
+        "Ganador": f"{winner[0]}:{winner[1]}" if winner else None,
+        "Optimo_probado": winner is not None,
+        "Tiempo_s": round(elapsed if winner is not None else time.perf_counter() - t0, 4),
+        "Funcion_Objetivo": cost if best is not None else None,
+        "Best_Bound": bound,
+        "Gap_Porcentaje": (round(100 * max(cost - bound, 0.0) / max(abs(cost), 1e-9), 4)
+                           if best is not None and bound is not None else None),
+        "Incumbentes_publicados": exchange.published,
+        "Heuristica_Obj": heur_obj,
+        "Tour": format_tour(best) if best is not None else None,
+    }
+    return summary, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carrera de configuraciones con incumbentes compartidos")
+    parser.add_argument("instances", nargs="+")
+    parser.add_argument("--configs", nargs="+", type=parse_config,
+                        default=[(f, s) for f in DEFAULT_FORMULATIONS for s in DEFAULT_SOLVERS],
+                        help="formulacion:solver (por defecto MTZ y GG con Gurobi y CPLEX)")
+    parser.add_argument("--time-limit", type=float, default=3600)
+    parser.add_argument("--cores", type=int, default=os.cpu_count())
+    parser.add_argument("--gracia", type=float, default=10.0,
+                        help="segundos para que las demás se cancelen antes de matarlas")
+    parser.add_argument("--sin-heuristica", action="store_true", help="no publicar un tour inicial")
+    parser.add_argument("--salida", help="CSV donde se agregan las filas (se saltan las ya hechas)")
+    args = parser.parse_args(argv)
+
+    sink = ResultsSink(args.salida, COLUMNS, key=("Instancia", "Configuraciones")) if args.salida else None
+    done = sink.done() if sink else set()
+    configs = " ".join(f"{f}:{s}" for f, s in args.configs)
+    for name in args.instances:
+        if (instance_path(name).name, configs) in done:
+            continue
+        print(f"{instance_path(name).name}: {len(args.configs)} configuraciones")
+        summary, _ = race(name, args.configs, time_limit=args.time_limit, cores=args.cores,
+                          grace=args.gracia, mip_start=not args.sin_heuristica)
+        if sink:
+            sink.append(summary)
+        print(f"   ganador {summary['Ganador'] or '-'} en {summary['Tiempo_s']:.2f} s: "
+              f"{summary['Funcion_Objetivo']} (gap {summary['Gap_Porcentaje']} %, "
+              f"{summary['Incumbentes_publicados']} incumbentes publicados)")
+
+
+if __name__ == "__main__":
+    main()
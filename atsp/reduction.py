@@ -0,0 +1,124 @@
+"""
+Cota de asignación y eliminación de arcos por costo reducido.
+
+Con la relajación de asignación (LB, duales u, v) y un tour heurístico (UB),
+todo arco con costo reducido c_ij - u_i - v_j > UB - LB no puede estar en un
+tour de costo menor o igual a UB y se elimina antes de armar el modelo.
+
+Uso:
+    python -m atsp.reduction [instancias...]
+    python -m atsp.reduction --solver gurobi --formulation gg [instancias...]
+
+La segunda forma resuelve cada instancia con y sin eliminación y reporta la
+aceleración.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from atsp.cache import load_cached
+from atsp.heuristics import best_tour
+from atsp.instances import INSTANCES, instance_path
+
+
+def assignment_bound(C):
+    """
+    Resuelve la relajación de asignación (sin arcos i -> i) y devuelve
+    (LB, succ, u, v) con u, v duales óptimos: c_ij - u_i - v_j >= 0 y = 0 en
+    los arcos asignados.
+    """
+    D = np.array(C, dtype=float)
+    n = len(D)
+    np.fill_diagonal(D, np.inf)
+    finite = np.isfinite(D)
+    big = np.abs(D[finite]).max() * n + 1 if finite.any() else 1.0
+    _, succ = linear_sum_assignment(np.where(finite, D, big))
+    lb = D[np.arange(n), succ].sum()
+
+    # Duales de columna: v_k - v_succ(i) <= c_ik - c_i,succ(i) es un sistema de
+    # restricciones de diferencia; Bellman-Ford vectorizado sobre las columnas.
+    W = D - D[np.arange(n), succ][:, None]
+    v = np.zeros(n)
+    for _ in range(n):
+        new = np.minimum(v, (v[succ][:, None] + W).min(axis=0))
+        if np.array_equal(new, v):
+            break
+        v = new
+    u = D[np.arange(n), succ] - v[succ]
+    return lb, succ, u, v
+
+
+def reduced_costs(C, u, v):
+    R = np.asarray(C, dtype=float) - u[:, None] - v[None, :]
+    np.fill_diagonal(R, np.inf)
+    return R
+
+
+def eliminate_arcs(C, upper_bound=None, tour=None):
+    """
+    Máscara n x n de arcos que sobreviven a la eliminación por costo reducido
+    (la diagonal queda en False), más un dict con el resumen. Si no se da una
+    cota superior se calcula con heuristics.best_tour.
+    """
+    t0 = time.perf_counter()
+    lb, _, u, v = assignment_bound(C)
+    if upper_bound is None:
+        tour, upper_bound = best_tour(C)
+    R = reduced_costs(C, u, v)
+    # holgura numérica: no eliminar un arco por un error de redondeo
+    keep = R <= (upper_bound - lb) + 1e-6
+    if tour is not None:
+        tour = np.asarray(tour)
+        keep[tour, np.roll(tour, -1)] = True
+    np.fill_diagonal(keep, False)
+
+    n = len(keep)
+    total = n * (n - 1)
+    info = {
+        "LB": lb,
+        "UB": upper_bound,
+        "Arcos": total,
+        "Arcos_eliminados": total - int(keep.sum()),
+        "Porcentaje_eliminado": 100.0 * (total - keep.sum()) / total,
+        "Tiempo_s": time.perf_counter() - t0,
+    }
+    return keep, info
+
+
+def speedup(instance, formulation, solver, time_limit=3600):
+    """Resuelve con y sin eliminación; devuelve (fila completa, fila reducida)."""
+    from atsp.runner import run_job
+
+    full = run_job(instance, formulation, solver, time_limit=time_limit)
+    reduced = run_job(instance, formulation, solver, time_limit=time_limit, reduce=True)
+    return full, reduced
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Eliminación de arcos por costo reducido")
+    parser.add_argument("instances", nargs="*", default=INSTANCES)
+    parser.add_argument("--solver", help="si se da, mide la aceleración con este solver")
+    parser.add_argument("--formulation", default="mtz_acotado")
+    parser.add_argument("--time-limit", type=float, default=3600)
+    args = parser.parse_args(argv)
+
+    print(f"{'Instancia':<14}{'Nodos':>6}{'LB':>10}{'UB':>10}{'Eliminados':>12}{'%':>8}{'Tiempo (s)':>12}"
+          + (f"{'Completo (s)':>14}{'Reducido (s)':>14}{'Aceleración':>13}" if args.solver else ""))
+    for name in args.instances:
+        C = load_cached(instance_path(name))
+        _, info = eliminate_arcs(C)
+        line = (f"{instance_path(name).name:<14}{len(C):>6}{info['LB']:>10.0f}{info['UB']:>10}"
+                f"{info['Arcos_eliminados']:>12}{info['Porcentaje_eliminado']:>8.1f}{info['Tiempo_s']:>12.3f}")
+        if args.solver:
+            full, reduced = speedup(name, args.formulation, args.solver, args.time_limit)
+            t_full = full["Construccion_s"] + full["Tiempo_s"]
+            t_red = reduced["Reduccion_s"] + reduced["Construccion_s"] + reduced["Tiempo_s"]
+            line += f"{t_full:>14.2f}{t_red:>14.2f}{t_full / t_red if t_red else float('nan'):>12.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Salida de resultados en CSV de solo-agregar: una fila por trabajo terminado,
+con flush + fsync, de modo que una caída a mitad de lote no pierde nada y al
+reiniciar se pueden saltar los trabajos ya registrados. Un CSV existente
+cuyo encabezado no tiene todas las columnas pedidas se rechaza (ValueError)
+en vez de seguir agregando filas sin esas columnas.
+"""
+
+import csv
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_KEY = ("Instancia", "Formulacion", "Solver", "Variante")
+
+
+class ResultsSink:
+
+    def __init__(self, path, columns, key=DEFAULT_KEY, delimiter=","):
+        self.path = Path(path)
+        self.key = tuple(key)
+        self.delimiter = delimiter
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                self.columns = next(csv.reader(f, delimiter=delimiter))
+            # con un encabezado viejo las columnas nuevas se perderían en silencio
+            missing = [c for c in columns if c not in self.columns]
+            if missing:
+                raise ValueError(
+                    f"{self.path} tiene un encabezado anterior, sin las columnas {', '.join(missing)}: "
+                    f"moverlo o renombrarlo para empezar un archivo nuevo (o usar --desde-cero donde exista)")
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.columns = list(columns)
+            with open(self.path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f, delimiter=delimiter).writerow(self.columns)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, row):
+        """Agrega una fila y la fuerza a disco antes de volver."""
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            csv.DictWriter(f, fieldnames=self.columns, delimiter=self.delimiter,
+                           extrasaction="ignore").writerow(row)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def rows(self):
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f, delimiter=self.delimiter))
+
+    def done(self):
+        """Claves de los trabajos ya registrados."""
+        return {self.key_of(r) for r in self.rows()}
+
+    def key_of(self, row):
+        return tuple(str(row.get(k, "")) for k in self.key)
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Lock exclusivo sobre path + ".lock" (fcntl.lockf), entre procesos y entre
+    nodos si el sistema de archivos compartido respeta los locks POSIX (NFS
+    con lockd o v4, Lustre, GPFS). Solo Unix.
+    """
+    import fcntl
+
+    lock = Path(str(path) + ".lock")
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock, "a") as f:
+        fcntl.lockf(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(f, fcntl.LOCK_UN)
+
+
+def merge_row(path, columns, row, key=DEFAULT_KEY):
+    """
+    Agrega la fila al CSV compartido si su clave no está, con file_lock: varios
+    escritores (p. ej. nodos de atsp.workqueue) no duplican ni intercalan
+    filas. Devuelve si la agregó.
+    """
+    with file_lock(path):
+        sink = ResultsSink(path, columns, key=key)
+        if sink.key_of(row) in sink.done():
+            return False
+        sink.append(row)
+        return True
+
+
+def report(path, delimiter=",", columns=None):
+    """Tabla resumen del CSV; pandas se importa solo aquí."""
+    import pandas as pd
+
+    df = pd.read_csv(path, sep=delimiter)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df.to_string(index=False)
@@ -0,0 +1,182 @@
+"""Ejecución de un trabajo: (instancia, formulación, solver) -> fila de resultados."""
+
+import importlib
+import json
+import time
+from pathlib import Path
+
+from atsp import instrument
+from atsp.cache import load_cached
+from atsp.candidates import solve_with_pricing
+from atsp.exact import EXACT_MAX_N, EXACT_TIME_LIMIT, solve_exact
+from atsp.heuristics import best_tour, successors, tour_cost
+from atsp.instances import instance_path
+from atsp.formulations import FORMULATIONS, check_fits
+from atsp.matrices import start_vector
+from atsp.reduction import eliminate_arcs
+from atsp.solution import Solution, extract
+from atsp.telemetry import Telemetry
+
+# highs (scipy.optimize.milp) no necesita licencia: sirve sin red y en CI
+SOLVERS = ("gurobi", "cplex", "highs")
+
+COLUMNS = [
+    "Instancia", "Nodos", "Formulacion", "Solver", "Variante", "Metodo", "Threads", "Parametros",
+    "Variables", "Restricciones", "Heuristica_s", "Heuristica_Obj",
+    "Arcos_eliminados", "Reduccion_s", *instrument.COLUMNS,
+    "Gap_Porcentaje", "Best_Bound", "Funcion_Objetivo", "Nodos_BB",
+    "Cortes_lazy", "Cortes_usuario", "Separacion_s",
+    "Vecinos_k", "Iteraciones_pricing", "Optimo_probado",
+    "Integral_primal", "Integral_dual", "Tour_costo", "Tour_valido", "Tour",
+]
+
+
+def get_backend(solver):
+    """Importa el backend recién cuando se usa (gurobipy/cplex no siempre están)."""
+    return importlib.import_module(f"atsp.backends.{solver}")
+
+
+def variant_name(reduce=False, k=None, profile=None, exact=False, **_):
+    """Etiqueta de la variante de preprocesamiento (parte de la clave del trabajo)."""
+    name = f"k{k}" if k else "reducido" if reduce else "base"
+    if profile:
+        name += "+perfil"
+    # con el camino exacto las filas no miden la formulación ni el solver
+    return f"{name}+exacto" if exact else name
+
+
+def run_job(instance, formulation, solver, time_limit=3600, threads=None, log_output=False,
+            mip_start=True, reduce=False, k=None, telemetry_dir=None, start_tour=None,
+            exchange=None, params=None, profile=None, exact=False):
+    """
+    Lee, compila y resuelve una combinación; devuelve un dict con COLUMNS.
+    Con mip_start el tour de heuristics.best_tour se entrega como solución inicial;
+    con reduce se eliminan antes los arcos de costo reducido mayor que UB - LB y
+    con k el modelo se arma sobre el grafo de k vecinos con pricing de arcos.
+    Con telemetry_dir el progreso del solver se guarda en un .jsonl por trabajo.
+    start_tour reemplaza al de best_tour (el modo carrera lo calcula una vez) y
+    exchange es el race.Exchange donde el solver publica y recibe incumbentes.
+    params son parámetros del solver; profile, un JSON de atsp.tuning del que
+    se toman los de la clase de tamaño de la instancia (params tiene prioridad).
+    Con exact (opcional: la fila ya no compara formulaciones ni solvers, y
+    la variante lleva "+exacto"), si n <= exact.EXACT_MAX_N (y sin reduce, k
+    ni exchange) se resuelve primero sin solver MIP (Held-Karp o
+    branch-and-bound de asignación); si eso no prueba el óptimo en
+    EXACT_TIME_LIMIT segundos su tour pasa a ser el MIP start, su tiempo
+    queda en Heuristica_s y Metodo dice "<método>+mip".
+    Antes de compilar se verifica con el tamaño declarado de la formulación
+    que el modelo quepa en memoria (formulations.ModelTooLarge si no).
+    """
+    phases = instrument.Phases()
+    with phases.phase("Lectura_s"):
+        C = load_cached(instance_path(instance))
+
+    if profile is not None:
+        from atsp.tuning import load_profile
+        params = {**load_profile(profile, solver, len(C)), **(params or {})}
+
+    name = instance_path(instance).name
+    variant = variant_name(reduce=reduce, k=k, profile=profile, exact=exact)
+    tour, heur_obj, heur_time = None, None, 0.0
+    method = None
+    if exact and len(C) <= EXACT_MAX_N and not (reduce or k) and exchange is None:
+        res = solve_exact(C, time_limit=min(time_limit, EXACT_TIME_LIMIT), tour=start_tour)
+        if res.optimal:
+            phases.add("Construccion_s", 0.0)
+            phases.add("Tiempo_s", res.seconds)
+            phases.split = False
+            return {
+                **dict.fromkeys(COLUMNS),
+                "Instancia": name, "Nodos": len(C), "Formulacion": formulation, "Solver": solver,
+                "Variante": variant, "Metodo": res.method, "Threads": threads,
+                "Heuristica_s": 0.0, "Arcos_eliminados": 0, "Reduccion_s": 0.0,
+                **phases.as_row(),
+                "Gap_Porcentaje": 0.0, "Best_Bound": res.lower_bound, "Funcion_Objetivo": res.cost,
+                "Nodos_BB": res.nodes,
+                **Solution(successors(res.tour), res.tour, res.cost, True).as_row(),
+            }
+        # sin prueba de optimalidad: el tour hace de heurística inicial
+        start_tour, heur_time = res.tour, res.seconds
+        method = f"{res.method}+mip"
+    if start_tour is not None:
+        tour, heur_obj = start_tour, tour_cost(C, start_tour)
+    elif mip_start or reduce or k:
+        t0 = time.perf_counter()
+        tour, heur_obj = best_tour(C)
+        heur_time = time.perf_counter() - t0
+
+    arcs, info = None, {"Arcos_eliminados": 0, "Tiempo_s": 0.0}
+    if reduce:
+        arcs, info = eliminate_arcs(C, upper_bound=heur_obj, tour=tour)
+
+    backend = get_backend(solver)
+    compile_fn = FORMULATIONS[formulation]
+    last = {}
+
+    def timed_compile(C, arcs=None):
+        check_fits(formulation, len(C), arcs)
+        with phases.phase("Construccion_s"):
+            last["cm"] = compile_fn(C, arcs=arcs)
+        return last["cm"]
+
+    telemetry = None
+    if telemetry_dir is not None:
+        Path(telemetry_dir).mkdir(parents=True, exist_ok=True)
+        telemetry = Telemetry(
+            Path(telemetry_dir) / f"{Path(name).stem}_{formulation}_{solver}_{variant}.jsonl",
+            tags={"instancia": name, "formulacion": formulation, "solver": solver})
+
+    def solve_fn(cm, time_limit, start=None):
+        separator = compile_fn.separator(cm) if compile_fn.separator else None
+        return backend.solve(cm, time_limit=time_limit, threads=threads, log_output=log_output,
+                             start=start, separator=separator, telemetry=telemetry,
+                             phases=phases, exchange=exchange, params=params)
+
+    pricing = {}
+    if k:
+        stats, pricing = solve_with_pricing(C, timed_compile, solve_fn, k=k, tour=tour,
+                                            time_limit=time_limit,
+                                            start_fn=start_vector if mip_start else None)
+    else:
+        cm = timed_compile(C, arcs=arcs)
+        stats = solve_fn(cm, time_limit, start=start_vector(cm, tour) if mip_start else None)
+    cm = last["cm"]
+    tour_cols = {}
+    if stats.get("x") is not None:
+        with phases.phase("Extraccion_s"):
+            solution = extract(C, cm.tail, cm.head, stats["x"], objective=stats["objetivo"])
+        tour_cols = solution.as_row()
+        if solution.message:
+            print(f"{instance} {formulation} {solver}: {solution.message}")
+    integrals = telemetry.integrals() if telemetry is not None else {}
+
+    return {
+        "Instancia": name,
+        "Nodos": cm.n,
+        "Formulacion": formulation,
+        "Solver": solver,
+        "Variante": variant,
+        "Metodo": method,
+        "Threads": threads,
+        "Parametros": json.dumps(params, sort_keys=True) if params else None,
+        "Variables": cm.num_vars,
+        "Restricciones": cm.num_constrs,
+        "Heuristica_s": round(heur_time, 4),
+        "Heuristica_Obj": heur_obj,
+        "Arcos_eliminados": info["Arcos_eliminados"],
+        "Reduccion_s": round(info["Tiempo_s"], 4),
+        **phases.as_row(),
+        "Gap_Porcentaje": round(stats["gap"], 4),
+        "Best_Bound": stats["best_bound"],
+        "Funcion_Objetivo": stats["objetivo"],
+        "Nodos_BB": stats["nodos_bb"],
+        "Cortes_lazy": stats.get("cortes_lazy"),
+        "Cortes_usuario": stats.get("cortes_usuario"),
+        "Separacion_s": round(stats["separacion"], 4) if "separacion" in stats else None,
+        "Vecinos_k": k,
+        "Iteraciones_pricing": pricing.get("Iteraciones_pricing"),
+        "Optimo_probado": pricing.get("Optimo_probado"),
+        "Integral_primal": integrals.get("integral_primal"),
+        "Integral_dual": integrals.get("integral_dual"),
+        **tour_cols,
+    }
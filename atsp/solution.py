@@ -0,0 +1,82 @@
+"""
+De los valores de x que entrega el solver (un arreglo, leído de una sola vez
+con backends.*.x_values) al tour: sucesores, secuencia, factibilidad y costo
+recalculado contra la matriz.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from atsp.heuristics import tour_cost, tour_from_successors
+
+# gap (%) desde el cual una resolución se da por óptima (MIPGap por defecto de
+# Gurobi y CPLEX: 1e-4 relativo)
+OPTIMAL_GAP = 0.01
+
+
+@dataclass
+class Solution:
+    succ: np.ndarray        # succ[i] = nodo siguiente a i (-1 si i no tiene arco de salida)
+    tour: np.ndarray        # secuencia desde el nodo 0
+    cost: float             # costo del tour según la matriz (None si no es factible)
+    feasible: bool
+    message: str = ""       # motivo si no es factible o si el costo no cuadra
+
+    def as_row(self):
+        """Columnas Tour, Tour_costo y Tour_valido de los CSV de resultados."""
+        return {
+            "Tour": format_tour(self.tour) if self.feasible else None,
+            "Tour_costo": self.cost,
+            "Tour_valido": self.feasible and not self.message,
+        }
+
+
+def format_tour(tour):
+    """Tour como texto (nodos separados por espacio), para guardarlo en un CSV."""
+    return " ".join(map(str, np.asarray(tour).tolist()))
+
+
+def parse_tour(text):
+    return np.array(text.split(), dtype=int)
+
+
+def successors_from_x(n, tail, head, xval, threshold=0.5):
+    """
+    Sucesores a partir de los valores x de los arcos tail[k] -> head[k] (para
+    un CompiledModel, cm.tail y cm.head). Devuelve (succ, message) con message
+    vacío si cada nodo tiene exactamente un arco de salida y uno de entrada.
+    """
+    sel = np.asarray(xval) > threshold
+    tail, head = np.asarray(tail)[sel], np.asarray(head)[sel]
+    succ = np.full(n, -1, dtype=np.int64)
+    succ[tail] = head
+    out_deg = np.bincount(tail, minlength=n)
+    in_deg = np.bincount(head, minlength=n)
+    bad = np.flatnonzero((out_deg != 1) | (in_deg != 1))
+    if bad.size:
+        return succ, f"grado distinto de 1 en {bad.size} nodos (p. ej. {bad[0]})"
+    if np.any(tail == head):
+        return succ, f"arco i -> i seleccionado en el nodo {tail[tail == head][0]}"
+    return succ, ""
+
+
+def extract(C, tail, head, xval, objective=None, rtol=1e-6):
+    """
+    Solution a partir de los valores x de los arcos tail -> head (los de
+    backends.*.x_values van con cm.tail y cm.head): sucesores, tour desde 0 (O(n)),
+    chequeo de que es un único circuito hamiltoniano y costo recalculado con C.
+    Si se entrega objective (el del solver) y no coincide con el costo
+    recalculado, el tour queda marcado en message aunque sea factible.
+    """
+    n = len(C)
+    succ, message = successors_from_x(n, tail, head, xval)
+    if message:
+        return Solution(succ, np.array([0]), None, False, message)
+    tour = tour_from_successors(succ)
+    if tour.size != n:
+        return Solution(succ, tour, None, False, f"subtour de {tour.size} nodos desde 0 (n = {n})")
+    cost = tour_cost(C, tour)
+    if objective is not None and abs(cost - objective) > rtol * max(1.0, abs(cost)):
+        message = f"costo recalculado {cost} distinto del objetivo {objective}"
+    return Solution(succ, tour, cost, True, message)
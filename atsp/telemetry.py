@@ -0,0 +1,105 @@
+"""
+Serie de tiempo del progreso del solver (incumbente, cota, gap, nodos) tomada
+desde callbacks, sin un thread que despierte periódicamente.
+
+Cada evento es una línea JSON: {"t", "incumbente", "cota", "gap", "nodos", "abiertos"}.
+Con la serie se calculan las integrales primal y dual (Berthold) del run.
+"""
+
+import json
+import math
+import threading
+import time
+
+
+class Telemetry:
+    """
+    Acumula eventos y los escribe en JSONL. Solo se registra un evento cuando
+    cambia el incumbente o la cota, o cuando pasó min_interval segundos desde el
+    anterior, para que la serie sea compacta.
+    """
+
+    def __init__(self, path=None, min_interval=1.0, echo=False, tags=None):
+        self.path = path
+        self.tags = tags or {}
+        self.min_interval = min_interval
+        self.echo = echo
+        self.events = []
+        self._written = 0
+        self._last = (None, None, -math.inf)
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._t0 = time.perf_counter()
+
+    def record(self, incumbent, bound, nodes=None, open_nodes=None, t=None):
+        t = time.perf_counter() - self._t0 if t is None else t
+        incumbent = None if incumbent is None or abs(incumbent) >= 1e99 else float(incumbent)
+        bound = None if bound is None or abs(bound) >= 1e99 else float(bound)
+        with self._lock:
+            last_inc, last_bound, last_t = self._last
+            if incumbent == last_inc and bound == last_bound and t - last_t < self.min_interval:
+                return
+            self._last = (incumbent, bound, t)
+            event = {"t": round(t, 4), "incumbente": incumbent, "cota": bound,
+                     "gap": relative_gap(incumbent, bound), "nodos": nodes, "abiertos": open_nodes}
+            self.events.append(event)
+        if self.echo:
+            print(f"\r⏳ {t:8.1f} s  inc={incumbent}  cota={bound}  nodos={nodes}", end="", flush=True)
+
+    def close(self):
+        """Escribe los eventos nuevos (se puede llamar una vez por resolución)."""
+        if self.echo:
+            print()
+        if self.path is not None:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for event in self.events[self._written:]:
+                    f.write(json.dumps({**self.tags, **event}) + "\n")
+        self._written = len(self.events)
+
+    def integrals(self, optimum=None, horizon=None):
+        return primal_dual_integrals(self.events, optimum, horizon)
+
+
+def relative_gap(incumbent, bound):
+    if incumbent is None or bound is None:
+        return 1.0
+    if incumbent == bound:
+        return 0.0
+    if incumbent * bound < 0:
+        return 1.0
+    return abs(incumbent - bound) / max(abs(incumbent), abs(bound))
+
+
+def primal_dual_integrals(events, optimum=None, horizon=None):
+    """
+    Integrales primal, dual y primal-dual sobre [0, horizon] de funciones
+    escalonadas del gap (1 mientras no hay incumbente/cota). Sin optimum se usa
+    el mejor incumbente (o cota) final como referencia.
+    """
+    if not events:
+        return {"integral_primal": None, "integral_dual": None, "integral_primal_dual": None}
+    if optimum is None:
+        optimum = events[-1]["incumbente"] if events[-1]["incumbente"] is not None else events[-1]["cota"]
+    horizon = events[-1]["t"] if horizon is None else horizon
+
+    totals = {"integral_primal": 0.0, "integral_dual": 0.0, "integral_primal_dual": 0.0}
+    prev_t, prev = 0.0, (1.0, 1.0, 1.0)
+    for event in events + [{"t": horizon}]:
+        dt = min(event["t"], horizon) - prev_t
+        if dt > 0:
+            totals["integral_primal"] += prev[0] * dt
+            totals["integral_dual"] += prev[1] * dt
+            totals["integral_primal_dual"] += prev[2] * dt
+        prev_t = max(prev_t, min(event["t"], horizon))
+        if "incumbente" in event:
+            prev = (relative_gap(event["incumbente"], optimum),
+                    relative_gap(optimum, event["cota"]),
+                    event["gap"])
+    return totals
+
+
+def read_log(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,151 @@
+"""Lector único de instancias TSPLIB (ATSP) a matrices NumPy."""
+
+import bz2
+import gzip
+import re
+from pathlib import Path
+
+import numpy as np
+
+# Formatos triangulares: las variantes *_COL recorren el triángulo opuesto en el
+# mismo orden que las *_ROW, así que basta con mapearlas a (triángulo, diagonal).
+_TRIANGULAR = {
+    "UPPER_ROW": ("upper", False),
+    "LOWER_ROW": ("lower", False),
+    "UPPER_DIAG_ROW": ("upper", True),
+    "LOWER_DIAG_ROW": ("lower", True),
+    "UPPER_COL": ("lower", False),
+    "LOWER_COL": ("upper", False),
+    "UPPER_DIAG_COL": ("lower", True),
+    "LOWER_DIAG_COL": ("upper", True),
+}
+
+_FIN_SECCION = re.compile(rb"[A-Za-z]")
+
+
+def _open(path):
+    """Abre el archivo en binario, descomprimiendo .gz/.bz2 según la extensión."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def _tokens(body, path):
+    """
+    Convierte el bloque numérico completo a un arreglo int64 de una pasada. Si
+    numpy no puede, se recorre token a token: los decimales enteros (10.0) se
+    aceptan y el primer valor no entero se informa con su posición.
+    """
+    corte = _FIN_SECCION.search(body)
+    if corte is not None:
+        body = body[:corte.start()]
+    text = body.decode("ascii", errors="replace")
+    try:
+        return np.fromstring(text, dtype=np.int64, sep=" ")
+    except ValueError:
+        pass
+    values = []
+    for pos, tok in enumerate(text.split(), 1):
+        try:
+            values.append(int(tok))
+            continue
+        except ValueError:
+            pass
+        try:
+            x = float(tok)
+        except ValueError:
+            x = None
+        if x is None or not x.is_integer():
+            raise ValueError(f"{path}: peso inválido {tok!r} (valor {pos} de la matriz); "
+                             f"el lector solo acepta costos enteros") from None
+        values.append(int(x))
+    return np.array(values, dtype=np.int64)
+
+
+def _smallest_int(matrix):
+    """Baja a int32 si los valores caben (la mitad de memoria para rbg403)."""
+    info = np.iinfo(np.int32)
+    if matrix.size == 0 or (matrix.min() >= info.min and matrix.max() <= info.max):
+        return matrix.astype(np.int32)
+    return matrix
+
+
+def _expand(values, n, fmt):
+    """Arma la matriz n x n a partir de los valores de EDGE_WEIGHT_SECTION."""
+    if fmt == "FULL_MATRIX":
+        if values.size < n * n:
+            raise ValueError(f"No hay suficientes datos de matriz (esperado {n*n}, recibido {values.size})")
+        return values[:n * n].reshape(n, n)
+
+    if fmt not in _TRIANGULAR:
+        raise ValueError(f"EDGE_WEIGHT_FORMAT no soportado: {fmt}")
+
+    triangulo, diagonal = _TRIANGULAR[fmt]
+    k = 0 if diagonal else 1
+    if triangulo == "upper":
+        rows, cols = np.triu_indices(n, k)
+    else:
+        rows, cols = np.tril_indices(n, -k)
+    if values.size < rows.size:
+        raise ValueError(f"No hay suficientes datos de matriz (esperado {rows.size}, recibido {values.size})")
+
+    matrix = np.zeros((n, n), dtype=np.int64)
+    matrix[rows, cols] = values[:rows.size]
+    matrix[cols, rows] = values[:rows.size]
+    return matrix
+
+
+def read_tsplib(path):
+    """
+    Lee un archivo TSPLIB y devuelve (header, matriz).
+
+    header es un dict con las claves de la cabecera (NAME, DIMENSION, ...) y la
+    matriz un ndarray C-contiguo int32/int64 de n x n. Acepta archivos .gz/.bz2 y
+    matrices "simples" sin cabecera (solo números, n*n valores).
+    """
+    header = {}
+    with _open(path) as f:
+        body = b""
+        for raw in f:
+            line = raw.strip()
+            if not line:
+                continue
+            if line.startswith(b"EDGE_WEIGHT_SECTION"):
+                break
+            if line[:1].isdigit() or line[:1] == b"-":
+                # matriz sin cabecera: esta línea ya es parte de los datos
+                body = raw
+                break
+            if line.startswith(b"EOF"):
+                break
+            key, _, value = line.decode("utf-8", errors="ignore").partition(":")
+            if not _:
+                key, _, value = key.partition(" ")
+            header[key.strip().upper()] = value.strip()
+        body += f.read()
+
+    values = _tokens(body, path)
+
+    if "DIMENSION" in header:
+        n = int(header["DIMENSION"])
+    else:
+        n = int(round(values.size ** 0.5))
+        if n * n != values.size:
+            raise ValueError(f"No se pudo interpretar {path}")
+        header["DIMENSION"] = str(n)
+
+    weight_type = header.get("EDGE_WEIGHT_TYPE", "EXPLICIT").upper()
+    if weight_type != "EXPLICIT":
+        raise ValueError(f"EDGE_WEIGHT_TYPE no soportado: {weight_type}")
+
+    fmt = header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX").upper()
+    matrix = _smallest_int(_expand(values, n, fmt))
+    return header, np.ascontiguousarray(matrix)
+
+
+def load_atsp(path):
+    """Devuelve solo la matriz de costos de una instancia TSPLIB."""
+    return read_tsplib(path)[1]
@@ -0,0 +1,265 @@
+"""
+Ajuste de parámetros de Gurobi y CPLEX por clase de tamaño (Pequeños,
+Medianos, Grandes, como en GG_Gurobi/GG.py) con successive halving.
+
+Para cada solver y clase se toman configuraciones al azar del espacio de
+PARAM_SPACES (más la de parámetros por defecto), se corren todas sobre las
+instancias de la clase con un time limit corto y se queda la mejor 1/eta
+parte; las que siguen se corren con eta veces más tiempo, hasta que queda una
+o el tiempo supera --tiempo-max. El puntaje es el PAR2 medio: el tiempo si
+la corrida probó el óptimo, 2 x time limit (más el gap) si no.
+
+Cada ensayo se guarda en un CSV de solo-agregar con clave (hash de la
+instancia, solver, formulación, parámetros, time limit), así que una
+corrida interrumpida retoma sin repetir nada. El resultado es un JSON
+{solver: {clase: parámetros}} que runner.run_job(profile=...) y
+`python -m atsp.batch --perfil` cargan.
+
+Uso:
+    python -m atsp.tuning [--solvers gurobi cplex] [--formulation mtz_acotado]
+                          [--configuraciones 27] [--eta 3] [--tiempo-inicial 10] [--tiempo-max 270]
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from atsp.batch import THREADS_BY_CLASS, run_batch
+from atsp.cache import file_digest, load_cached
+from atsp.instances import INSTANCES, RESULTS_DIR, instance_path, size_class
+from atsp.results import ResultsSink
+from atsp.runner import FORMULATIONS, SOLVERS
+from atsp.solution import OPTIMAL_GAP
+
+TUNING_DIR = RESULTS_DIR / "tuning"
+CLASSES = ("Pequeños", "Medianos", "Grandes")
+
+# Espacio de búsqueda por solver: foco/énfasis, cortes, presolve,
+# heurísticas, simetría y threads. En CPLEX no hay un nivel global de cortes:
+# se ajustan las familias que más aportan en ATSP (Gomory y MIR).
+PARAM_SPACES = {
+    "gurobi": {
+        "MIPFocus": [0, 1, 2, 3],
+        "Cuts": [-1, 0, 1, 2, 3],
+        "Presolve": [-1, 0, 1, 2],
+        "Heuristics": [0.0, 0.05, 0.2, 0.5],
+        "Symmetry": [-1, 0, 2],
+        "Threads": [1, 2, 4, 8],
+    },
+    "cplex": {
+        "emphasis.mip": [0, 1, 2, 3, 4],
+        "mip.cuts.gomory": [-1, 0, 1, 2],
+        "mip.cuts.mircut": [-1, 0, 1, 2],
+        "preprocessing.presolve": [0, 1],
+        "mip.strategy.heuristicfreq": [-1, 0, 5, 20],
+        "preprocessing.symmetry": [-1, 0, 1, 5],
+        "threads": [1, 2, 4, 8],
+    },
+    # sin licencia, para probar el ajuste sin Gurobi ni CPLEX
+    "highs": {
+        "presolve": [True, False],
+    },
+}
+
+THREAD_PARAM = {"gurobi": "Threads", "cplex": "threads"}
+
+# penalización PAR de las corridas que no prueban el óptimo
+PAR = 2
+
+COLUMNS = [
+    "Hash", "Instancia", "Clase", "Solver", "Formulacion", "Parametros", "Time_limit",
+    "Tiempo_s", "Gap_Porcentaje", "Funcion_Objetivo", "Resuelto",
+]
+KEY = ("Hash", "Solver", "Formulacion", "Parametros", "Time_limit")
+
+
+def params_key(params):
+    """Texto canónico de un conjunto de parámetros (clave del caché y del perfil)."""
+    return json.dumps(params, sort_keys=True)
+
+
+def load_profile(path, solver, n):
+    """Parámetros del perfil para el solver y la clase de tamaño de n ({} si no hay)."""
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+    return dict(profile.get(solver, {}).get(size_class(n), {}))
+
+
+def sample_configs(solver, count, cores, seed=0):
+    """
+    count configuraciones distintas del espacio del solver, la primera con los
+    parámetros por defecto ({}); los threads no pasan de cores.
+    """
+    space = {name: [v for v in values if name != THREAD_PARAM.get(solver) or v <= cores]
+             for name, values in PARAM_SPACES[solver].items()}
+    total = int(np.prod([len(v) for v in space.values()]))
+    rng = np.random.default_rng(seed)
+    configs, seen = [{}], {params_key({})}
+    while len(configs) < min(count, total + 1):
+        params = {name: values[rng.integers(len(values))] for name, values in space.items()}
+        if params_key(params) not in seen:
+            seen.add(params_key(params))
+            configs.append(params)
+    return configs
+
+
+class TrialStore:
+    """
+    Ensayos ya corridos (un ResultsSink con clave KEY), para retomar. Un
+    ensayo resuelto con un time limit vale para cualquier time limit mayor.
+    """
+
+    def __init__(self, path):
+        self.sink = ResultsSink(path, COLUMNS, key=KEY)
+        self.trials, self.solved = {}, {}
+        for row in self.sink.rows():
+            self._index(row)
+
+    def _index(self, row):
+        key = self.sink.key_of(row)
+        self.trials[key] = row
+        if _solved(row):
+            self.solved[key[:-1]] = row
+
+    def key(self, digest, solver, formulation, params, time_limit):
+        return self.sink.key_of({"Hash": digest, "Solver": solver, "Formulacion": formulation,
+                                 "Parametros": params_key(params), "Time_limit": float(time_limit)})
+
+    def get(self, digest, solver, formulation, params, time_limit):
+        key = self.key(digest, solver, formulation, params, time_limit)
+        if key in self.trials:
+            return self.trials[key]
+        row = self.solved.get(key[:-1])
+        return row if row is not None and float(row["Tiempo_s"]) < time_limit else None
+
+    def add(self, row):
+        self.sink.append(row)
+        # mismo formato que al releer el CSV
+        self._index({k: "" if v is None else str(v) for k, v in row.items()})
+
+
+def _solved(row):
+    return row is not None and str(row["Resuelto"]) == "True"
+
+
+def score(trials, time_limit):
+    """PAR2 medio de los ensayos (None = ensayo que falló)."""
+    total = 0.0
+    for row in trials:
+        if _solved(row):
+            total += float(row["Tiempo_s"])
+        else:
+            gap = float(row["Gap_Porcentaje"]) if row is not None and row["Gap_Porcentaje"] else 100.0
+            total += PAR * time_limit + time_limit * gap / 100
+    return total / max(len(trials), 1)
+
+
+def run_trials(store, instances, solver, formulation, configs, time_limit, cores, threads):
+    """
+    Corre en el pool de atsp.batch los ensayos (configuración, instancia) que
+    no estén en store y devuelve {params_key: [fila por instancia]}.
+    """
+    digests = {instance_path(i).name: file_digest(instance_path(i)) for i in instances}
+    jobs = []
+    for params in configs:
+        for inst in instances:
+            if store.get(digests[instance_path(inst).name], solver, formulation, params, time_limit):
+                continue
+            jobs.append({"instance": inst, "formulation": formulation, "solver": solver,
+                         "threads": min(cores, params.get(THREAD_PARAM.get(solver), threads)),
+                         "params": params})
+
+    def on_result(row):
+        params = json.loads(row["Parametros"]) if row["Parametros"] else {}
+        store.add({
+            "Hash": digests[row["Instancia"]], "Instancia": row["Instancia"],
+            "Clase": size_class(row["Nodos"]), "Solver": solver, "Formulacion": formulation,
+            "Parametros": params_key(params), "Time_limit": float(time_limit),
+            "Tiempo_s": row["Tiempo_s"], "Gap_Porcentaje": row["Gap_Porcentaje"],
+            "Funcion_Objetivo": row["Funcion_Objetivo"],
+            "Resuelto": (row["Funcion_Objetivo"] is not None and row["Gap_Porcentaje"] <= OPTIMAL_GAP
+                         and row["Tiempo_s"] < time_limit),
+        })
+
+    if jobs:
+        run_batch(jobs, cores, time_limit=time_limit, on_result=on_result)
+    return {params_key(p): [store.get(digests[instance_path(i).name], solver, formulation, p, time_limit)
+                            for i in instances]
+            for p in configs}
+
+
+def successive_halving(store, instances, solver, formulation, configs, time_limit=10.0, eta=3,
+                       max_time=270.0, cores=None, threads=1, log=print):
+    """
+    Successive halving sobre configs. Devuelve (mejor configuración,
+    [(time limit, [(puntaje, configuración)] ordenada)] por ronda).
+    """
+    cores = cores or os.cpu_count()
+    survivors, rounds = list(configs), []
+    time_limit = float(time_limit)
+    while True:
+        trials = run_trials(store, instances, solver, formulation, survivors, time_limit, cores, threads)
+        ranked = sorted(((score(trials[params_key(p)], time_limit), p) for p in survivors),
+                        key=lambda sp: sp[0])
+        rounds.append((time_limit, ranked))
+        log(f"   {time_limit:>7.1f} s  {len(survivors):>3} configuraciones  "
+            f"mejor PAR{PAR} {ranked[0][0]:.2f}: {params_key(ranked[0][1])}")
+        keep = len(survivors) // eta
+        if keep <= 1 or time_limit * eta > max_time:
+            return ranked[0][1], rounds
+        survivors = [p for _, p in ranked[:keep]]
+        time_limit *= eta
+
+
+def write_profile(path, solver, size_class_name, params):
+    """Agrega (o reemplaza) los parámetros de una clase en el JSON del perfil."""
+    path = Path(path)
+    profile = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    profile.setdefault(solver, {})[size_class_name] = params
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(profile, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ajuste de parámetros por clase de tamaño")
+    parser.add_argument("--instances", nargs="+", default=INSTANCES)
+    parser.add_argument("--solvers", nargs="+", default=["gurobi", "cplex"], choices=list(SOLVERS))
+    parser.add_argument("--formulation", default="mtz_acotado", choices=list(FORMULATIONS))
+    parser.add_argument("--clases", nargs="+", default=list(CLASSES), choices=CLASSES)
+    parser.add_argument("--configuraciones", type=int, default=27, help="configuraciones iniciales")
+    parser.add_argument("--eta", type=int, default=3, help="se queda 1/eta de las configuraciones por ronda")
+    parser.add_argument("--tiempo-inicial", type=float, default=10.0, help="time limit de la primera ronda")
+    parser.add_argument("--tiempo-max", type=float, default=270.0, help="time limit máximo de una ronda")
+    parser.add_argument("--cores", type=int, default=os.cpu_count())
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--ensayos", default=str(TUNING_DIR / "ensayos.csv"), help="caché de ensayos")
+    parser.add_argument("--perfil", default=str(TUNING_DIR / "perfil.json"))
+    args = parser.parse_args(argv)
+
+    store = TrialStore(args.ensayos)
+    by_class = {}
+    for inst in args.instances:
+        by_class.setdefault(size_class(load_cached(instance_path(inst)).shape[0]), []).append(inst)
+
+    for solver in args.solvers:
+        for cls in args.clases:
+            if not by_class.get(cls):
+                continue
+            print(f"{solver} / {cls}: {len(by_class[cls])} instancias")
+            configs = sample_configs(solver, args.configuraciones, args.cores, seed=args.semilla)
+            best, _ = successive_halving(store, by_class[cls], solver, args.formulation, configs,
+                                         time_limit=args.tiempo_inicial, eta=args.eta,
+                                         max_time=args.tiempo_max, cores=args.cores,
+                                         threads=THREADS_BY_CLASS[cls])
+            write_profile(args.perfil, solver, cls, best)
+            print(f"   perfil: {params_key(best)}")
+    print("Perfil en:", args.perfil)
+
+
+if __name__ == "__main__":
+    main()
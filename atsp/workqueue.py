@@ -0,0 +1,353 @@
+"""
+Modo distribuido del lote: los trabajos de atsp.batch quedan en una cola
+SQLite en un sistema de archivos compartido y cada nodo corre un trabajador
+que los toma con un lease (plazo renovable).
+
+  encolar    agrega los trabajos (instancia x formulación x solver) que no
+             estén ya en la cola ni en --salida.
+  trabajar   toma trabajos mientras le queden núcleos libres, los corre en
+             el pool de atsp.batch y renueva los leases cada --latido
+             segundos. Si un nodo muere sus leases vencen y el trabajo
+             vuelve a quedar pendiente (hasta MAX_ATTEMPTS intentos). Cada
+             fila se agrega a --salida con results.merge_row (lock de
+             archivo, sin duplicar claves aunque un trabajo vencido se
+             termine dos veces).
+  estado     trabajos por estado.
+  demo       cola y resultados en un directorio temporal, con varios
+             trabajadores locales y uno que se mata a mitad de camino.
+
+Los plazos usan la hora de cada nodo: los relojes deben estar sincronizados
+con un margen bastante menor que --lease. SQLite se usa con el journal por
+defecto (WAL necesita memoria compartida, que no existe entre nodos) y
+depende de que el sistema de archivos respete los locks POSIX.
+
+Uso:
+    python -m atsp.workqueue encolar --cola /compartido/cola.sqlite [--instances ...]
+                             [--formulations ...] [--solvers ...] [--time-limit 3600]
+    python -m atsp.workqueue trabajar --cola /compartido/cola.sqlite
+                             --salida /compartido/resultados.csv [--cores 16]
+    python -m atsp.workqueue estado --cola /compartido/cola.sqlite
+    python -m atsp.workqueue demo [--trabajadores 3]
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from functools import partial
+from pathlib import Path
+
+from atsp.batch import DEFAULT_FORMULATIONS, DEFAULT_SOLVERS, make_jobs, pending_jobs, worker_pool
+from atsp.instances import INSTANCES, instance_path
+from atsp.results import DEFAULT_KEY, ResultsSink, file_lock, merge_row
+from atsp.runner import COLUMNS, FORMULATIONS, SOLVERS, run_job, variant_name
+
+# intentos por trabajo (leases vencidos o errores) antes de marcarlo fallido
+MAX_ATTEMPTS = 3
+
+STATES = ("pendiente", "tomado", "hecho", "fallido")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id INTEGER PRIMARY KEY,
+    clave TEXT UNIQUE NOT NULL,
+    trabajo TEXT NOT NULL,
+    threads INTEGER NOT NULL,
+    costo INTEGER NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    trabajador TEXT,
+    lease_hasta REAL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    actualizado REAL
+)
+"""
+
+
+class WorkQueue:
+    """
+    Cola de trabajos en SQLite. Cada operación es una transacción corta con
+    BEGIN IMMEDIATE, así que varios trabajadores (procesos o nodos) la
+    comparten sin coordinarse de otra forma.
+    """
+
+    def __init__(self, path, timeout=60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+        self.db.execute(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _transaction(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def add(self, jobs, **job_kwargs):
+        """Encola los trabajos de batch.make_jobs; los que ya están se ignoran. Devuelve cuántos entraron."""
+        variant = variant_name(**job_kwargs)
+        rows = []
+        for job in jobs:
+            args = {k: v for k, v in job.items() if not k.startswith("_")}
+            key = [instance_path(job["instance"]).name, job["formulation"], job["solver"], variant]
+            rows.append((json.dumps(key), json.dumps({**args, **job_kwargs}), job["threads"], job["_cost"]))
+        db = self._transaction()
+        try:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO trabajos (clave, trabajo, threads, costo) VALUES (?, ?, ?, ?)",
+                           rows)
+            added = db.total_changes - before
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return added
+
+    def _requeue_expired(self, db, now):
+        db.execute("UPDATE trabajos SET estado = 'fallido', error = 'lease vencido', actualizado = ? "
+                   "WHERE estado = 'tomado' AND lease_hasta < ? AND intentos >= ?", (now, now, MAX_ATTEMPTS))
+        db.execute("UPDATE trabajos SET estado = 'pendiente', trabajador = NULL, actualizado = ? "
+                   "WHERE estado = 'tomado' AND lease_hasta < ?", (now, now))
+
+    def claim(self, worker, free, lease, idle=False):
+        """
+        Toma el pendiente más costoso que quepa en `free` threads (con idle,
+        cualquiera) y lo deja a nombre de worker por `lease` segundos.
+        Antes devuelve a la cola los leases vencidos. (id, trabajo) o None.
+        """
+        now = time.time()
+        db = self._transaction()
+        try:
+            self._requeue_expired(db, now)
+            found = db.execute("SELECT id, trabajo FROM trabajos WHERE estado = 'pendiente' "
+                               "AND (threads <= ? OR ?) ORDER BY costo DESC, id LIMIT 1",
+                               (free, idle)).fetchone()
+            if found is not None:
+                db.execute("UPDATE trabajos SET estado = 'tomado', trabajador = ?, lease_hasta = ?, "
+                           "intentos = intentos + 1, actualizado = ? WHERE id = ?",
+                           (worker, now + lease, now, found[0]))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return (found[0], json.loads(found[1])) if found is not None else None
+
+    def heartbeat(self, ids, worker, lease):
+        """Renueva los leases de worker; devuelve los ids que ya no le pertenecen."""
+        now = time.time()
+        lost = []
+        db = self._transaction()
+        try:
+            for job_id in ids:
+                cur = db.execute("UPDATE trabajos SET lease_hasta = ?, actualizado = ? "
+                                 "WHERE id = ? AND trabajador = ? AND estado = 'tomado'",
+                                 (now + lease, now, job_id, worker))
+                if cur.rowcount == 0:
+                    lost.append(job_id)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return lost
+
+    def complete(self, job_id):
+        # aunque el lease haya vencido: la fila ya está en los resultados
+        self.db.execute("UPDATE trabajos SET estado = 'hecho', error = NULL, actualizado = ? WHERE id = ?",
+                        (time.time(), job_id))
+
+    def fail(self, job_id, worker, error):
+        """Devuelve el trabajo a la cola, o lo marca fallido si agotó sus intentos."""
+        self.db.execute("UPDATE trabajos SET estado = CASE WHEN intentos >= ? THEN 'fallido' ELSE 'pendiente' END, "
+                        "trabajador = NULL, error = ?, actualizado = ? "
+                        "WHERE id = ? AND trabajador = ? AND estado = 'tomado'",
+                        (MAX_ATTEMPTS, error, time.time(), job_id, worker))
+
+    def counts(self):
+        """{estado: cantidad} (vencidos todavía cuentan como tomados)."""
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.db.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado").fetchall())
+        return counts
+
+    def rows(self):
+        cur = self.db.execute("SELECT clave, estado, trabajador, intentos, error FROM trabajos ORDER BY id")
+        return [{"clave": json.loads(c), "estado": e, "trabajador": w, "intentos": i, "error": err}
+                for c, e, w, i, err in cur]
+
+
+def work(queue_path, results_path, cores, worker=None, lease=300.0, heartbeat=30.0, poll=5.0, log=print):
+    """
+    Trabajador: toma trabajos de la cola hasta que no quedan pendientes ni
+    tomados (por nadie) y agrega cada fila a results_path. Devuelve cuántos
+    trabajos terminó.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    # un encabezado incompatible en results_path falla acá y no después de resolver
+    with file_lock(results_path):
+        ResultsSink(results_path, COLUMNS)
+    queue = WorkQueue(queue_path)
+    running, free, finished = {}, cores, 0
+    last_beat = time.monotonic()
+    try:
+        with worker_pool(cores) as pool:
+            while True:
+                while free > 0:
+                    claimed = queue.claim(worker, free, lease, idle=not running)
+                    if claimed is None:
+                        break
+                    job_id, job = claimed
+                    job["threads"] = min(job["threads"], cores)
+                    free -= job["threads"]
+                    running[pool.submit(run_job, **job)] = (job_id, job)
+                    log(f"[{worker}] toma {instance_path(job['instance']).name} "
+                        f"{job['formulation']} {job['solver']} ({job['threads']} threads)")
+
+                if not running:
+                    counts = queue.counts()
+                    if counts["pendiente"] == 0 and counts["tomado"] == 0:
+                        return finished
+                    # quedan trabajos de otros: se espera a que terminen o venzan
+                    time.sleep(poll)
+                    continue
+
+                done, _ = wait(running, timeout=min(poll, heartbeat), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    job_id, job = running.pop(fut)
+                    free += job["threads"]
+                    try:
+                        row = fut.result()
+                    except Exception as e:
+                        queue.fail(job_id, worker, f"{type(e).__name__}: {e}")
+                        log(f"[{worker}] error en {job['instance']} {job['formulation']} {job['solver']}: {e}")
+                        continue
+                    merge_row(results_path, COLUMNS, row)
+                    queue.complete(job_id)
+                    finished += 1
+                    log(f"[{worker}] ✓ {row['Instancia']} {row['Formulacion']} {row['Solver']}: "
+                        f"{row['Tiempo_s']} s")
+
+                if running and time.monotonic() - last_beat >= heartbeat:
+                    lost = queue.heartbeat([job_id for job_id, _ in running.values()], worker, lease)
+                    if lost:
+                        log(f"[{worker}] {len(lost)} leases vencidos: otro nodo puede repetir esos trabajos")
+                    last_beat = time.monotonic()
+    finally:
+        queue.close()
+
+
+def _print_counts(queue):
+    counts = queue.counts()
+    print("  ".join(f"{state}: {counts[state]}" for state in STATES))
+
+
+def demo(workers=3, cores=2, instances=("br17", "ftv33", "ftv55"), time_limit=20.0, lease=6.0, kill_after=3.0):
+    """
+    Cola y resultados en un directorio temporal, `workers` trabajadores como
+    procesos aparte (igual que en nodos distintos) y el primero muerto con
+    SIGKILL (con todo su grupo de procesos, como si se cayera el nodo) a los
+    kill_after segundos: sus trabajos vuelven a la cola cuando
+    vence el lease y los terminan los demás.
+    """
+    tmp = Path(tempfile.mkdtemp(prefix="atsp_cola_"))
+    queue_path, results_path = tmp / "cola.sqlite", tmp / "resultados.csv"
+    queue = WorkQueue(queue_path)
+    jobs = make_jobs(list(instances), ["mtz_acotado", "gg"], ["highs"], cores)
+    queue.add(jobs, time_limit=time_limit)
+    print(f"{len(jobs)} trabajos en {queue_path}")
+
+    cmd = [sys.executable, "-m", "atsp.workqueue", "trabajar", "--cola", str(queue_path),
+           "--salida", str(results_path), "--cores", str(cores), "--lease", str(lease),
+           "--latido", str(lease / 3), "--espera", "1"]
+    procs = [subprocess.Popen(cmd + ["--nombre", f"trabajador{i}"], start_new_session=True)
+             for i in range(workers)]
+    time.sleep(kill_after)
+    os.killpg(procs[0].pid, signal.SIGKILL)
+    procs[0].wait()
+    print(f"trabajador0 muerto a los {kill_after} s")
+    for p in procs[1:]:
+        p.wait()
+
+    _print_counts(queue)
+    for row in queue.rows():
+        if row["intentos"] > 1 or row["estado"] != "hecho":
+            print(f"   {' '.join(row['clave'][:3])}: {row['estado']} en {row['intentos']} intentos"
+                  f"{' (' + row['error'] + ')' if row['error'] else ''}")
+    rows = ResultsSink(results_path, COLUMNS).rows()
+    keys = {tuple(r[k] for k in DEFAULT_KEY) for r in rows}
+    print(f"{len(rows)} filas en {results_path} ({len(keys)} claves distintas)")
+    queue.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cola de trabajos con leases para varios nodos")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("encolar", help="agregar trabajos a la cola")
+    p.add_argument("--cola", required=True, help="archivo SQLite en el sistema de archivos compartido")
+    p.add_argument("--instances", nargs="+", default=INSTANCES)
+    p.add_argument("--formulations", nargs="+", default=DEFAULT_FORMULATIONS, choices=list(FORMULATIONS))
+    p.add_argument("--solvers", nargs="+", default=DEFAULT_SOLVERS, choices=list(SOLVERS))
+    p.add_argument("--time-limit", type=float, default=3600)
+    p.add_argument("--cores", type=int, default=os.cpu_count(), help="núcleos de referencia para los threads")
+    p.add_argument("--reduce", action="store_true", help="eliminar arcos por costo reducido")
+    p.add_argument("--k", type=int, help="grafo de k vecinos con pricing de arcos")
+    p.add_argument("--exacto", action="store_true",
+                   help="con n <= exact.EXACT_MAX_N probar antes Held-Karp / branch-and-bound "
+                        "de asignación (las filas ya no comparan formulaciones ni solvers)")
+    p.add_argument("--perfil", help="JSON de parámetros por clase de tamaño (atsp.tuning), visible desde los nodos")
+    p.add_argument("--salida", help="CSV de resultados: no se encolan los trabajos ya registrados")
+
+    p = sub.add_parser("trabajar", help="correr trabajos de la cola en este nodo")
+    p.add_argument("--cola", required=True)
+    p.add_argument("--salida", required=True, help="CSV de resultados compartido")
+    p.add_argument("--cores", type=int, default=os.cpu_count())
+    p.add_argument("--nombre", help="identificador del trabajador (por defecto host:pid)")
+    p.add_argument("--lease", type=float, default=300.0, help="segundos de validez de un lease")
+    p.add_argument("--latido", type=float, default=30.0, help="segundos entre renovaciones del lease")
+    p.add_argument("--espera", type=float, default=5.0, help="segundos entre consultas a la cola sin trabajos libres")
+
+    p = sub.add_parser("estado", help="trabajos por estado")
+    p.add_argument("--cola", required=True)
+    p.add_argument("--detalle", action="store_true", help="listar los trabajos no terminados")
+
+    p = sub.add_parser("demo", help="prueba local con varios trabajadores en un directorio temporal")
+    p.add_argument("--trabajadores", type=int, default=3)
+    p.add_argument("--cores", type=int, default=2)
+    p.add_argument("--instances", nargs="+", default=["br17", "ftv33", "ftv55"])
+    p.add_argument("--time-limit", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    if args.comando == "encolar":
+        job_kwargs = {"reduce": args.reduce, "k": args.k, "profile": args.perfil, "exact": args.exacto}
+        jobs = make_jobs(args.instances, args.formulations, args.solvers, args.cores)
+        if args.salida:
+            jobs = pending_jobs(jobs, ResultsSink(args.salida, COLUMNS), **job_kwargs)
+        queue = WorkQueue(args.cola)
+        added = queue.add(jobs, time_limit=args.time_limit, **job_kwargs)
+        print(f"{added} trabajos encolados ({len(jobs) - added} ya estaban)")
+        _print_counts(queue)
+    elif args.comando == "trabajar":
+        finished = work(args.cola, args.salida, args.cores, worker=args.nombre, lease=args.lease,
+                        heartbeat=args.latido, poll=args.espera, log=partial(print, flush=True))
+        print(f"{finished} trabajos terminados; resultados en {args.salida}")
+    elif args.comando == "estado":
+        queue = WorkQueue(args.cola)
+        _print_counts(queue)
+        if args.detalle:
+            for row in queue.rows():
+                if row["estado"] != "hecho":
+                    print(f"   {' '.join(row['clave'])}: {row['estado']} ({row['trabajador'] or '-'}, "
+                          f"{row['intentos']} intentos){' ' + row['error'] if row['error'] else ''}")
+    else:
+        demo(workers=args.trabajadores, cores=args.cores, instances=args.instances, time_limit=args.time_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Held-Karp y el branch-and-bound de asignación (atsp.exact) contra fuerza
+bruta: sus filas se escriben como óptimos probados (gap 0), así que cada
+costo tiene que coincidir con el mínimo sobre todas las permutaciones.
+
+    python -m pytest -q tests
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from atsp.cache import load_cached
+from atsp.exact import HELD_KARP_MAX_N, assignment_bb, held_karp, solve_exact
+from atsp.heuristics import tour_cost
+from atsp.instances import instance_path
+
+# óptimos de TSPLIB
+OPTIMOS = {"br17": 39, "ftv33": 1286}
+
+
+def brute_force(C):
+    """Mínimo sobre todos los tours que empiezan en 0."""
+    n = len(C)
+    if n <= 1:
+        return 0
+    perms = np.array(list(itertools.permutations(range(1, n))))
+    tours = np.hstack([np.zeros((len(perms), 1), dtype=int), perms])
+    return int(C[tours, np.roll(tours, -1, axis=1)].sum(axis=1).min())
+
+
+def instancias(seed, cantidad=40):
+    """Matrices aleatorias con semilla, n de 2 a 9. Las de rango chico tienen
+    muchos empates y arcos de costo cero (como br17)."""
+    rng = np.random.default_rng(seed)
+    for _ in range(cantidad):
+        n = int(rng.integers(2, 10))
+        alto = int(rng.choice([3, 10, 1000]))
+        C = rng.integers(0, alto, size=(n, n))
+        if rng.random() < 0.3:
+            # bloques de costo cero entre nodos, como los grupos de br17
+            ceros = rng.random((n, n)) < 0.3
+            C[ceros] = 0
+        np.fill_diagonal(C, 0)
+        yield C
+
+
+def es_tour(tour, n):
+    return len(tour) == n and sorted(int(v) for v in tour) == list(range(n)) and tour[0] == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_held_karp_fuerza_bruta(seed):
+    for C in instancias(seed):
+        res = held_karp(C)
+        assert es_tour(res.tour, len(C))
+        assert res.optimal and res.gap == 0
+        assert res.cost == tour_cost(C, res.tour) == brute_force(C)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_assignment_bb_fuerza_bruta(seed):
+    for C in instancias(100 + seed):
+        res = assignment_bb(C)
+        assert es_tour(res.tour, len(C))
+        assert res.optimal and res.lower_bound == res.cost
+        assert res.cost == tour_cost(C, res.tour) == brute_force(C)
+
+
+def test_assignment_bb_con_tour_inicial():
+    # el tour inicial solo da la cota superior: el óptimo no cambia
+    for C in instancias(200, cantidad=20):
+        tour = np.arange(len(C))
+        res = assignment_bb(C, tour=tour)
+        assert res.cost == brute_force(C)
+
+
+def test_assignment_bb_corte_no_se_declara_optimo():
+    C = load_cached(instance_path("ftv33"))
+    res = assignment_bb(C, node_limit=2)
+    assert res.lower_bound <= OPTIMOS["ftv33"] <= res.cost
+    if not res.optimal:
+        assert res.lower_bound < res.cost
+
+
+@pytest.mark.parametrize("nombre", sorted(OPTIMOS))
+def test_optimos_conocidos(nombre):
+    C = load_cached(instance_path(nombre))
+    res = solve_exact(C)
+    assert res.optimal
+    # br17 (n = 17) pasa por Held-Karp y ftv33 (n = 34) por el branch-and-bound
+    assert res.method == ("held_karp" if len(C) <= HELD_KARP_MAX_N else "bb_asignacion")
+    assert res.cost == tour_cost(C, res.tour) == OPTIMOS[nombre]